@@ -12,7 +12,9 @@ def check_job_status():
             'queued': '⏳ QUEUED',
             'running': '🔄 RUNNING',
             'done': '✅ DONE',
-            'failed': '❌ FAILED'
+            'failed': '❌ FAILED',
+            'skipped': '⏭️ SKIPPED',
+            'cancelled': '🚫 CANCELLED'
         }.get(job.status.value, '❓ UNKNOWN')
         
         print(f"{status_symbol} {job_id} | {job.repo_url}")
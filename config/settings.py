@@ -8,6 +8,22 @@ JOBS_COLLECTION = 'jobs'
 # Webhook Configuration
 WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 8080))
 WEBHOOK_PATH = '/webhook'
+WEBHOOK_QUEUE_SIZE = int(os.getenv('WEBHOOK_QUEUE_SIZE', 1000))  # accepted jobs not yet stored
+WEBHOOK_BATCH_SIZE = int(os.getenv('WEBHOOK_BATCH_SIZE', 100))  # jobs stored per write
+WEBHOOK_MAX_BODY_BYTES = int(os.getenv('WEBHOOK_MAX_BODY_BYTES', 25 * 1024 * 1024))  # GitHub's payload cap
+WEBHOOK_DEDUP_TTL = int(os.getenv('WEBHOOK_DEDUP_TTL', 24 * 3600))  # seconds a delivery ID is remembered
+WEBHOOK_DEDUP_SIZE = int(os.getenv('WEBHOOK_DEDUP_SIZE', 10000))  # delivery IDs remembered at most
+COALESCE_PUSHES = os.getenv('COALESCE_PUSHES', 'false').lower() == 'true'  # newer push skips queued jobs of its branch
+COALESCE_RUNNING = os.getenv('COALESCE_RUNNING', 'false').lower() == 'true'  # and cancels its running job too
+
+# API Configuration (served on the webhook port)
+API_PREFIX = '/api'
+API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', 50))
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', 200))
+API_CORS_ORIGIN = os.getenv('API_CORS_ORIGIN', '*')  # empty disables CORS headers
+API_GZIP_MIN_BYTES = int(os.getenv('API_GZIP_MIN_BYTES', 1024))  # smaller responses are sent as is
+LOG_STREAM_POLL_INTERVAL = float(os.getenv('LOG_STREAM_POLL_INTERVAL', 0.5))  # one read per watched job
+LOG_STREAM_KEEPALIVE = float(os.getenv('LOG_STREAM_KEEPALIVE', 15))  # seconds between idle comments
 
 # GitHub Configuration
 GITHUB_SECRET = os.getenv('GITHUB_SECRET', '')
@@ -15,4 +31,48 @@ GITHUB_SECRET = os.getenv('GITHUB_SECRET', '')
 # Pipeline Configuration
 PIPELINE_FILE = '.cicd.yml'
 WORKSPACE_DIR = os.getenv('WORKSPACE_DIR', './workspace')
-LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
\ No newline at end of file
+WORKTREE_GC_INTERVAL = int(os.getenv('WORKTREE_GC_INTERVAL', 600))
+STEP_PARALLELISM = int(os.getenv('STEP_PARALLELISM', 4))  # per job, for steps with needs
+STEP_CACHE_DIR = os.getenv('STEP_CACHE_DIR', './cache/steps')
+STEP_CACHE_MAX_BYTES = int(os.getenv('STEP_CACHE_MAX_BYTES', 2 * 1024 * 1024 * 1024))
+CHECKOUT_DEPTH = int(os.getenv('CHECKOUT_DEPTH', 0))  # 0 fetches full history
+CHECKOUT_FILTER = os.getenv('CHECKOUT_FILTER', '')  # e.g. 'blob:none'
+STEP_TIMEOUT = int(os.getenv('STEP_TIMEOUT', 300))  # seconds, unless a step sets timeout
+STEP_KILL_GRACE = int(os.getenv('STEP_KILL_GRACE', 10))  # seconds between SIGTERM and SIGKILL
+STEP_LOG_MAX_BYTES = int(os.getenv('STEP_LOG_MAX_BYTES', 10 * 1024 * 1024))
+STEP_LOG_TAIL_LINES = int(os.getenv('STEP_LOG_TAIL_LINES', 200))
+LOG_SPILL_DIR = os.getenv('LOG_SPILL_DIR', './logs/spill')
+LOG_FLUSH_INTERVAL = float(os.getenv('LOG_FLUSH_INTERVAL', 1.0))
+LOG_FLUSH_LINES = int(os.getenv('LOG_FLUSH_LINES', 200))
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+
+# Security Scan Configuration
+SCAN_MAX_FILE_BYTES = int(os.getenv('SCAN_MAX_FILE_BYTES', 5 * 1024 * 1024))  # larger files are skipped
+SCAN_CACHE_PATH = os.getenv('SCAN_CACHE_PATH', './cache/scan.db')  # per-blob findings; empty disables
+SCAN_WORKERS = int(os.getenv('SCAN_WORKERS', os.cpu_count() or 1))  # processes; 1 scans in-process
+SCAN_BATCH_BYTES = int(os.getenv('SCAN_BATCH_BYTES', 1024 * 1024))  # least work worth sending to a process
+SCAN_ABORT_ON_CRITICAL = os.getenv('SCAN_ABORT_ON_CRITICAL', 'true').lower() == 'true'
+ADVISORY_DB_PATH = os.getenv('ADVISORY_DB_PATH', 'advisories.db')  # see import_advisories.py
+SCAN_IGNORE_DIRS = [d for d in os.getenv('SCAN_IGNORE_DIRS', '.git').split(',') if d]  # never walked
+
+# Job Queue Configuration
+QUEUE_BACKEND = os.getenv('QUEUE_BACKEND', 'file')  # 'file' or 'sqlite'
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'jobs.db')
+JOBS_FILE = os.getenv('JOBS_FILE', 'jobs.json')
+JOURNAL_COMPACT_THRESHOLD = int(os.getenv('JOURNAL_COMPACT_THRESHOLD', 1000))
+QUEUE_NOTIFY_DIR = os.getenv('QUEUE_NOTIFY_DIR', '.queue-notify')
+LOG_DIR = os.getenv('LOG_DIR', './logs/jobs')  # file backend: job logs, one directory per job
+LOG_SEGMENT_LINES = int(os.getenv('LOG_SEGMENT_LINES', 4096))  # lines per log segment file
+LOG_HOT_SECONDS = int(os.getenv('LOG_HOT_SECONDS', 3600))  # finished jobs' logs stay uncompressed this long
+LOG_RETENTION_DAYS = float(os.getenv('LOG_RETENTION_DAYS', 0))  # logs of older jobs are dropped; 0 keeps all
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 0))  # oldest finished logs dropped beyond this; 0 is unlimited
+LOG_ARCHIVE_DIR = os.getenv('LOG_ARCHIVE_DIR', '')  # dropped logs are moved here; empty deletes them
+LOG_COMPACT_INTERVAL = int(os.getenv('LOG_COMPACT_INTERVAL', 300))  # seconds between log compactor runs
+
+# Executor Configuration
+EXECUTOR_WORKERS = int(os.getenv('EXECUTOR_WORKERS', os.cpu_count() or 1))
+LEASE_SECONDS = int(os.getenv('LEASE_SECONDS', 60))
+HEARTBEAT_INTERVAL = int(os.getenv('HEARTBEAT_INTERVAL', 15))
+CANCEL_CHECK_INTERVAL = float(os.getenv('CANCEL_CHECK_INTERVAL', 2))  # how soon a running job sees cancel_job()
+REAPER_INTERVAL = int(os.getenv('REAPER_INTERVAL', 30))
+POLL_INTERVAL = float(os.getenv('POLL_INTERVAL', 5))  # fallback when no wakeup arrives
@@ -0,0 +1,215 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import zipfile
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from config.settings import ADVISORY_DB_PATH
+from core.dependency_parser import Dependency, normalize_pypi_name
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS advisories (
+    id TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    modified TEXT
+);
+CREATE TABLE IF NOT EXISTS affected (
+    ecosystem TEXT NOT NULL,
+    package TEXT NOT NULL,
+    advisory_id TEXT NOT NULL,
+    introduced TEXT,
+    fixed TEXT,
+    last_affected TEXT,
+    version TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_affected_package ON affected (ecosystem, package);
+CREATE INDEX IF NOT EXISTS idx_affected_advisory ON affected (advisory_id);
+"""
+
+# Package names looked up per query, below SQLite's bound parameter limit
+LOOKUP_BATCH = 500
+
+# Advisory severities mapped onto the scanner's levels
+SEVERITIES = {'LOW': 'LOW', 'MODERATE': 'MEDIUM', 'MEDIUM': 'MEDIUM', 'HIGH': 'HIGH', 'CRITICAL': 'CRITICAL'}
+
+# Pre-release labels in increasing order; a final release sorts after all of them
+PRE_RELEASES = {'dev': 0, 'a': 1, 'alpha': 1, 'b': 2, 'beta': 2, 'c': 3, 'rc': 3, 'pre': 3, 'preview': 3}
+FINAL_RELEASE = 4
+POST_RELEASE = 5
+
+VERSION_RELEASE = re.compile(r'(\d+(?:\.\d+)*)(.*)')
+VERSION_TOKEN = re.compile(r'[a-z]+|\d+')
+
+# Range bounds repeat across advisories, so keys are memoized
+@lru_cache(maxsize=65536)
+def version_key(version: str) -> Tuple:
+    """Sort key covering PEP 440 and semver versions as used in lockfiles"""
+    version = version.strip().lower().lstrip('v').split('+', 1)[0]
+    match = VERSION_RELEASE.match(version)
+    if not match:
+        return ((0,), (-1,))
+    release = [int(part) for part in match.group(1).split('.')]
+    while len(release) > 1 and release[-1] == 0:
+        release.pop()
+
+    tokens = VERSION_TOKEN.findall(match.group(2))
+    numbers = tuple(int(token) for token in tokens if token.isdigit())
+    labels = [token for token in tokens if not token.isdigit()]
+    if not labels:
+        suffix = (FINAL_RELEASE,) + numbers
+    elif labels[0] in ('post', 'r', 'rev'):
+        suffix = (POST_RELEASE,) + numbers
+    else:
+        # Unknown labels (semver "-canary" and the like) are pre-releases too
+        suffix = (PRE_RELEASES.get(labels[0], 3),) + numbers
+    return (tuple(release), suffix)
+
+class AdvisoryDB:
+    """Offline vulnerability advisories in SQLite, indexed by ecosystem and package.
+
+    Advisories are imported ahead of time from OSV JSON exports (see
+    ``import_advisories.py``), so scanning a job needs no network access.
+    """
+
+    def __init__(self, db_path: str = ADVISORY_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def is_empty(self) -> bool:
+        return self._connect().execute('SELECT 1 FROM advisories LIMIT 1').fetchone() is None
+
+    def find_vulnerable(self, dependencies: Iterable[Dependency]) -> List[Tuple[Dependency, Dict]]:
+        """Each dependency paired with every advisory whose ranges include its version"""
+        by_package: Dict[Tuple[str, str], List[Dependency]] = {}
+        for dependency in dependencies:
+            by_package.setdefault(dependency[:2], []).append(dependency)
+
+        conn = self._connect()
+        keys = list(by_package)
+        matches = []
+        for i in range(0, len(keys), LOOKUP_BATCH):
+            batch = keys[i:i + LOOKUP_BATCH]
+            placeholders = ', '.join('(?, ?)' for _ in batch)
+            rows = conn.execute(
+                f'SELECT f.ecosystem, f.package, f.introduced, f.fixed, f.last_affected, f.version, '
+                f'a.id, a.summary, a.severity FROM affected f JOIN advisories a ON a.id = f.advisory_id '
+                f'WHERE (f.ecosystem, f.package) IN (VALUES {placeholders})',
+                [value for key in batch for value in key]
+            )
+            for ecosystem, package, introduced, fixed, last_affected, exact, advisory_id, summary, severity in rows:
+                advisory = {'id': advisory_id, 'summary': summary, 'severity': severity}
+                for dependency in by_package[(ecosystem, package)]:
+                    if self._affects(dependency[2], introduced, fixed, last_affected, exact):
+                        matches.append((dependency, advisory))
+
+        # A package can be listed by several ranges of the same advisory
+        unique = {(dependency, advisory['id']): (dependency, advisory) for dependency, advisory in matches}
+        return list(unique.values())
+
+    def _affects(self, version: str, introduced: str, fixed: str, last_affected: str, exact: str) -> bool:
+        if exact is not None:
+            return version_key(version) == version_key(exact)
+        key = version_key(version)
+        if introduced and introduced != '0' and key < version_key(introduced):
+            return False
+        if fixed and key >= version_key(fixed):
+            return False
+        if last_affected and key > version_key(last_affected):
+            return False
+        return True
+
+    def import_osv(self, paths: List[str]) -> int:
+        """Load OSV advisories from JSON files, directories or zip exports.
+
+        Advisories already present are replaced, so importing a fresh
+        export updates the database in place. Returns the number imported.
+        """
+        count = 0
+        with self._connect() as conn:
+            for advisory in self._read_osv(paths):
+                if self._store(conn, advisory):
+                    count += 1
+        return count
+
+    def _read_osv(self, paths: List[str]) -> Iterator[Dict]:
+        for path in paths:
+            if os.path.isdir(path):
+                for root, _, files in os.walk(path):
+                    yield from self._read_osv(sorted(os.path.join(root, name) for name in files if name.endswith('.json')))
+            elif zipfile.is_zipfile(path):
+                with zipfile.ZipFile(path) as archive:
+                    for name in archive.namelist():
+                        if name.endswith('.json'):
+                            yield from self._advisories(json.loads(archive.read(name)))
+            else:
+                with open(path, 'r', encoding='utf-8') as f:
+                    yield from self._advisories(json.load(f))
+
+    def _advisories(self, data) -> Iterator[Dict]:
+        yield from (data if isinstance(data, list) else [data])
+
+    def _store(self, conn: sqlite3.Connection, advisory: Dict) -> bool:
+        if 'id' not in advisory:
+            return False
+        conn.execute('DELETE FROM affected WHERE advisory_id = ?', (advisory['id'],))
+        if advisory.get('withdrawn'):
+            conn.execute('DELETE FROM advisories WHERE id = ?', (advisory['id'],))
+            return False
+        conn.execute(
+            'INSERT OR REPLACE INTO advisories (id, summary, severity, modified) VALUES (?, ?, ?, ?)',
+            (advisory['id'], advisory.get('summary') or advisory.get('details', '')[:200],
+             self._severity(advisory), advisory.get('modified'))
+        )
+
+        rows = []
+        for affected in advisory.get('affected', []):
+            package = affected.get('package') or {}
+            ecosystem, name = package.get('ecosystem'), package.get('name')
+            if not ecosystem or not name:
+                continue
+            if ecosystem == 'PyPI':
+                name = normalize_pypi_name(name)
+            for version in affected.get('versions', []):
+                rows.append((ecosystem, name, advisory['id'], None, None, None, version))
+            for affected_range in affected.get('ranges', []):
+                if affected_range.get('type') not in ('ECOSYSTEM', 'SEMVER'):
+                    continue
+                # Events alternate: an introduced version, then where that span ends
+                introduced = None
+                for event in affected_range.get('events', []):
+                    if 'introduced' in event:
+                        if introduced is not None:
+                            rows.append((ecosystem, name, advisory['id'], introduced, None, None, None))
+                        introduced = event['introduced']
+                    elif introduced is not None and ('fixed' in event or 'last_affected' in event):
+                        rows.append((ecosystem, name, advisory['id'], introduced,
+                                     event.get('fixed'), event.get('last_affected'), None))
+                        introduced = None
+                if introduced is not None:
+                    rows.append((ecosystem, name, advisory['id'], introduced, None, None, None))
+        conn.executemany(
+            'INSERT INTO affected (ecosystem, package, advisory_id, introduced, fixed, last_affected, version) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            rows
+        )
+        return True
+
+    def _severity(self, advisory: Dict) -> str:
+        severity = (advisory.get('database_specific') or {}).get('severity', '')
+        return SEVERITIES.get(str(severity).upper(), 'MEDIUM')
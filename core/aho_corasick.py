@@ -0,0 +1,52 @@
+from collections import deque
+from typing import Dict, List
+
+class AhoCorasick:
+    """Finds many literals in a text with a single pass over it.
+
+    The trie's failure links are folded into a complete transition table
+    when the automaton is built, so matching costs one dict lookup per
+    character however many literals there are.
+    """
+
+    def __init__(self, literals: List[str]):
+        self.literals = list(literals)
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[int]] = [[]]
+        for index, literal in enumerate(self.literals):
+            state = 0
+            for char in literal:
+                if char not in goto[state]:
+                    goto[state][char] = len(goto)
+                    goto.append({})
+                    outputs.append([])
+                state = goto[state][char]
+            outputs[state].append(index)
+
+        # Breadth-first, so a state's failure target is always finished first
+        fail = [0] * len(goto)
+        self._delta: List[Dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, target in goto[state].items():
+                fail[target] = self._delta[fail[state]].get(char, 0)
+                outputs[target] = outputs[target] + outputs[fail[target]]
+                queue.append(target)
+            self._delta[state] = {**self._delta[fail[state]], **goto[state]}
+        self._outputs = [tuple(output) for output in outputs]
+
+    def first_matches(self, text: str) -> Dict[int, int]:
+        """Offset of the first occurrence of each literal found, by literal index"""
+        delta, outputs, literals = self._delta, self._outputs, self.literals
+        found: Dict[int, int] = {}
+        state = 0
+        for pos, char in enumerate(text):
+            state = delta[state].get(char, 0)
+            if outputs[state]:
+                for index in outputs[state]:
+                    if index not in found:
+                        found[index] = pos - len(literals[index]) + 1
+                if len(found) == len(literals):
+                    break
+        return found
@@ -0,0 +1,40 @@
+import threading
+import time
+from collections import OrderedDict
+
+from config.settings import WEBHOOK_DEDUP_TTL, WEBHOOK_DEDUP_SIZE
+
+class DeliveryCache:
+    """Recently accepted webhook delivery IDs, bounded by age and by count.
+
+    GitHub redelivers with the same ``X-GitHub-Delivery`` ID, so a delivery
+    that was already claimed is a duplicate. IDs are kept in claim order,
+    which lets both expiry and eviction drop from the oldest end.
+    """
+
+    def __init__(self, ttl: float = WEBHOOK_DEDUP_TTL, max_entries: int = WEBHOOK_DEDUP_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
+
+    def claim(self, delivery_id: str) -> bool:
+        """Remember ``delivery_id``; False if it was claimed within the TTL"""
+        now = time.monotonic()
+        with self._lock:
+            while self._seen and next(iter(self._seen.values())) <= now - self.ttl:
+                self._seen.popitem(last=False)
+            if delivery_id in self._seen:
+                return False
+            self._seen[delivery_id] = now
+            if len(self._seen) > self.max_entries:
+                self._seen.popitem(last=False)
+            return True
+
+    def release(self, delivery_id: str):
+        """Forget a claimed delivery that was not accepted, so its retry is"""
+        with self._lock:
+            self._seen.pop(delivery_id, None)
+
+    def __len__(self):
+        return len(self._seen)
@@ -0,0 +1,68 @@
+import json
+import re
+from typing import List, Tuple
+
+# (ecosystem, package, version), ecosystems named as in OSV advisories
+Dependency = Tuple[str, str, str]
+
+PINNED_REQUIREMENT = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*===?\s*([^\s;,#\\]+)')
+POETRY_FIELD = re.compile(r'^(name|version)\s*=\s*"([^"]*)"')
+
+def normalize_pypi_name(name: str) -> str:
+    """PEP 503 normalized project name"""
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+def parse_requirements(content: str) -> List[Dependency]:
+    """Pinned (==) requirements; ranges cannot be matched to one version"""
+    dependencies = []
+    for line in content.splitlines():
+        match = PINNED_REQUIREMENT.match(line)
+        if match:
+            dependencies.append(('PyPI', normalize_pypi_name(match.group(1)), match.group(2)))
+    return dependencies
+
+def parse_package_lock(content: str) -> List[Dependency]:
+    """Installed packages from an npm package-lock.json (lockfile v1 to v3)"""
+    lock = json.loads(content)
+    dependencies = []
+    packages = lock.get('packages')
+    if packages:
+        for path, info in packages.items():
+            if not path or info.get('link') or 'version' not in info:
+                continue
+            name = info.get('name') or path.rsplit('node_modules/', 1)[-1]
+            dependencies.append(('npm', name, info['version']))
+        return dependencies
+
+    # Lockfile v1 nests dependencies of dependencies
+    pending = [lock.get('dependencies') or {}]
+    while pending:
+        for name, info in pending.pop().items():
+            if 'version' in info:
+                dependencies.append(('npm', name, info['version']))
+            if info.get('dependencies'):
+                pending.append(info['dependencies'])
+    return dependencies
+
+def parse_poetry_lock(content: str) -> List[Dependency]:
+    """Packages from the [[package]] tables of a poetry.lock"""
+    dependencies = []
+    package = None
+    for line in content.splitlines():
+        line = line.strip()
+        if line.startswith('['):
+            package = {} if line == '[[package]]' else None
+            continue
+        match = POETRY_FIELD.match(line) if package is not None else None
+        if match and match.group(1) not in package:
+            package[match.group(1)] = match.group(2)
+            if len(package) == 2:
+                dependencies.append(('PyPI', normalize_pypi_name(package['name']), package['version']))
+    return dependencies
+
+# File name to parser, for every manifest the dependency scan reads
+DEPENDENCY_FILES = {
+    'requirements.txt': parse_requirements,
+    'package-lock.json': parse_package_lock,
+    'poetry.lock': parse_poetry_lock
+}
@@ -1,14 +1,138 @@
-import subprocess
 import os
 import shutil
+import signal
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional, Set
 
 # Import removed - using shared_queue
+from config.settings import (HEARTBEAT_INTERVAL, REAPER_INTERVAL, EXECUTOR_WORKERS, POLL_INTERVAL,
+                             WORKTREE_GC_INTERVAL, STEP_PARALLELISM, SCAN_ABORT_ON_CRITICAL,
+                             CANCEL_CHECK_INTERVAL, LOG_COMPACT_INTERVAL)
+from core.job_logger import JobLogger
 from core.pipeline_parser import PipelineParser
 from core.security_scanner import SecurityScanner
+from core.step_cache import StepCache
+from core.step_runner import StepResult, StepRunner
 from models.job import Job, JobStatus
 
+class LeaseHeartbeat:
+    """Background thread that keeps a claimed job's lease alive.
+
+    With ``on_cancel`` it also checks every ``cancel_interval`` seconds
+    whether cancellation was requested, and calls it once if so. If the
+    lease cannot be renewed the job may already run elsewhere, so
+    ``on_lost`` is called to stop it here.
+    """
+
+    def __init__(self, job_queue, job_id: str, worker_id: str, interval: int = HEARTBEAT_INTERVAL,
+                 on_cancel: Optional[Callable[[], None]] = None, cancel_interval: float = CANCEL_CHECK_INTERVAL,
+                 on_lost: Optional[Callable[[], None]] = None):
+        self.job_queue = job_queue
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.interval = interval
+        self.on_cancel = on_cancel
+        self.on_lost = on_lost
+        self.cancel_interval = cancel_interval
+        self.lost = threading.Event()
+        self.cancelled = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        check_interval = min(self.interval, self.cancel_interval) if self.on_cancel else self.interval
+        next_renewal = time.monotonic() + self.interval
+        while not self._stop.wait(max(0, min(check_interval, next_renewal - time.monotonic()))):
+            try:
+                if self.on_cancel and not self.cancelled.is_set() and \
+                        self.job_queue.is_cancel_requested(self.job_id):
+                    print(f"Cancelling job {self.job_id}")
+                    self.cancelled.set()
+                    self.on_cancel()
+                # Keep renewing while a cancelled job winds down
+                if time.monotonic() >= next_renewal:
+                    next_renewal = time.monotonic() + self.interval
+                    if not self.job_queue.renew_lease(self.job_id, self.worker_id):
+                        print(f"Lost lease on job {self.job_id}, stopping it")
+                        self.lost.set()
+                        if self.on_lost:
+                            self.on_lost()
+                        return
+            except Exception as e:
+                print(f"Heartbeat error for job {self.job_id}: {e}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+class LogCompactor:
+    """Background thread that applies log retention every ``interval`` seconds.
+
+    Compression runs here rather than on a worker, so no job waits for it.
+    """
+
+    def __init__(self, job_queue, interval: int = LOG_COMPACT_INTERVAL):
+        self.job_queue = job_queue
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="log-compactor", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                stats = self.job_queue.compact_logs()
+                if stats['compressed'] or stats['dropped']:
+                    print(f"Compressed logs of {stats['compressed']} jobs ({stats['bytes_saved']} bytes saved), "
+                          f"dropped logs of {stats['dropped']} jobs")
+            except Exception as e:
+                print(f"Log compaction error: {e}")
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+class LeaseReaper:
+    """Background thread that requeues jobs whose worker stopped heartbeating.
+
+    It runs on its own timer so expired leases are reclaimed even while
+    every worker thread of this executor is busy with a long job.
+    """
+
+    def __init__(self, job_queue, interval: int = REAPER_INTERVAL):
+        self.job_queue = job_queue
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lease-reaper", daemon=True)
+
+    def _run(self):
+        while True:
+            try:
+                for job_id in self.job_queue.requeue_expired_jobs():
+                    print(f"Requeued job {job_id} after its lease expired")
+            except Exception as e:
+                print(f"Lease reaper error: {e}")
+            if self._stop.wait(self.interval):
+                return
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
 class PipelineExecutor:
     def __init__(self, job_queue = None):
         if job_queue is None:
@@ -17,103 +141,391 @@ class PipelineExecutor:
         else:
             self.job_queue = job_queue
         self.parser = PipelineParser()
-        self.security_scanner = SecurityScanner()
+        self.step_cache = StepCache()
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._last_gc = 0.0
+        self._local = threading.local()
+        self._stopping = threading.Event()
+        self._cancel_lock = threading.Lock()
+        self._cancelled_jobs: Set[str] = set()
+        # Jobs whose lease was lost; they may run elsewhere, so nothing is recorded
+        self._lost_jobs: Set[str] = set()
+        self._job_runners: Dict[str, Set[StepRunner]] = {}
+    
+    @property
+    def security_scanner(self) -> SecurityScanner:
+        # The scanner keeps per-scan state, so each worker thread gets its own
+        scanner = getattr(self._local, 'security_scanner', None)
+        if scanner is None:
+            scanner = self._local.security_scanner = SecurityScanner()
+        return scanner
+    
+    def _update_status(self, job_id: str, status: JobStatus, logs: JobLogger):
+        """Record the outcome unless the job was reclaimed by another worker"""
+        if self._is_lost(job_id):
+            print(f"Lost the lease on job {job_id}, discarding result")
+            return
+        if status == JobStatus.FAILED and self._is_cancelled(job_id):
+            logs.append(f"[{datetime.now()}] Job cancelled")
+            status = JobStatus.CANCELLED
+        logs.flush()
+        if not self.job_queue.update_job_status(job_id, status, worker_id=self.worker_id):
+            print(f"Job {job_id} is no longer owned by {self.worker_id}, discarding result")
+    
+    def _prune_worktrees(self):
+        """Remove worktrees whose job is no longer running"""
+        if time.monotonic() - self._last_gc < WORKTREE_GC_INTERVAL:
+            return
+        self._last_gc = time.monotonic()
+        
+        def is_active(job_id: str) -> bool:
+            job = self.job_queue.get_job(job_id, logs=False)
+            return job is not None and job.status == JobStatus.RUNNING
+        
+        for path in self.parser.prune_worktrees(is_active):
+            print(f"Pruned stale worktree {path}")
     
     def execute_job(self, job_id: str, job: Job) -> bool:
-        """Execute a single job"""
-        logs = []
+        """Execute a job this executor has claimed with ``get_next_job()``.
+
+        Results are only recorded for the worker holding the lease, so any
+        other job is refused rather than run for nothing.
+        """
+        leased = self.job_queue.get_job(job_id, logs=False)
+        if leased is None or leased.status != JobStatus.RUNNING or leased.worker_id != self.worker_id:
+            raise ValueError(f"Job {job_id} is not leased to {self.worker_id}; claim it with get_next_job() first")
+        try:
+            with JobLogger(self.job_queue, job_id, self.worker_id) as logs:
+                return self._run_job(job_id, job, logs)
+        finally:
+            with self._cancel_lock:
+                self._cancelled_jobs.discard(job_id)
+                self._lost_jobs.discard(job_id)
+                self._job_runners.pop(job_id, None)
+    
+    def cancel_job(self, job_id: str):
+        """Stop a job this executor is running; its steps are killed and it ends cancelled"""
+        with self._cancel_lock:
+            self._cancelled_jobs.add(job_id)
+            runners = list(self._job_runners.get(job_id, ()))
+        for runner in runners:
+            runner.cancel()
+    
+    def abandon_job(self, job_id: str):
+        """Stop a job whose lease was lost, without recording anything more for it"""
+        with self._cancel_lock:
+            self._lost_jobs.add(job_id)
+        self.cancel_job(job_id)
+    
+    def _is_cancelled(self, job_id: str) -> bool:
+        with self._cancel_lock:
+            return job_id in self._cancelled_jobs
+    
+    def _is_lost(self, job_id: str) -> bool:
+        with self._cancel_lock:
+            return job_id in self._lost_jobs
+    
+    def _track_runner(self, job_id: str, runner: StepRunner, active: bool):
+        """Register a step's runner so cancel_job() can reach it"""
+        with self._cancel_lock:
+            runners = self._job_runners.setdefault(job_id, set())
+            if active:
+                runners.add(runner)
+            else:
+                runners.discard(runner)
+            cancelled = job_id in self._cancelled_jobs
+        if active and cancelled:
+            runner.cancel()
+    
+    def _run_job(self, job_id: str, job: Job, logs: JobLogger) -> bool:
         repo_path = None
+        succeeded = False
         
         try:
             logs.append(f"[{datetime.now()}] Starting job for {job.repo_url}@{job.commit_sha}")
             
             # Clone repository
             logs.append(f"[{datetime.now()}] Cloning repository...")
-            repo_path = self.parser.clone_repo(job.repo_url, job.commit_sha, job.branch)
+            repo_path = self.parser.clone_repo(job.repo_url, job.commit_sha, job.branch, job_id)
             logs.append(f"[{datetime.now()}] Repository cloned to {repo_path}")
             
-            # Parse pipeline
-            logs.append(f"[{datetime.now()}] Parsing pipeline...")
-            pipeline = self.parser.parse_pipeline(repo_path)
-            
-            if not self.parser.validate_pipeline(pipeline):
-                raise Exception("Invalid pipeline configuration")
-            
-            logs.append(f"[{datetime.now()}] Pipeline '{pipeline['name']}' loaded with {len(pipeline['steps'])} steps")
-            
-            # Security scan
-            logs.append(f"[{datetime.now()}] Running security scan...")
-            security_result = self.security_scanner.scan_repository(repo_path)
-            logs.append(f"[{datetime.now()}] Security scan: {security_result['total_issues']} issues found, Risk: {security_result['risk_level']}")
-            
-            # Block execution if critical security issues found
-            if security_result['risk_level'] == 'CRITICAL':
-                logs.append(f"[{datetime.now()}] CRITICAL security issues found - blocking execution")
-                for issue in security_result['issues']:
-                    if issue['severity'] == 'CRITICAL':
-                        logs.append(f"  - {issue['description']} in {issue['file']}")
-                self.job_queue.update_job_status(job_id, JobStatus.FAILED, logs)
-                return False
-            
-            # Execute steps
-            for i, step in enumerate(pipeline['steps']):
-                logs.append(f"[{datetime.now()}] Executing step {i+1}: {step['name']}")
-                
-                result = subprocess.run(
-                    step['run'],
-                    shell=True,
-                    cwd=repo_path,
-                    capture_output=True,
-                    text=True,
-                    timeout=300  # 5 minute timeout per step
-                )
-                
-                if result.stdout:
-                    logs.append(f"STDOUT: {result.stdout}")
-                if result.stderr:
-                    logs.append(f"STDERR: {result.stderr}")
-                
-                if result.returncode != 0:
-                    logs.append(f"[{datetime.now()}] Step failed with exit code {result.returncode}")
-                    self.job_queue.update_job_status(job_id, JobStatus.FAILED, logs)
-                    return False
-                
-                logs.append(f"[{datetime.now()}] Step {step['name']} completed successfully")
-            
-            logs.append(f"[{datetime.now()}] All steps completed successfully")
-            self.job_queue.update_job_status(job_id, JobStatus.DONE, logs)
-            return True
+            succeeded = self._run_pipeline(job_id, job, repo_path, logs)
             
         except Exception as e:
             logs.append(f"[{datetime.now()}] Job failed: {str(e)}")
-            self.job_queue.update_job_status(job_id, JobStatus.FAILED, logs)
-            return False
         
         finally:
-            # Keep workspace for next run (faster git pull)
+            # The mirror stays cached; only this job's worktree goes away
             if repo_path:
-                logs.append(f"[{datetime.now()}] Workspace preserved for future runs")
+                try:
+                    self.parser.release_workspace(repo_path)
+                    logs.append(f"[{datetime.now()}] Workspace released")
+                except Exception as e:
+                    logs.append(f"[{datetime.now()}] Failed to release workspace: {e}")
+        
+        # Recorded after the last log line: log compaction relies on the
+        # logs of finished jobs never being written again
+        self._update_status(job_id, JobStatus.DONE if succeeded else JobStatus.FAILED, logs)
+        return succeeded
     
-    def run_worker(self):
-        """Main worker loop to process jobs"""
-        print("Pipeline executor started")
+    def _run_pipeline(self, job_id: str, job: Job, repo_path: str, logs: JobLogger) -> bool:
+        """Parse, scan and run a checked out pipeline; True if every step passed"""
+        # Parse pipeline
+        logs.append(f"[{datetime.now()}] Parsing pipeline...")
+        pipeline = self.parser.parse_pipeline(repo_path)
         
-        while True:
+        if not self.parser.validate_pipeline(pipeline):
+            raise Exception("Invalid pipeline configuration")
+        
+        logs.append(f"[{datetime.now()}] Pipeline '{pipeline['name']}' loaded with {len(pipeline['steps'])} steps")
+        
+        # Security scan
+        logs.append(f"[{datetime.now()}] Running security scan...")
+        security_result = self.security_scanner.scan_repository(repo_path, abort_on_critical=SCAN_ABORT_ON_CRITICAL)
+        logs.append(f"[{datetime.now()}] Security scan: {security_result['total_issues']} issues found, Risk: {security_result['risk_level']}")
+        stats = self.security_scanner.stats
+        logs.append(f"[{datetime.now()}] Security scan took {stats['seconds']:.2f}s, "
+                    f"{stats['cached']}/{stats['files']} files from cache"
+                    f"{', stopped at first CRITICAL finding' if stats['aborted'] else ''}")
+        
+        # Block execution if critical security issues found
+        if security_result['risk_level'] == 'CRITICAL':
+            logs.append(f"[{datetime.now()}] CRITICAL security issues found - blocking execution")
+            for issue in security_result['issues']:
+                if issue['severity'] == 'CRITICAL':
+                    location = f"{issue['file']}:{issue['line']}" if 'line' in issue else issue['file']
+                    logs.append(f"  - {issue['description']} in {location}")
+            return False
+        
+        # Execute steps
+        if not self._run_steps(job_id, job.repo_url, pipeline, repo_path, logs):
+            return False
+        
+        logs.append(f"[{datetime.now()}] All steps completed successfully")
+        return True
+    
+    def _run_steps(self, job_id: str, repo_url: str, pipeline: Dict, repo_path: str, logs: JobLogger) -> bool:
+        """Run the pipeline's steps; sequentially unless any step declares needs"""
+        steps = pipeline['steps']
+        if not self.parser.uses_needs(steps):
+            return all(self._run_step(job_id, repo_url, i, step, repo_path, logs, StepRunner(logs.append))
+                       for i, step in enumerate(steps))
+        return self._run_step_graph(job_id, repo_url, pipeline, repo_path, logs)
+    
+    def _run_step_graph(self, job_id: str, repo_url: str, pipeline: Dict, repo_path: str, logs: JobLogger) -> bool:
+        """Run steps as soon as their needs are met, cancelling the rest on failure"""
+        parallelism = max(1, int(pipeline.get('parallelism', STEP_PARALLELISM)))
+        index = {step['name']: i for i, step in enumerate(pipeline['steps'])}
+        needs = {step['name']: set(self.parser.step_needs(step)) for step in pipeline['steps']}
+        pending = {step['name']: step for step in pipeline['steps']}
+        runners = {}
+        running = {}
+        succeeded = set()
+        failed = False
+        
+        with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix=f"job-{job_id}") as pool:
+            while pending or running:
+                if not failed:
+                    for name in [name for name in pending if needs[name] <= succeeded]:
+                        if len(running) >= parallelism:
+                            break
+                        step = pending.pop(name)
+                        # Interleaved output from parallel steps is tagged with the step name
+                        runner = runners[name] = StepRunner(lambda line, name=name: logs.append(f"[{name}] {line}"))
+                        future = pool.submit(self._run_step, job_id, repo_url, index[name], step, repo_path,
+                                             logs, runner)
+                        running[future] = name
+                if not running:
+                    break
+                
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        ok = future.result()
+                    except Exception as e:
+                        logs.append(f"[{datetime.now()}] Step {name} crashed: {e}")
+                        ok = False
+                    if ok:
+                        succeeded.add(name)
+                    elif not failed:
+                        failed = True
+                        if running:
+                            logs.append(f"[{datetime.now()}] Cancelling running steps: "
+                                        f"{', '.join(running.values())}")
+                        for other in running.values():
+                            runners[other].cancel()
+        
+        for name in pending:
+            logs.append(f"[{datetime.now()}] Step {name} skipped")
+        return not failed and not pending
+    
+    def _run_step(self, job_id: str, repo_url: str, i: int, step: Dict, repo_path: str, logs: JobLogger,
+                  runner: StepRunner) -> bool:
+        logs.append(f"[{datetime.now()}] Executing step {i+1}: {step['name']}")
+        started_at = datetime.utcnow().isoformat()
+        
+        cache_key = None
+        cache_status = None
+        if step.get('cache'):
+            cache_key = self.step_cache.key(repo_url, repo_path, step)
+            entry = self.step_cache.lookup(cache_key)
+            if entry:
+                logs.append(f"[{datetime.now()}] Cache hit ({cache_key[:12]}), replaying recorded output")
+                for line in entry['logs']:
+                    runner.on_line(line)
+                self.step_cache.restore(entry, repo_path)
+                logs.append(f"[{datetime.now()}] Step {step['name']} completed successfully (cached)")
+                self._record_step(job_id, step, 'success', cache='hit', started_at=started_at,
+                                  completed_at=datetime.utcnow().isoformat())
+                return True
+            logs.append(f"[{datetime.now()}] Cache miss ({cache_key[:12]})")
+            cache_status = 'miss'
+            # Keep a copy of the step's output to replay on later hits
+            captured = []
+            emit = runner.on_line
+            runner.on_line = lambda line: (captured.append(line), emit(line))
+        
+        limits = self.parser.step_limits(step)
+        self._record_step(job_id, step, 'running', cache=cache_status, started_at=started_at)
+        self._track_runner(job_id, runner, True)
+        try:
+            result = runner.run(
+                step['run'],
+                cwd=repo_path,
+                timeout=limits['timeout'],
+                spill_name=f"{job_id}-{i+1}",
+                cpu_seconds=limits['cpu'],
+                memory_bytes=limits['memory']
+            )
+        finally:
+            self._track_runner(job_id, runner, False)
+        usage = self._step_usage(result)
+        
+        if result.cancelled:
+            logs.append(f"[{datetime.now()}] Step {step['name']} cancelled")
+            self._record_step(job_id, step, 'cancelled', cache=cache_status, **usage)
+            return False
+        
+        if result.timed_out:
+            logs.append(f"[{datetime.now()}] Step timed out after {limits['timeout']} seconds")
+        elif limits['cpu'] and (result.user_cpu or 0) + (result.sys_cpu or 0) >= limits['cpu']:
+            logs.append(f"[{datetime.now()}] Step reached its CPU limit of {limits['cpu']} seconds")
+        
+        if result.returncode != 0:
+            logs.append(f"[{datetime.now()}] Step {step['name']} failed with exit code {result.returncode}")
+            self._record_step(job_id, step, 'failed', cache=cache_status, **usage)
+            return False
+        
+        if cache_key and not result.spill_path:
+            try:
+                self.step_cache.store(cache_key, step, repo_path, captured)
+            except Exception as e:
+                logs.append(f"[{datetime.now()}] Failed to cache step result: {e}")
+        
+        logs.append(f"[{datetime.now()}] Step {step['name']} completed successfully")
+        self._record_step(job_id, step, 'success', cache=cache_status, **usage)
+        return True
+    
+    def _step_usage(self, result: StepResult) -> Dict:
+        """Timing and resource usage of a step run, for Job.steps"""
+        return {
+            'started_at': result.started_at.isoformat() if result.started_at else None,
+            'completed_at': result.completed_at.isoformat() if result.completed_at else None,
+            'wall_seconds': round(result.wall_seconds, 3) if result.wall_seconds is not None else None,
+            'user_cpu_seconds': result.user_cpu,
+            'sys_cpu_seconds': result.sys_cpu,
+            'max_rss_kb': result.max_rss_kb,
+            'exit_code': result.returncode if result.started_at else None
+        }
+    
+    def _record_step(self, job_id: str, step: Dict, status: str, **details):
+        """Store a step's outcome in Job.steps"""
+        if self._is_lost(job_id):
+            return
+        record = {'name': step['name'], 'run': step['run'], 'status': status}
+        record.update((key, value) for key, value in details.items() if value is not None)
+        self.job_queue.update_step(job_id, record, worker_id=self.worker_id)
+    
+    def run_worker(self, num_workers: int = EXECUTOR_WORKERS):
+        """Run a pool of worker threads until SIGTERM/SIGINT, then drain"""
+        print(f"Pipeline executor started with {num_workers} workers")
+        self._stopping.clear()
+        self._install_signal_handlers()
+        
+        workers = [
+            threading.Thread(target=self._worker_loop, name=f"executor-{i}", daemon=True)
+            for i in range(num_workers)
+        ]
+        for worker in workers:
+            worker.start()
+        
+        reaper = LeaseReaper(self.job_queue)
+        reaper.start()
+        # Only the file queue keeps logs that can be compacted
+        compactor = LogCompactor(self.job_queue) if hasattr(self.job_queue, 'compact_logs') else None
+        if compactor:
+            compactor.start()
+        try:
+            while any(worker.is_alive() for worker in workers):
+                for worker in workers:
+                    worker.join(timeout=1)
+        except KeyboardInterrupt:
+            self.stop()
+            for worker in workers:
+                worker.join()
+        finally:
+            reaper.stop()
+            if compactor:
+                compactor.stop()
+        print("Executor stopped")
+    
+    def stop(self):
+        """Stop claiming new jobs and let running ones finish"""
+        if not self._stopping.is_set():
+            print("Draining executor, waiting for running jobs to finish...")
+        self._stopping.set()
+        notifier = getattr(self.job_queue, 'notifier', None)
+        if notifier:
+            notifier.notify_local()
+    
+    def _wait_for_jobs(self, since: int, timeout: float):
+        """Sleep until the queue signals new work, the timeout, or stop()"""
+        notifier = getattr(self.job_queue, 'notifier', None)
+        if notifier:
+            notifier.wait(since, timeout)
+        else:
+            self._stopping.wait(timeout)
+    
+    def _install_signal_handlers(self):
+        try:
+            signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+            signal.signal(signal.SIGINT, lambda signum, frame: self.stop())
+        except ValueError:
+            # Signal handlers can only be installed from the main thread
+            pass
+    
+    def _worker_loop(self):
+        """Claim and execute jobs until the executor is stopped"""
+        notifier = getattr(self.job_queue, 'notifier', None)
+        while not self._stopping.is_set():
             try:
-                job_data = self.job_queue.get_next_job()
+                # Read the generation before claiming so a job added in
+                # between is not missed
+                generation = notifier.generation if notifier else 0
+                self._prune_worktrees()
+                job_data = self.job_queue.get_next_job(worker_id=self.worker_id)
                 if job_data:
                     job_id, job = job_data
                     print(f"Processing job {job_id}")
-                    self.execute_job(job_id, job)
+                    with LeaseHeartbeat(self.job_queue, job_id, self.worker_id,
+                                        on_cancel=lambda: self.cancel_job(job_id),
+                                        on_lost=lambda: self.abandon_job(job_id)):
+                        self.execute_job(job_id, job)
                 else:
-                    # No jobs available, wait a bit
-                    import time
-                    time.sleep(5)
+                    # No jobs available, wait for a wakeup (polling as fallback)
+                    self._wait_for_jobs(generation, POLL_INTERVAL)
                     
-            except KeyboardInterrupt:
-                print("Executor stopped")
-                break
             except Exception as e:
                 print(f"Executor error: {e}")
-                import time
-                time.sleep(10)
\ No newline at end of file
+                self._stopping.wait(10)
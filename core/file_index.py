@@ -0,0 +1,127 @@
+import os
+import subprocess
+from typing import Dict, Iterator, List, Optional
+
+from config.settings import SCAN_IGNORE_DIRS
+
+# Extension (without the dot) to the class stages select files by
+EXTENSION_KINDS = {
+    'yml': 'yaml',
+    'yaml': 'yaml',
+    'py': 'source',
+    'js': 'source',
+    'json': 'json',
+    'env': 'env'
+}
+
+class IndexedFile:
+    __slots__ = ('path', 'rel_path', 'kind', '_entry')
+
+    def __init__(self, entry: os.DirEntry, rel_path: str, kind: Optional[str]):
+        self.path = entry.path
+        self.rel_path = rel_path
+        self.kind = kind
+        self._entry = entry
+
+    @property
+    def size(self) -> int:
+        return self._entry.stat().st_size
+
+    @property
+    def mtime(self) -> float:
+        return self._entry.stat().st_mtime
+
+class FileIndex:
+    """Every file in a checkout, found with a single walk of the tree.
+
+    Directories named in ``ignore_dirs`` are not entered. Each file is
+    recorded with its extension class (see ``classify``) in the same
+    top-down order ``os.walk`` would visit it, so stages that used to walk
+    the tree themselves can iterate the index instead. Size and mtime are
+    stat()ed on first use and cached, so files nobody reads cost nothing.
+    """
+
+    def __init__(self, root: str, ignore_dirs: List[str] = SCAN_IGNORE_DIRS):
+        self.root = root
+        self.ignore_dirs = set(ignore_dirs)
+        self.files: List[IndexedFile] = []
+        self._by_path: Optional[Dict[str, IndexedFile]] = None
+        self._blob_shas: Optional[Dict[str, str]] = None
+        self._walk()
+
+    def __iter__(self) -> Iterator[IndexedFile]:
+        return iter(self.files)
+
+    def __len__(self):
+        return len(self.files)
+
+    def get(self, rel_path: str) -> Optional[IndexedFile]:
+        """Look up a file by its path relative to the root"""
+        if self._by_path is None:
+            self._by_path = {entry.rel_path: entry for entry in self.files}
+        return self._by_path.get(os.path.normpath(rel_path))
+
+    def blob_shas(self) -> Dict[str, str]:
+        """Git blob SHA of every tracked file whose checkout is unmodified.
+
+        Read from the git index, so no file is hashed. Empty when the root
+        is not a git checkout.
+        """
+        if self._blob_shas is None:
+            self._blob_shas = {}
+            try:
+                listing = self._git(['ls-files', '-s', '-z'])
+                modified = set(self._git(['ls-files', '-m', '-z']).split('\0'))
+            except (OSError, subprocess.CalledProcessError):
+                return self._blob_shas
+            for record in filter(None, listing.split('\0')):
+                meta, path = record.split('\t', 1)
+                mode, sha, stage = meta.split()
+                # Symlinks hash their target path, not the content scanned through them
+                if mode != '120000' and stage == '0' and path not in modified:
+                    self._blob_shas[path.replace('/', os.sep)] = sha
+        return self._blob_shas
+
+    def named(self, *names: str) -> List[IndexedFile]:
+        """Files with one of the given base names, anywhere in the tree"""
+        return [entry for entry in self.files if os.path.basename(entry.rel_path) in names]
+
+    def of_kind(self, *kinds: str) -> List[IndexedFile]:
+        return [entry for entry in self.files if entry.kind in kinds]
+
+    @staticmethod
+    def classify(name: str) -> Optional[str]:
+        """Extension class of a file name, or None for files no stage reads"""
+        if name.endswith('Dockerfile'):
+            return 'dockerfile'
+        _, dot, ext = name.rpartition('.')
+        return EXTENSION_KINDS.get(ext) if dot else None
+
+    def _git(self, args: List[str]) -> str:
+        return subprocess.run(['git', *args], cwd=self.root, check=True, capture_output=True, text=True).stdout
+
+    def _walk(self):
+        # Directories still to visit; popped from the end, pushed in reverse
+        pending = [('', self.root)]
+        while pending:
+            rel_dir, dir_path = pending.pop()
+            try:
+                with os.scandir(dir_path) as entries:
+                    entries = list(entries)
+            except OSError:
+                continue
+
+            subdirs = []
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                rel_path = rel_dir + entry.name
+                if is_dir:
+                    # Like os.walk, symlinked directories are listed but not entered
+                    if entry.name not in self.ignore_dirs and not entry.is_symlink():
+                        subdirs.append((rel_path + os.sep, entry.path))
+                    continue
+                self.files.append(IndexedFile(entry, rel_path, self.classify(entry.name)))
+            pending.extend(reversed(subdirs))
@@ -1,88 +1,571 @@
+import glob
+import hashlib
 import json
 import os
+import shutil
+import threading
 import uuid
-from typing import Optional, List
-from datetime import datetime
+from contextlib import contextmanager
+from typing import Dict, Optional, List
+from datetime import datetime, timedelta
 
+from config.settings import (JOURNAL_COMPACT_THRESHOLD, LEASE_SECONDS, QUEUE_NOTIFY_DIR, LOG_DIR, LOG_HOT_SECONDS,
+                             LOG_RETENTION_DAYS, LOG_MAX_BYTES, LOG_ARCHIVE_DIR, LOG_SPILL_DIR)
+from core.file_lock import file_lock
+from core.job_notifier import JobNotifier
+from core.job_summary import SummaryIndex, SummaryLog, summarize
+from core.log_store import LogStore
 from models.job import Job, JobStatus
 
+DATETIME_FIELDS = ('created_at', 'started_at', 'completed_at', 'lease_expires_at')
+# Jobs whose logs are complete
+FINISHED_STATUSES = (JobStatus.DONE.value, JobStatus.FAILED.value, JobStatus.SKIPPED.value, JobStatus.CANCELLED.value)
+
+def _repo_matches(repo_url: str, repo: str) -> bool:
+    """True if ``repo`` is the URL itself or its trailing owner/name"""
+    return repo_url == repo or repo_url.endswith(('/' + repo, '/' + repo + '.git'))
+
 class FileJobQueue:
-    def __init__(self, file_path="jobs.json"):
+    """Job queue backed by a JSON snapshot plus an append-only journal.
+
+    ``jobs.json`` holds the last snapshot and ``jobs.json.journal`` holds one
+    JSON event per line written since then. Every event is idempotent, so a
+    reader that replays part of the journal twice ends up in the same state.
+    Writers serialize on ``jobs.json.lock`` so several executor processes can
+    share one queue.
+
+    ``jobs.json.summary`` holds a summary line for every job added or whose
+    listing fields changed, so ``list_summaries()`` can answer from it
+    without loading the snapshot. Jobs are loaded on first use otherwise.
+
+    Log lines go to a ``LogStore``; a job's record only keeps ``log_path``
+    and ``log_lines``. Records written before that keep their logs inline
+    until more lines are appended. ``compact_logs()`` compresses and expires
+    the logs of finished jobs.
+    """
+
+    def __init__(self, file_path="jobs.json", compact_threshold=JOURNAL_COMPACT_THRESHOLD,
+                 notify_dir=QUEUE_NOTIFY_DIR, log_dir=LOG_DIR):
         self.file_path = file_path
+        self.journal_path = file_path + '.journal'
+        self.lock_path = file_path + '.lock'
+        self.summary_log = SummaryLog(file_path + '.summary')
+        self.log_store = LogStore(log_dir)
+        self.compact_threshold = compact_threshold
+        self.notifier = JobNotifier(notify_dir)
+        self._records = {}
+        self._queued = {}
+        self._running = {}
+        self._index = SummaryIndex()
+        # Events that changed a listing, and per job events readers can see
+        self._list_changes = 0
+        self._job_changes = {}
+        self._journal_offset = 0
+        self._journal_events = 0
+        # None until the snapshot is first loaded by _refresh()
+        self._snapshot_stat = None
+        self._journal_inode = None
+        self._thread_lock = threading.RLock()
         self._ensure_file_exists()
-    
+
     def _ensure_file_exists(self):
         if not os.path.exists(self.file_path):
             with open(self.file_path, 'w') as f:
                 json.dump({}, f)
-    
-    def _load_jobs(self):
+            self.summary_log.rewrite([])
+
+    def _stat(self, path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _load_snapshot(self):
+        """Load the snapshot and replay the whole journal on top of it"""
         with open(self.file_path, 'r') as f:
             data = json.load(f)
-        
-        jobs = {}
-        for job_id, job_data in data.items():
-            # Convert datetime strings back to datetime objects
-            if job_data.get('created_at'):
-                job_data['created_at'] = datetime.fromisoformat(job_data['created_at'])
-            if job_data.get('started_at'):
-                job_data['started_at'] = datetime.fromisoformat(job_data['started_at'])
-            if job_data.get('completed_at'):
-                job_data['completed_at'] = datetime.fromisoformat(job_data['completed_at'])
-            
-            jobs[job_id] = Job.from_dict(job_data)
-        return jobs
-    
-    def _save_jobs(self, jobs):
-        data = {}
-        for job_id, job in jobs.items():
-            job_dict = job.to_dict()
-            # Convert datetime objects to strings
-            if job_dict.get('created_at'):
-                job_dict['created_at'] = job_dict['created_at'].isoformat()
-            if job_dict.get('started_at'):
-                job_dict['started_at'] = job_dict['started_at'].isoformat()
-            if job_dict.get('completed_at'):
-                job_dict['completed_at'] = job_dict['completed_at'].isoformat()
-            
-            data[job_id] = job_dict
-        
-        with open(self.file_path, 'w') as f:
-            json.dump(data, f, indent=2)
-    
+
+        self._snapshot_stat = self._stat(self.file_path)
+        journal_stat = self._stat(self.journal_path)
+        self._journal_inode = journal_stat[0] if journal_stat else None
+        self._records = {}
+        self._queued = {}
+        self._running = {}
+        self._index = SummaryIndex()
+        self._list_changes = 0
+        self._job_changes = {}
+        self._journal_offset = 0
+        self._journal_events = 0
+        for job_id, record in data.items():
+            self._apply({'op': 'add', 'job_id': job_id, 'job': record})
+        self._replay_journal()
+
+    def _replay_journal(self):
+        """Apply journal events written since the last read"""
+        try:
+            with open(self.journal_path, 'rb') as f:
+                self._journal_inode = os.fstat(f.fileno()).st_ino
+                f.seek(self._journal_offset)
+                chunk = f.read()
+        except FileNotFoundError:
+            return
+
+        # Only consume complete lines; a concurrent writer may be mid-append
+        lines = chunk[:chunk.rfind(b'\n') + 1].splitlines(keepends=True)
+        for i, line in enumerate(lines):
+            if line.strip():
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    if i < len(lines) - 1:
+                        raise
+                    # Left by a writer that died mid-append; the next
+                    # _append() cuts it off
+                    return
+                self._apply(event)
+                self._journal_events += 1
+            self._journal_offset += len(line)
+
+    def _refresh(self):
+        """Catch up with changes made by this or any other process"""
+        with self._thread_lock:
+            journal_stat = self._stat(self.journal_path)
+            if self._stat(self.file_path) != self._snapshot_stat or \
+                    (journal_stat and journal_stat[0] != self._journal_inode):
+                # Snapshot was compacted underneath us
+                self._load_snapshot()
+            elif journal_stat:
+                self._replay_journal()
+
+    @contextmanager
+    def _locked(self):
+        """Serialize a read-modify-write against other threads and processes"""
+        with self._thread_lock, file_lock(self.lock_path):
+            self._refresh()
+            yield
+
+    def _apply(self, event):
+        job_id = event['job_id']
+        if event['op'] == 'add':
+            self._records[job_id] = dict(event['job'])
+        elif event['op'] == 'update' and job_id in self._records:
+            self._records[job_id].update(event['fields'])
+        elif event['op'] == 'logs' and job_id in self._records:
+            # Written by versions before the log store. Truncate before
+            # extending so replaying a chunk is idempotent
+            logs = self._records[job_id].setdefault('logs', [])
+            del logs[event['start']:]
+            logs.extend(event['lines'])
+        elif event['op'] == 'step' and job_id in self._records:
+            steps = self._records[job_id].setdefault('steps', [])
+            for i, step in enumerate(steps):
+                if step['name'] == event['step']['name']:
+                    steps[i] = event['step']
+                    break
+            else:
+                steps.append(event['step'])
+
+        record = self._records.get(job_id)
+        if record and event['op'] in ('add', 'update'):
+            summary = summarize(job_id, record)
+            if summary != self._index.get(job_id):
+                self._index.put(summary)
+                self._list_changes += 1
+        # Lease renewals change nothing a reader sees
+        if record and (event['op'] != 'update' or set(event['fields']) - {'lease_expires_at'}):
+            self._job_changes[job_id] = self._job_changes.get(job_id, 0) + 1
+        status = record['status'] if record else None
+        if status == JobStatus.QUEUED.value:
+            self._queued[job_id] = True
+        else:
+            self._queued.pop(job_id, None)
+        if status == JobStatus.RUNNING.value:
+            self._running[job_id] = True
+        else:
+            self._running.pop(job_id, None)
+
+    def _append(self, *events):
+        """Append events to the journal; caller must hold ``_locked()``"""
+        job_ids = {event['job_id'] for event in events if event['op'] in ('add', 'update')}
+        before = {job_id: self._index.get(job_id) for job_id in job_ids}
+        # Everything valid has been replayed under the lock, so bytes past
+        # the offset are a torn write that new events must not extend
+        journal_stat = self._stat(self.journal_path)
+        if journal_stat and journal_stat[2] > self._journal_offset:
+            os.truncate(self.journal_path, self._journal_offset)
+        with open(self.journal_path, 'a') as f:
+            f.write(''.join(json.dumps(event) + '\n' for event in events))
+        self._refresh()
+        # Lease renewals and the like leave the summary as it was
+        changed = [self._index.get(job_id) for job_id in job_ids if self._index.get(job_id) != before[job_id]]
+        if changed:
+            if self.summary_log.exists():
+                self.summary_log.append(changed)
+            else:
+                # Queues written before summaries were kept get a full file
+                self.summary_log.rewrite(self._index.all())
+        if self._journal_events >= self.compact_threshold:
+            self._compact()
+
+    def _update(self, job_id: str, **fields):
+        self._append({'op': 'update', 'job_id': job_id, 'fields': fields})
+
+    def compact(self):
+        """Fold the journal into a fresh snapshot and start a new journal"""
+        with self._locked():
+            self._compact()
+
+    def _compact(self):
+        tmp_path = self.file_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._records, f, indent=2)
+        os.replace(tmp_path, self.file_path)
+        # Swap in a new journal file so readers notice the inode change
+        open(tmp_path, 'w').close()
+        os.replace(tmp_path, self.journal_path)
+        self.summary_log.rewrite(self._index.all())
+        self._snapshot_stat = self._stat(self.file_path)
+        self._journal_inode = self._stat(self.journal_path)[0]
+        self._journal_offset = 0
+        self._journal_events = 0
+
+    def _to_record(self, job: Job) -> dict:
+        job_dict = job.to_dict()
+        # Convert datetime objects to strings
+        for field in DATETIME_FIELDS:
+            if job_dict.get(field):
+                job_dict[field] = job_dict[field].isoformat()
+        return job_dict
+
+    def _to_job(self, record: dict, logs: bool = True) -> Job:
+        job_data = dict(record, logs=self._read_logs(record) if logs else [], steps=list(record.get('steps', [])))
+        # Convert datetime strings back to datetime objects
+        for field in DATETIME_FIELDS:
+            if job_data.get(field):
+                job_data[field] = datetime.fromisoformat(job_data[field])
+        return Job.from_dict(job_data)
+
+    def _read_logs(self, record: dict, start: int = 0, end: int = None) -> List[str]:
+        if not record.get('log_path'):
+            return record.get('logs', [])[start:end]
+        # The store may be ahead of the record while a write is in flight
+        start, end, _ = slice(start, end).indices(record['log_lines'])
+        return self.log_store.read(record['log_path'], start, end)
+
+    def _log_fields(self, job_id: str, record: dict, lines: List[str], start: int) -> dict:
+        """Store log lines; returns the record fields pointing at them.
+        Caller must hold ``_locked()``"""
+        fields = {}
+        if record.get('logs') and not record.get('log_path'):
+            # Move logs kept inline by older versions into the store first
+            self.log_store.write(job_id, record['logs'], 0)
+            fields['logs'] = []
+        fields['log_path'] = job_id
+        fields['log_lines'] = self.log_store.write(job_id, lines, start)
+        return fields
+
+    def _log_count(self, record: dict) -> int:
+        return record['log_lines'] if record.get('log_path') else len(record.get('logs', []))
+
     def add_job(self, job: Job) -> str:
-        jobs = self._load_jobs()
-        job_id = str(uuid.uuid4())[:8]
-        jobs[job_id] = job
-        self._save_jobs(jobs)
-        return job_id
-    
-    def get_next_job(self) -> Optional[tuple[str, Job]]:
-        jobs = self._load_jobs()
-        for job_id, job in jobs.items():
-            if job.status == JobStatus.QUEUED:
-                job.status = JobStatus.RUNNING
-                job.started_at = datetime.utcnow()
-                self._save_jobs(jobs)
-                return job_id, job
-        return None
-    
-    def update_job_status(self, job_id: str, status: JobStatus, logs: List[str] = None):
-        jobs = self._load_jobs()
-        if job_id in jobs:
-            jobs[job_id].status = status
-            if status in [JobStatus.DONE, JobStatus.FAILED]:
-                jobs[job_id].completed_at = datetime.utcnow()
+        return self.add_jobs([job])[0]
+
+    def add_jobs(self, jobs: List[Job], coalesce: bool = False, cancel_running: bool = False,
+                 job_ids: List[str] = None) -> List[str]:
+        """Queue several jobs with one journal write.
+
+        With ``coalesce`` the newest job for a repository and branch marks
+        every other queued job for that branch skipped in the same write,
+        and with ``cancel_running`` also requests cancellation of the
+        branch's running jobs. Jobs whose given ``job_ids`` are already
+        stored are left alone, so a failed call can be retried.
+        """
+        job_ids = job_ids or [str(uuid.uuid4())[:8] for _ in jobs]
+        with self._locked():
+            new = [(job_id, job) for job_id, job in zip(job_ids, jobs) if job_id not in self._records]
+            events = []
+            for job_id, job in new:
+                record = self._to_record(job)
+                if job.logs:
+                    record.update(self._log_fields(job_id, {}, job.logs, 0), logs=[])
+                events.append({'op': 'add', 'job_id': job_id, 'job': record})
+            if coalesce and new:
+                events.extend(self._supersede_events([job_id for job_id, _ in new], [job for _, job in new],
+                                                     cancel_running))
+            if events:
+                self._append(*events)
+        self.notifier.notify()
+        return job_ids
+
+    def _supersede_events(self, job_ids: List[str], jobs: List[Job], cancel_running: bool) -> List[dict]:
+        latest = {(job.repo_url, job.branch): (job_id, job) for job_id, job in zip(job_ids, jobs)}
+        events = []
+        if cancel_running:
+            events.extend({'op': 'update', 'job_id': job_id, 'fields': {'cancel_requested': True}}
+                          for job_id in self._running
+                          if (self._records[job_id]['repo_url'], self._records[job_id]['branch']) in latest)
+        queued = [(job_id, self._records[job_id]) for job_id in self._queued]
+        queued += [(job_id, self._to_record(job)) for job_id, job in zip(job_ids, jobs)]
+        now = datetime.utcnow().isoformat()
+        for job_id, record in queued:
+            newest_id, newest = latest.get((record['repo_url'], record['branch']), (job_id, None))
+            if newest_id == job_id:
+                continue
+            line = f"Skipped: superseded by {newest.commit_sha[:8]} (job {newest_id})"
+            events.append({'op': 'update', 'job_id': job_id, 'fields': dict(
+                self._log_fields(job_id, record, [line], self._log_count(record)),
+                status=JobStatus.SKIPPED.value, completed_at=now)})
+        return events
+
+    def get_next_job(self, worker_id: str = None, lease_seconds: int = LEASE_SECONDS) -> Optional[tuple[str, Job]]:
+        """Claim the oldest queued job under a lease held by ``worker_id``"""
+        with self._locked():
+            job_id = next(iter(self._queued), None)
+            if job_id is None:
+                return None
+            now = datetime.utcnow()
+            self._update(job_id,
+                         status=JobStatus.RUNNING.value,
+                         started_at=now.isoformat(),
+                         worker_id=worker_id,
+                         lease_expires_at=(now + timedelta(seconds=lease_seconds)).isoformat())
+            return job_id, self._to_job(self._records[job_id])
+
+    def renew_lease(self, job_id: str, worker_id: str, lease_seconds: int = LEASE_SECONDS) -> bool:
+        """Extend a running job's lease; False if the worker no longer owns it"""
+        with self._locked():
+            record = self._records.get(job_id)
+            if not record or record['status'] != JobStatus.RUNNING.value or record.get('worker_id') != worker_id:
+                return False
+            expires = datetime.utcnow() + timedelta(seconds=lease_seconds)
+            self._update(job_id, lease_expires_at=expires.isoformat())
+            return True
+
+    def requeue_expired_jobs(self) -> List[str]:
+        """Put running jobs whose lease has expired back in the queue.
+
+        Jobs that were being cancelled are marked cancelled instead.
+        """
+        now = datetime.utcnow().isoformat()
+        with self._locked():
+            # Running jobs without a lease predate leasing and are orphaned
+            expired = [job_id for job_id in self._running
+                       if (self._records[job_id].get('lease_expires_at') or '') < now]
+            cancelled = [job_id for job_id in expired if self._records[job_id].get('cancel_requested')]
+            expired = [job_id for job_id in expired if job_id not in cancelled]
+            events = [{'op': 'update', 'job_id': job_id, 'fields': {
+                'status': JobStatus.CANCELLED.value,
+                'completed_at': now,
+                'lease_expires_at': None
+            }} for job_id in cancelled]
+            events.extend({'op': 'update', 'job_id': job_id, 'fields': {
+                'status': JobStatus.QUEUED.value,
+                'started_at': None,
+                'worker_id': None,
+                'lease_expires_at': None
+            }} for job_id in expired)
+            if events:
+                self._append(*events)
+        if events:
+            self.notifier.notify()
+        return expired
+
+    def cancel_job(self, job_id: str) -> bool:
+        """Cancel a queued job now, or ask the worker running it to stop.
+
+        Returns False if the job does not exist or has already finished.
+        """
+        with self._locked():
+            record = self._records.get(job_id)
+            if not record:
+                return False
+            if record['status'] == JobStatus.QUEUED.value:
+                line = f"[{datetime.now()}] Job cancelled before it started"
+                self._update(job_id, status=JobStatus.CANCELLED.value, completed_at=datetime.utcnow().isoformat(),
+                             **self._log_fields(job_id, record, [line], self._log_count(record)))
+            elif record['status'] == JobStatus.RUNNING.value:
+                self._update(job_id, cancel_requested=True)
+            else:
+                return False
+        return True
+
+    def is_cancel_requested(self, job_id: str) -> bool:
+        with self._thread_lock:
+            self._refresh()
+            record = self._records.get(job_id)
+            return bool(record and record.get('cancel_requested'))
+
+    def update_job_status(self, job_id: str, status: JobStatus, logs: List[str] = None, worker_id: str = None) -> bool:
+        """Update a job; with ``worker_id`` only if that worker still holds it"""
+        with self._locked():
+            record = self._records.get(job_id)
+            if not record or (worker_id and record.get('worker_id') != worker_id):
+                return False
+            fields = {'status': status.value}
+            if status in [JobStatus.DONE, JobStatus.FAILED, JobStatus.SKIPPED, JobStatus.CANCELLED]:
+                fields['completed_at'] = datetime.utcnow().isoformat()
+                fields['lease_expires_at'] = None
             if logs:
-                jobs[job_id].logs = logs
-            self._save_jobs(jobs)
-    
-    def get_job(self, job_id: str) -> Optional[Job]:
-        jobs = self._load_jobs()
-        return jobs.get(job_id)
-    
+                fields.update(self._log_fields(job_id, record, logs, 0))
+            self._update(job_id, **fields)
+        return True
+
+    def append_logs(self, job_id: str, lines: List[str], start: int, worker_id: str = None) -> bool:
+        """Write ``lines`` to a job's log starting at line number ``start``"""
+        with self._locked():
+            record = self._records.get(job_id)
+            if not record or (worker_id and record.get('worker_id') != worker_id):
+                return False
+            self._update(job_id, **self._log_fields(job_id, record, lines, start))
+        return True
+
+    def update_step(self, job_id: str, step: Dict, worker_id: str = None) -> bool:
+        """Insert or replace the entry for ``step['name']`` in a job's steps"""
+        with self._locked():
+            record = self._records.get(job_id)
+            if not record or (worker_id and record.get('worker_id') != worker_id):
+                return False
+            self._append({'op': 'step', 'job_id': job_id, 'step': step})
+        return True
+
+    def get_job(self, job_id: str, logs: bool = True) -> Optional[Job]:
+        """A job, with its whole log unless ``logs`` is False"""
+        with self._thread_lock:
+            self._refresh()
+            record = self._records.get(job_id)
+            return self._to_job(record, logs) if record else None
+
+    def read_logs(self, job_id: str, start: int = 0, end: int = None) -> Optional[List[str]]:
+        """Log lines ``start`` to ``end`` (negative counts from the end); None if unknown"""
+        with self._thread_lock:
+            self._refresh()
+            record = self._records.get(job_id)
+            return self._read_logs(record, start, end) if record else None
+
     def list_jobs(self, limit: int = 50) -> List[tuple[str, Job]]:
-        jobs = self._load_jobs()
-        items = list(jobs.items())
-        items.sort(key=lambda x: x[1].created_at, reverse=True)
-        return items[:limit]
\ No newline at end of file
+        with self._thread_lock:
+            self._refresh()
+            return [(summary['id'], self._to_job(self._records[summary['id']]))
+                    for summary in self._index.newest(limit)]
+
+    def list_summaries(self, limit: int = 50) -> List[Dict]:
+        """Summaries of the newest jobs, read without loading any job logs"""
+        with self._thread_lock:
+            if self._snapshot_stat is not None:
+                self._refresh()
+                return self._index.newest(limit)
+            if not self.summary_log.exists():
+                with self._locked():
+                    self.summary_log.rewrite(self._index.all())
+            return self.summary_log.read().newest(limit)
+
+    def query_jobs(self, limit: int = 50, before: tuple = None, statuses: List[str] = None,
+                   repo: str = None, branch: str = None) -> List[Dict]:
+        """Newest first job summaries, for listings.
+
+        ``before`` is the (created_at, id) of the last job of the previous
+        page. ``repo`` matches a full repository URL or its owner/name.
+        """
+        def match(summary: Dict) -> bool:
+            return ((not statuses or summary['status'] in statuses) and
+                    (not branch or summary['branch'] == branch) and
+                    (not repo or _repo_matches(summary['repo_url'], repo)))
+
+        with self._thread_lock:
+            self._refresh()
+            return self._index.newest(limit, before, match)
+
+    def compact_logs(self, hot_seconds: int = LOG_HOT_SECONDS, retention_days: float = LOG_RETENTION_DAYS,
+                     max_bytes: int = LOG_MAX_BYTES, archive_dir: str = LOG_ARCHIVE_DIR,
+                     spill_dir: str = LOG_SPILL_DIR) -> Dict:
+        """Apply log retention tiers to finished jobs, oldest first.
+
+        Logs stay uncompressed for ``hot_seconds`` after a job finishes and
+        are compressed after that. Past ``retention_days``, or while the
+        store is larger than ``max_bytes``, they are dropped, or moved to
+        ``archive_dir`` if set. A job's step output spilled to ``spill_dir``
+        counts towards its size and goes with its log. Workers record a
+        job's last log lines before or together with its final status, so
+        finished logs are never written again and only recording dropped
+        logs takes the queue lock.
+        """
+        with self._thread_lock:
+            self._refresh()
+            finished = sorted((record['completed_at'], job_id, record['log_path'])
+                              for job_id, record in self._records.items()
+                              if record.get('log_path') and record['status'] in FINISHED_STATUSES
+                              and record.get('completed_at'))
+
+        now = datetime.utcnow()
+        stats = {'compressed': 0, 'bytes_saved': 0, 'dropped': 0}
+        dropped = []
+        # One compactor at a time, across processes
+        os.makedirs(self.log_store.root, exist_ok=True)
+        with file_lock(os.path.join(self.log_store.root, '.compact.lock')):
+            for completed_at, job_id, log_path in finished:
+                age = (now - datetime.fromisoformat(completed_at)).total_seconds()
+                if retention_days and age > retention_days * 86400:
+                    dropped.append((job_id, log_path))
+                elif age > hot_seconds:
+                    saved = self.log_store.compress(log_path)
+                    if saved:
+                        stats['compressed'] += 1
+                        stats['bytes_saved'] += saved
+            # Expired logs go first so the size budget only counts what is kept
+            for job_id, log_path in dropped:
+                self._drop_log(job_id, log_path, archive_dir, spill_dir)
+            if max_bytes:
+                total = self.log_store.size() + sum(map(os.path.getsize, self._spill_files(spill_dir)))
+                expired = {job_id for job_id, _ in dropped}
+                for _, job_id, log_path in finished:
+                    if total <= max_bytes:
+                        break
+                    if job_id not in expired:
+                        total -= self.log_store.size(log_path)
+                        total -= sum(map(os.path.getsize, self._spill_files(spill_dir, job_id)))
+                        self._drop_log(job_id, log_path, archive_dir, spill_dir)
+                        dropped.append((job_id, log_path))
+
+        if dropped:
+            with self._locked():
+                self._append(*({'op': 'update', 'job_id': job_id, 'fields': {'log_path': None, 'log_lines': 0}}
+                               for job_id, _ in dropped if job_id in self._records))
+        stats['dropped'] = len(dropped)
+        return stats
+
+    def _spill_files(self, spill_dir: str, job_id: str = None) -> List[str]:
+        """Spill files of one job's steps (named ``<job_id>-<step>.log``), or all of them"""
+        if not spill_dir:
+            return []
+        return glob.glob(os.path.join(glob.escape(spill_dir), f"{glob.escape(job_id)}-*.log" if job_id else '*.log'))
+
+    def _drop_log(self, job_id: str, log_path: str, archive_dir: str, spill_dir: str):
+        self.log_store.drop(log_path, archive_dir)
+        for path in self._spill_files(spill_dir, job_id):
+            if archive_dir:
+                target = os.path.join(archive_dir, log_path, 'spill')
+                os.makedirs(target, exist_ok=True)
+                shutil.move(path, os.path.join(target, os.path.basename(path)))
+            else:
+                os.remove(path)
+
+    def tail_logs(self, job_id: str, start: int = 0) -> Optional[tuple[List[str], str]]:
+        """A job's log lines from line ``start`` on and its status; None if unknown"""
+        with self._thread_lock:
+            self._refresh()
+            record = self._records.get(job_id)
+            if not record:
+                return None
+            return self._read_logs(record, start), record['status']
+
+    def version(self, job_id: str = None) -> str:
+        """Token that changes whenever job listings do, or with ``job_id``
+        also whenever anything visible about that job does"""
+        with self._thread_lock:
+            self._refresh()
+            # Counters restart when the snapshot is reloaded, which changes its stat
+            state = f"{self._snapshot_stat}:{self._journal_inode}:{self._list_changes}"
+            if job_id:
+                state += f":{job_id}:{self._job_changes.get(job_id, 0)}"
+            return hashlib.sha1(state.encode()).hexdigest()[:16]
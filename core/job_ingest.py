@@ -0,0 +1,90 @@
+import queue
+import threading
+import uuid
+from typing import List
+
+from config.settings import WEBHOOK_QUEUE_SIZE, WEBHOOK_BATCH_SIZE, COALESCE_PUSHES, COALESCE_RUNNING
+from models.job import Job
+
+# Seconds to wait before retrying a failed write, doubled up to the maximum
+RETRY_DELAY = 0.5
+MAX_RETRY_DELAY = 30
+
+class JobIngest:
+    """Bounded in-memory buffer between the webhook and job storage.
+
+    ``offer()`` never touches storage, so request threads answer at once.
+    A single writer thread drains the buffer and stores whatever has
+    accumulated with one ``add_jobs`` call. Job ids are assigned once, so a
+    failed write is retried with the same ids and stores each job at most
+    once; ``healthy`` turns false until storage recovers.
+    With ``coalesce`` each push supersedes the jobs still queued for its
+    branch, and with ``cancel_running`` the branch's running job as well.
+    """
+
+    def __init__(self, job_queue, max_pending: int = WEBHOOK_QUEUE_SIZE, batch_size: int = WEBHOOK_BATCH_SIZE,
+                 coalesce: bool = COALESCE_PUSHES, cancel_running: bool = COALESCE_RUNNING):
+        self.job_queue = job_queue
+        self.batch_size = batch_size
+        self.coalesce = coalesce
+        self.cancel_running = cancel_running
+        self.healthy = True
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def offer(self, job: Job) -> bool:
+        """Buffer a job for storage; False if the buffer is full"""
+        try:
+            self._pending.put_nowait(job)
+            return True
+        except queue.Full:
+            return False
+
+    def close(self, timeout: float = 10):
+        """Store what is still buffered and stop the writer"""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def _run(self):
+        delay = RETRY_DELAY
+        batch: List[Job] = []
+        job_ids: List[str] = []
+        while True:
+            if not batch:
+                try:
+                    batch.append(self._pending.get(timeout=0.5))
+                except queue.Empty:
+                    if self._stop.is_set():
+                        return
+                    continue
+            # Jobs that arrived during the previous write go out together
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            job_ids += [str(uuid.uuid4())[:8] for _ in batch[len(job_ids):]]
+
+            try:
+                self.job_queue.add_jobs(batch, coalesce=self.coalesce, cancel_running=self.cancel_running,
+                                        job_ids=job_ids)
+            except Exception as e:
+                self.healthy = False
+                if self._stop.is_set():
+                    print(f"Dropping {len(batch) + self._pending.qsize()} webhook jobs, storage unavailable: {e}")
+                    return
+                print(f"Failed to store {len(batch)} webhook jobs, retrying in {delay}s: {e}")
+                self._stop.wait(delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY)
+                continue
+
+            for job_id, job in zip(job_ids, batch):
+                print(f"Job {job_id} queued for {job.repo_url}@{job.commit_sha}")
+            batch, job_ids = [], []
+            self.healthy = True
+            delay = RETRY_DELAY
@@ -0,0 +1,69 @@
+import threading
+from typing import List
+
+from config.settings import LOG_FLUSH_INTERVAL, LOG_FLUSH_LINES
+
+class JobLogger:
+    """Buffers a job's log lines and flushes them to the queue in batches.
+
+    Lines are flushed every ``flush_interval`` seconds, or sooner once
+    ``flush_lines`` are pending, so the dashboard sees output while a job is
+    still running. ``append`` mirrors ``list.append`` so existing call sites
+    keep working.
+    """
+
+    def __init__(self, job_queue, job_id: str, worker_id: str = None,
+                 flush_interval: float = LOG_FLUSH_INTERVAL, flush_lines: int = LOG_FLUSH_LINES):
+        self.job_queue = job_queue
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.flush_interval = flush_interval
+        self.flush_lines = flush_lines
+        self._pending: List[str] = []
+        self._flushed = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __len__(self):
+        with self._lock:
+            return self._flushed + len(self._pending)
+
+    def append(self, line: str):
+        with self._lock:
+            self._pending.append(line)
+            full = len(self._pending) >= self.flush_lines
+        if full:
+            self.flush()
+
+    def flush(self):
+        # Flushes must reach the queue in order, so only one runs at a time
+        with self._flush_lock:
+            with self._lock:
+                lines, self._pending = self._pending, []
+                start = self._flushed
+            if not lines:
+                return
+            try:
+                self.job_queue.append_logs(self.job_id, lines, start, worker_id=self.worker_id)
+            except Exception as e:
+                print(f"Failed to flush logs for job {self.job_id}: {e}")
+                with self._lock:
+                    self._pending = lines + self._pending
+                return
+            with self._lock:
+                self._flushed += len(lines)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.flush()
@@ -0,0 +1,100 @@
+import atexit
+import os
+import socket
+import threading
+import uuid
+
+class JobNotifier:
+    """Wakes idle executors as soon as new work is available.
+
+    Waiters in the same process block on a condition variable. Other
+    processes are reached through Unix datagram sockets: every process that
+    waits binds one socket in ``notify_dir``, and ``notify()`` sends a byte
+    to each of them. Where Unix sockets are unavailable only in-process
+    wakeups work and callers fall back to their polling timeout.
+    """
+
+    def __init__(self, notify_dir: str = None):
+        self.notify_dir = os.path.abspath(notify_dir) if notify_dir else None
+        self._condition = threading.Condition()
+        self._generation = 0
+        self._sock = None
+        self._sock_path = None
+        self._listen_lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        """Counter to read before checking the queue and pass to ``wait()``"""
+        with self._condition:
+            return self._generation
+
+    def wait(self, since: int, timeout: float) -> bool:
+        """Block until a notification newer than ``since`` or the timeout"""
+        self._listen()
+        with self._condition:
+            return self._condition.wait_for(lambda: self._generation != since, timeout)
+
+    def notify(self):
+        """Wake waiters in this process and in every other listening process"""
+        self.notify_local()
+        if not self.notify_dir or not hasattr(socket, 'AF_UNIX'):
+            return
+        try:
+            names = os.listdir(self.notify_dir)
+        except FileNotFoundError:
+            return
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sender:
+            sender.setblocking(False)
+            for name in names:
+                path = os.path.join(self.notify_dir, name)
+                if not name.endswith('.sock') or path == self._sock_path:
+                    continue
+                try:
+                    sender.sendto(b'1', path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # Listener exited without cleaning up
+                    self._unlink(path)
+                except OSError:
+                    # Receive buffer full: the listener already has a wakeup pending
+                    pass
+
+    def notify_local(self):
+        with self._condition:
+            self._generation += 1
+            self._condition.notify_all()
+
+    def _listen(self):
+        """Bind this process's socket on first wait"""
+        if self._sock or not self.notify_dir or not hasattr(socket, 'AF_UNIX'):
+            return
+        with self._listen_lock:
+            if self._sock:
+                return
+            os.makedirs(self.notify_dir, exist_ok=True)
+            path = os.path.join(self.notify_dir, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock")
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            try:
+                sock.bind(path)
+            except OSError as e:
+                sock.close()
+                print(f"Job notifier unavailable, falling back to polling: {e}")
+                self.notify_dir = None
+                return
+            self._sock, self._sock_path = sock, path
+            atexit.register(self._unlink, path)
+            threading.Thread(target=self._receive, daemon=True).start()
+
+    def _receive(self):
+        while True:
+            try:
+                self._sock.recv(64)
+            except OSError:
+                return
+            self.notify_local()
+
+    def _unlink(self, path: str):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
@@ -0,0 +1,11 @@
+from config.settings import QUEUE_BACKEND, JOBS_FILE, SQLITE_PATH
+
+def create_job_queue():
+    """Create the job queue backend selected by QUEUE_BACKEND"""
+    if QUEUE_BACKEND == 'sqlite':
+        from core.sqlite_queue import SQLiteJobQueue
+        return SQLiteJobQueue(SQLITE_PATH)
+    if QUEUE_BACKEND == 'file':
+        from core.file_queue import FileJobQueue
+        return FileJobQueue(JOBS_FILE)
+    raise ValueError(f"Unknown QUEUE_BACKEND: {QUEUE_BACKEND}")
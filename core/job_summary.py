@@ -0,0 +1,125 @@
+import json
+import os
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+def repo_name(repo_url: str) -> str:
+    """owner/name from a clone URL"""
+    path = repo_url.rstrip('/')
+    if path.endswith('.git'):
+        path = path[:-4]
+    return '/'.join(path.replace(':', '/').split('/')[-2:])
+
+def summarize(job_id: str, record: Dict) -> Dict:
+    """The listing fields of a stored job, as the dashboard's JobSummary"""
+    started_at, completed_at = record.get('started_at'), record.get('completed_at')
+    duration = None
+    if started_at and completed_at:
+        duration = round((datetime.fromisoformat(completed_at) - datetime.fromisoformat(started_at)).total_seconds())
+    return {
+        'id': job_id,
+        'repo_name': repo_name(record['repo_url']),
+        'repo_url': record['repo_url'],
+        'branch': record['branch'],
+        'commit_sha': record['commit_sha'],
+        'short_sha': record['commit_sha'][:8],
+        'status': record['status'],
+        'created_at': record['created_at'],
+        'started_at': started_at,
+        'completed_at': completed_at,
+        'duration': duration
+    }
+
+class SummaryIndex:
+    """Job summaries ordered by (created_at, id).
+
+    Jobs are nearly always added newest last, so keeping the order costs
+    little, and listing the newest jobs reads only as far as it needs to.
+    """
+
+    def __init__(self):
+        self._summaries: Dict[str, Dict] = {}
+        self._keys: List[tuple] = []
+
+    def __len__(self) -> int:
+        return len(self._summaries)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        return self._summaries.get(job_id)
+
+    def put(self, summary: Dict):
+        old = self._summaries.get(summary['id'])
+        if old is None or old['created_at'] != summary['created_at']:
+            if old is not None:
+                self._keys.pop(bisect_left(self._keys, (old['created_at'], old['id'])))
+            insort(self._keys, (summary['created_at'], summary['id']))
+        self._summaries[summary['id']] = summary
+
+    def newest(self, limit: int, before: tuple = None, match: Callable[[Dict], bool] = None) -> List[Dict]:
+        """Up to ``limit`` summaries created before ``before``, newest first"""
+        end = bisect_left(self._keys, tuple(before)) if before else len(self._keys)
+        summaries = []
+        for i in range(end - 1, -1, -1):
+            if len(summaries) >= limit:
+                break
+            summary = self._summaries[self._keys[i][1]]
+            if match is None or match(summary):
+                summaries.append(summary)
+        return summaries
+
+    def all(self) -> List[Dict]:
+        """Every summary, oldest first"""
+        return [self._summaries[job_id] for _, job_id in self._keys]
+
+class SummaryLog:
+    """Job summaries in their own append-only file, one JSON line per change.
+
+    The last line written for a job wins. Reading it never touches job
+    logs or steps, and only lines written since the previous read are
+    parsed. ``rewrite()`` replaces the file with one line per job.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index = SummaryIndex()
+        self._offset = 0
+        self._inode = None
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def append(self, summaries: List[Dict]):
+        """Caller must hold the queue's write lock"""
+        with open(self.path, 'a') as f:
+            f.write(''.join(json.dumps(summary) + '\n' for summary in summaries))
+
+    def rewrite(self, summaries: List[Dict]):
+        """Caller must hold the queue's write lock"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(''.join(json.dumps(summary) + '\n' for summary in summaries))
+        os.replace(tmp_path, self.path)
+
+    def read(self) -> SummaryIndex:
+        """The index, updated with whatever was written since the last read"""
+        try:
+            with open(self.path, 'rb') as f:
+                inode = os.fstat(f.fileno()).st_ino
+                if inode != self._inode:
+                    # Rewritten since the last read
+                    self.index = SummaryIndex()
+                    self._inode = inode
+                    self._offset = 0
+                f.seek(self._offset)
+                chunk = f.read()
+        except FileNotFoundError:
+            return self.index
+
+        # Only consume complete lines; a writer may be mid-append
+        end = chunk.rfind(b'\n') + 1
+        for line in chunk[:end].splitlines():
+            if line.strip():
+                self.index.put(json.loads(line))
+        self._offset += end
+        return self.index
@@ -0,0 +1,115 @@
+import base64
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import API_PREFIX, API_PAGE_SIZE, API_MAX_PAGE_SIZE
+from models.job import JobStatus
+
+class ApiError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+class JobsApi:
+    """Read-only job endpoints for the dashboard.
+
+    ``GET /api/jobs`` lists job summaries newest first, one page at a time,
+    ``GET /api/jobs/{id}`` returns a job, without its log with ``logs=0``,
+    and ``GET /api/jobs/{id}/logs`` its log lines, or a range of them with
+    ``offset``/``limit`` or ``tail``.
+    Every response carries the queue's version as a weak ETag, so a poll
+    with a matching If-None-Match is answered before the queue is read at
+    all. Lease renewals never change an ETag, and on the file queue listing
+    ETags also ignore log lines and step updates.
+    """
+
+    def __init__(self, job_queue):
+        self.job_queue = job_queue
+
+    def get(self, path: str, query: Dict[str, List[str]], if_none_match: str = None) -> Tuple[int, Optional[object], str]:
+        """Status code, JSON-serializable body (None for 304) and ETag"""
+        parts = path[len(API_PREFIX):].strip('/').split('/')
+        # Listings ignore log and step updates; a job's own endpoints do not
+        job_id = parts[1] if len(parts) > 1 and parts[0] == 'jobs' else None
+        etag = f'W/"{self.job_queue.version(job_id)}"'
+        if if_none_match and etag in (tag.strip() for tag in if_none_match.split(',')):
+            return 304, None, etag
+
+        try:
+            if parts == ['jobs']:
+                return 200, self._list_jobs(query), etag
+            if len(parts) == 2 and parts[0] == 'jobs':
+                return 200, self._job(parts[1], query), etag
+            if len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'logs':
+                return 200, self._logs(parts[1], query), etag
+            raise ApiError(404, 'not found')
+        except ApiError as e:
+            return e.code, {'error': str(e)}, etag
+
+    def _list_jobs(self, query: Dict[str, List[str]]) -> Dict:
+        limit = self._int_param(query, 'limit', API_PAGE_SIZE)
+        if not 1 <= limit <= API_MAX_PAGE_SIZE:
+            raise ApiError(400, f'limit must be between 1 and {API_MAX_PAGE_SIZE}')
+        statuses = [status for value in query.get('status', []) for status in value.split(',') if status]
+        known = {status.value for status in JobStatus}
+        if any(status not in known for status in statuses):
+            raise ApiError(400, f"status must be one of {', '.join(sorted(known))}")
+        before = self._decode_cursor(query['cursor'][0]) if query.get('cursor') else None
+
+        # One extra row tells whether another page follows
+        rows = self.job_queue.query_jobs(
+            limit=limit + 1,
+            before=before,
+            statuses=statuses or None,
+            repo=query.get('repo', [None])[0],
+            branch=query.get('branch', [None])[0]
+        )
+        page = rows[:limit]
+        next_cursor = self._encode_cursor(page[-1]) if len(rows) > limit else None
+        return {'jobs': page, 'next_cursor': next_cursor}
+
+    def _job(self, job_id: str, query: Dict[str, List[str]]) -> Dict:
+        # Pages streaming the log poll for step states only
+        job = self.job_queue.get_job(job_id, logs=self._int_param(query, 'logs', 1) != 0)
+        if job is None:
+            raise ApiError(404, f'job {job_id} not found')
+        data = job.to_dict()
+        data['id'] = job_id
+        data['steps'] = [dict({'logs': []}, **step) for step in job.steps]
+        data.pop('lease_expires_at', None)
+        return {key: value.isoformat() if isinstance(value, datetime) else value for key, value in data.items()}
+
+    def _logs(self, job_id: str, query: Dict[str, List[str]]) -> List[str]:
+        if 'tail' in query:
+            tail = self._int_param(query, 'tail', 0)
+            if tail < 1:
+                raise ApiError(400, 'tail must be positive')
+            start, end = -tail, None
+        else:
+            start = self._int_param(query, 'offset', 0)
+            limit = self._int_param(query, 'limit', 0)
+            if start < 0 or limit < 0:
+                raise ApiError(400, 'offset and limit must not be negative')
+            end = start + limit if limit else None
+        lines = self.job_queue.read_logs(job_id, start, end)
+        if lines is None:
+            raise ApiError(404, f'job {job_id} not found')
+        return lines
+
+    def _int_param(self, query: Dict[str, List[str]], name: str, default: int) -> int:
+        try:
+            return int(query[name][0]) if name in query else default
+        except ValueError:
+            raise ApiError(400, f'{name} must be an integer')
+
+    def _encode_cursor(self, row: Dict) -> str:
+        raw = json.dumps([row['created_at'], row['id']]).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def _decode_cursor(self, cursor: str) -> Tuple[str, str]:
+        try:
+            created_at, job_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            return str(created_at), str(job_id)
+        except (ValueError, TypeError):
+            raise ApiError(400, 'invalid cursor')
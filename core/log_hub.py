@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import LOG_STREAM_POLL_INTERVAL
+from models.job import JobStatus
+
+FINISHED_STATUSES = {status.value for status in JobStatus} - {JobStatus.QUEUED.value, JobStatus.RUNNING.value}
+
+class LogTail:
+    """The unsent part of one job's log, shared by everyone watching it.
+
+    A single thread polls the queue for lines past ``end`` and wakes the
+    watchers. ``lines`` starts at line ``base``, the offset the first
+    watcher asked for, and lines every watcher has passed are dropped, so
+    memory follows the slowest watcher rather than the log's size. A
+    watcher resuming from before ``base`` reads the gap from the queue.
+    """
+
+    def __init__(self, job_queue, job_id: str, poll_interval: float, offset: int = 0):
+        self.job_queue = job_queue
+        self.job_id = job_id
+        self.poll_interval = poll_interval
+        self.base = offset
+        self.lines: List[str] = []
+        self.status: Optional[str] = None
+        self.finished = False
+        # Number of watchers at each offset
+        self._positions = Counter()
+        self._first_read = threading.Event()
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=f"log-tail-{job_id}", daemon=True)
+
+    @property
+    def end(self) -> int:
+        return self.base + len(self.lines)
+
+    @property
+    def watchers(self) -> int:
+        return sum(self._positions.values())
+
+    def start(self):
+        self._thread.start()
+
+    def join(self, offset: int):
+        with self._condition:
+            self._positions[offset] += 1
+
+    def leave(self, offset: int):
+        with self._condition:
+            self._move(offset, None)
+
+    def exists(self, timeout: float) -> bool:
+        """Whether the job was found, once the first read is done"""
+        self._first_read.wait(timeout)
+        return self.status is not None
+
+    def wait(self, offset: int, timeout: float) -> Tuple[List[str], bool]:
+        """Lines from ``offset`` on, blocking up to ``timeout`` until there are
+        some; also whether the log is complete. The watcher at ``offset`` is
+        then counted at the end of the returned lines."""
+        with self._condition:
+            self._condition.wait_for(lambda: self.end > offset or self.finished, timeout)
+            if offset >= self.base:
+                lines = self.lines[offset - self.base:]
+                self._move(offset, offset + len(lines))
+                return lines, self.finished and not lines
+            base = self.base
+        # Lines before the tail's start come straight from the queue
+        lines = self.job_queue.read_logs(self.job_id, offset, base) or []
+        with self._condition:
+            self._move(offset, offset + len(lines))
+            return lines, self.finished and not lines
+
+    def _move(self, offset: int, new_offset: Optional[int]):
+        """Move one watcher, dropping lines nobody needs any more; caller
+        holds ``_condition``"""
+        self._positions[offset] -= 1
+        if self._positions[offset] <= 0:
+            del self._positions[offset]
+        if new_offset is not None:
+            self._positions[new_offset] += 1
+        if self._positions:
+            passed = min(min(self._positions), self.end) - self.base
+            if passed > 0:
+                del self.lines[:passed]
+                self.base += passed
+
+    def _run(self):
+        draining = False
+        while True:
+            try:
+                result = self.job_queue.tail_logs(self.job_id, self.end)
+            except Exception as e:
+                print(f"Log tail error for job {self.job_id}: {e}")
+                result = ([], self.status)
+            with self._condition:
+                if result is None:
+                    self.finished = True
+                else:
+                    new_lines, self.status = result
+                    self.lines.extend(new_lines)
+                    # Workers before the final status was recorded last could
+                    # flush lines after it, so read once more before calling
+                    # the log complete
+                    if draining and not new_lines:
+                        self.finished = True
+                    draining = self.status in FINISHED_STATUSES
+                if self.watchers == 0:
+                    self.finished = True
+                self._condition.notify_all()
+            self._first_read.set()
+            if self.finished:
+                return
+            time.sleep(self.poll_interval)
+
+class LogHub:
+    """Fans job logs out to any number of live viewers.
+
+    Viewers of the same job share one ``LogTail``, so the queue is read once
+    per poll interval per job however many streams are open.
+    """
+
+    def __init__(self, job_queue, poll_interval: float = LOG_STREAM_POLL_INTERVAL):
+        self.job_queue = job_queue
+        self.poll_interval = poll_interval
+        self._tails: Dict[str, LogTail] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, job_id: str, offset: int = 0) -> LogTail:
+        """The shared tail of a job's log, watched from line ``offset``"""
+        with self._lock:
+            tail = self._tails.get(job_id)
+            if tail is None:
+                tail = self._tails[job_id] = LogTail(self.job_queue, job_id, self.poll_interval, offset)
+                tail.join(offset)
+                tail.start()
+            else:
+                # A finished tail can still serve its lines, and the queue the rest
+                tail.join(offset)
+            return tail
+
+    def unsubscribe(self, tail: LogTail, offset: int):
+        """Stop watching ``tail``; ``offset`` is where the watcher got to"""
+        with self._lock:
+            tail.leave(offset)
+            if tail.watchers == 0 and self._tails.get(tail.job_id) is tail:
+                del self._tails[tail.job_id]
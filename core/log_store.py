@@ -0,0 +1,227 @@
+import json
+import os
+import shutil
+import struct
+import zlib
+from typing import List, Optional
+
+from config.settings import LOG_DIR, LOG_SEGMENT_LINES
+
+# Byte offset of a line within its segment, or of a frame within a compressed segment
+OFFSET = struct.Struct('<I')
+
+# Lines per independently compressed frame; a range read decompresses only
+# the frames it overlaps
+FRAME_LINES = 256
+
+class LogStore:
+    """Job logs in append-only segment files with a line offset index.
+
+    Job ``abc`` keeps ``segment_lines`` lines per segment in
+    ``<root>/abc/000000.log``, ``000001.log``..., one JSON string per line,
+    and each ``.idx`` next to them holds the byte offset of every line.
+    Reading a range of lines opens only the segments it covers and seeks
+    straight to its first line.
+
+    ``compress()`` turns a job's segments into ``.logz`` files of zlib
+    frames of ``FRAME_LINES`` lines each, whose ``.zidx`` holds the line
+    count followed by the offset of every frame and the end of the last.
+    Range and tail reads then decompress only the frames they return.
+    Writing to a compressed segment decompresses it first.
+
+    Writers must be serialized per job (the queue holds its lock), and so
+    must compressors; readers need no lock because data is always in place
+    before the index that points at it.
+    """
+
+    def __init__(self, root: str = LOG_DIR, segment_lines: int = LOG_SEGMENT_LINES):
+        self.root = root
+        self.segment_lines = segment_lines
+
+    def _path(self, job_id: str, segment: int, suffix: str) -> str:
+        return os.path.join(self.root, job_id, f"{segment:06d}.{suffix}")
+
+    def _segments(self, job_id: str) -> int:
+        try:
+            names = os.listdir(os.path.join(self.root, job_id))
+        except FileNotFoundError:
+            return 0
+        # Both indexes exist for a moment while a segment is being compressed
+        return len({name.split('.')[0] for name in names if name.endswith(('.idx', '.zidx'))})
+
+    def _segment_lines(self, job_id: str, segment: int) -> int:
+        try:
+            return os.path.getsize(self._path(job_id, segment, 'idx')) // OFFSET.size
+        except FileNotFoundError:
+            with open(self._path(job_id, segment, 'zidx'), 'rb') as index:
+                return OFFSET.unpack(index.read(OFFSET.size))[0]
+
+    def _is_compressed(self, job_id: str, segment: int) -> bool:
+        return os.path.exists(self._path(job_id, segment, 'zidx'))
+
+    def count(self, job_id: str) -> int:
+        """Number of lines stored for a job"""
+        segments = self._segments(job_id)
+        if not segments:
+            return 0
+        return (segments - 1) * self.segment_lines + self._segment_lines(job_id, segments - 1)
+
+    def size(self, job_id: str = None) -> int:
+        """Bytes on disk for one job, or for the whole store"""
+        total = 0
+        for root, _, files in os.walk(os.path.join(self.root, job_id) if job_id else self.root):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except FileNotFoundError:
+                    pass
+        return total
+
+    def write(self, job_id: str, lines: List[str], start: int) -> int:
+        """Store ``lines`` from line ``start`` on, dropping any lines already
+        stored from there; returns the new line count"""
+        count = self.count(job_id)
+        start = min(start, count)
+        if start < count:
+            self._truncate(job_id, start)
+        elif self._is_compressed(job_id, start // self.segment_lines):
+            self._decompress(job_id, start // self.segment_lines)
+        os.makedirs(os.path.join(self.root, job_id), exist_ok=True)
+
+        position = start
+        while lines:
+            segment, line_no = divmod(position, self.segment_lines)
+            chunk = lines[:self.segment_lines - line_no]
+            lines = lines[len(chunk):]
+            self._append(job_id, segment, chunk)
+            position += len(chunk)
+        return position
+
+    def _append(self, job_id: str, segment: int, lines: List[str]):
+        with open(self._path(job_id, segment, 'log'), 'ab') as data:
+            offset = data.tell()
+            encoded = [json.dumps(line).encode() + b'\n' for line in lines]
+            data.write(b''.join(encoded))
+        offsets = []
+        for line in encoded:
+            offsets.append(OFFSET.pack(offset))
+            offset += len(line)
+        with open(self._path(job_id, segment, 'idx'), 'ab') as index:
+            index.write(b''.join(offsets))
+
+    def _truncate(self, job_id: str, start: int):
+        segment, line_no = divmod(start, self.segment_lines)
+        for later in range(self._segments(job_id) - 1, segment, -1):
+            self._remove_segment(job_id, later)
+        if self._is_compressed(job_id, segment):
+            self._decompress(job_id, segment)
+        with open(self._path(job_id, segment, 'idx'), 'r+b') as index:
+            index.seek(line_no * OFFSET.size)
+            entry = index.read(OFFSET.size)
+            index.truncate(line_no * OFFSET.size)
+        if entry:
+            with open(self._path(job_id, segment, 'log'), 'r+b') as data:
+                data.truncate(OFFSET.unpack(entry)[0])
+
+    def _remove_segment(self, job_id: str, segment: int):
+        # Indexes first, so a reader never finds an index without its data
+        for suffix in ('idx', 'zidx', 'log', 'logz'):
+            try:
+                os.remove(self._path(job_id, segment, suffix))
+            except FileNotFoundError:
+                pass
+
+    def read(self, job_id: str, start: int = 0, end: int = None) -> List[str]:
+        """Lines ``start`` to ``end``; negative values count from the end like slices"""
+        count = self.count(job_id)
+        start, end, _ = slice(start, end).indices(count)
+        lines = []
+        while start < end:
+            segment, line_no = divmod(start, self.segment_lines)
+            wanted = min(end - start, self.segment_lines - line_no)
+            try:
+                lines.extend(self._read_plain(job_id, segment, line_no, wanted))
+            except FileNotFoundError:
+                # Compressed before or while reading
+                lines.extend(self._read_compressed(job_id, segment, line_no, wanted))
+            start += wanted
+        return lines
+
+    def _read_plain(self, job_id: str, segment: int, line_no: int, wanted: int) -> List[str]:
+        with open(self._path(job_id, segment, 'idx'), 'rb') as index, \
+                open(self._path(job_id, segment, 'log'), 'rb') as data:
+            index.seek(line_no * OFFSET.size)
+            offsets = index.read((wanted + 1) * OFFSET.size)
+            first = OFFSET.unpack_from(offsets, 0)[0]
+            data.seek(first)
+            if len(offsets) > wanted * OFFSET.size:
+                chunk = data.read(OFFSET.unpack_from(offsets, wanted * OFFSET.size)[0] - first)
+            else:
+                # The range ends with the segment
+                chunk = data.read()
+        return [json.loads(line) for line in chunk.splitlines()[:wanted]]
+
+    def _read_compressed(self, job_id: str, segment: int, line_no: int, wanted: int) -> List[str]:
+        if wanted <= 0:
+            return []
+        first_frame, last_frame = line_no // FRAME_LINES, (line_no + wanted - 1) // FRAME_LINES
+        with open(self._path(job_id, segment, 'zidx'), 'rb') as index:
+            # Skip the line count, then read the offsets bounding the frames
+            index.seek((first_frame + 1) * OFFSET.size)
+            offsets = [offset for offset, in OFFSET.iter_unpack(
+                index.read((last_frame - first_frame + 2) * OFFSET.size))]
+        with open(self._path(job_id, segment, 'logz'), 'rb') as data:
+            data.seek(offsets[0])
+            chunk = data.read(offsets[-1] - offsets[0])
+        lines = []
+        for begin, end in zip(offsets, offsets[1:]):
+            lines.extend(zlib.decompress(chunk[begin - offsets[0]:end - offsets[0]]).splitlines())
+        skip = line_no - first_frame * FRAME_LINES
+        return [json.loads(line) for line in lines[skip:skip + wanted]]
+
+    def compress(self, job_id: str) -> int:
+        """Compress every plain segment of a job that is no longer written
+        to; returns the bytes saved"""
+        saved = 0
+        for segment in range(self._segments(job_id)):
+            if self._is_compressed(job_id, segment):
+                continue
+            with open(self._path(job_id, segment, 'log'), 'rb') as data:
+                lines = data.read().splitlines(keepends=True)[:self._segment_lines(job_id, segment)]
+            frames = [zlib.compress(b''.join(lines[i:i + FRAME_LINES]))
+                      for i in range(0, len(lines), FRAME_LINES)]
+            offsets = [0]
+            for frame in frames:
+                offsets.append(offsets[-1] + len(frame))
+            index = OFFSET.pack(len(lines)) + b''.join(OFFSET.pack(offset) for offset in offsets)
+
+            # Data, then its index; readers switch over once the index exists
+            self._replace(self._path(job_id, segment, 'logz'), b''.join(frames))
+            self._replace(self._path(job_id, segment, 'zidx'), index)
+            saved += self.size(job_id)
+            for suffix in ('idx', 'log'):
+                os.remove(self._path(job_id, segment, suffix))
+            saved -= self.size(job_id)
+        return saved
+
+    def _decompress(self, job_id: str, segment: int):
+        lines = self._read_compressed(job_id, segment, 0, self._segment_lines(job_id, segment))
+        self._remove_segment(job_id, segment)
+        self._append(job_id, segment, lines)
+
+    def _replace(self, path: str, content: bytes):
+        with open(path + '.tmp', 'wb') as f:
+            f.write(content)
+        os.replace(path + '.tmp', path)
+
+    def drop(self, job_id: str, archive_dir: Optional[str] = None):
+        """Delete a job's log, or move it under ``archive_dir``"""
+        path = os.path.join(self.root, job_id)
+        if not archive_dir:
+            shutil.rmtree(path, ignore_errors=True)
+            return
+        os.makedirs(archive_dir, exist_ok=True)
+        target = os.path.join(archive_dir, job_id)
+        shutil.rmtree(target, ignore_errors=True)
+        if os.path.exists(path):
+            shutil.move(path, target)
@@ -1,47 +1,216 @@
 import yaml
+import json
 import os
+import re
+import shutil
 import subprocess
-from typing import Dict, List, Optional
+import uuid
+from typing import Callable, Dict, List, Optional
 from urllib.parse import urlparse
 
-from config.settings import PIPELINE_FILE, WORKSPACE_DIR
+from config.settings import PIPELINE_FILE, WORKSPACE_DIR, CHECKOUT_DEPTH, CHECKOUT_FILTER, STEP_TIMEOUT
+from core.file_lock import file_lock
+
+# Memory sizes such as 512M or 2GiB; a bare number is bytes
+SIZE_PATTERN = re.compile(r'^\s*(\d+)\s*([kmgt]?)(?:i?b)?\s*$', re.IGNORECASE)
+SIZE_UNITS = {'': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3, 't': 1024 ** 4}
+
+# A full commit SHA (SHA-1 or SHA-256); anything shorter is resolved after fetching
+FULL_SHA_PATTERN = re.compile(r'[0-9a-f]{40}(?:[0-9a-f]{24})?')
+
+# Partial clone filter for the first fetch of a new mirror, which only needs
+# the pipeline file; servers without filter support send everything
+PROBE_FILTER = 'blob:none'
 
 class PipelineParser:
     def __init__(self):
         self.workspace_dir = WORKSPACE_DIR
-        os.makedirs(self.workspace_dir, exist_ok=True)
+        # Bare mirrors shared by all jobs, and one worktree per job
+        self.mirror_dir = os.path.join(self.workspace_dir, 'mirrors')
+        self.worktree_dir = os.path.join(self.workspace_dir, 'worktrees')
+        os.makedirs(self.mirror_dir, exist_ok=True)
+        os.makedirs(self.worktree_dir, exist_ok=True)
     
-    def clone_repo(self, repo_url: str, commit_sha: str, branch: str) -> str:
-        """Clone or pull repository and return local path"""
+    def clone_repo(self, repo_url: str, commit_sha: str, branch: str, job_id: str = None) -> str:
+        """Check out the commit into a fresh worktree and return its path.
+
+        How much is fetched is controlled by the pipeline's ``checkout``
+        block (see ``checkout_options``). Because that block lives in the
+        commit being fetched, a new mirror first fetches only that commit,
+        without blobs, to read it, and then deepens as the block asks. Later
+        fetches use the options remembered from the previous job, and a
+        deeper ``depth`` or ``sparse`` paths take effect immediately.
+
+        A full ``commit_sha`` is fetched by itself. Anything else, such as
+        an abbreviated SHA or the branch name, is resolved with
+        ``rev-parse`` once the branch has been fetched, and the job fails
+        if it does not name a fetched commit.
+        """
         repo_name = self._get_repo_name(repo_url)
-        local_path = os.path.abspath(os.path.join(self.workspace_dir, repo_name))
+        mirror_path = os.path.abspath(os.path.join(self.mirror_dir, repo_name + '.git'))
+        local_path = os.path.abspath(os.path.join(self.worktree_dir, repo_name, job_id or uuid.uuid4().hex[:8]))
+        exact = bool(FULL_SHA_PATTERN.fullmatch(commit_sha))
         
         try:
-            if os.path.exists(local_path):
-                # Repository exists, just pull latest
-                subprocess.run(['git', 'fetch', 'origin'], cwd=local_path, check=True, capture_output=True)
-                subprocess.run(['git', 'checkout', branch], cwd=local_path, check=True, capture_output=True)
-                subprocess.run(['git', 'pull', 'origin', branch], cwd=local_path, check=True, capture_output=True)
-            else:
-                # Clone repository - try without branch first
-                try:
-                    subprocess.run(['git', 'clone', repo_url, local_path], check=True, capture_output=True)
-                except subprocess.CalledProcessError:
-                    # Try with branch specification
-                    subprocess.run(['git', 'clone', '--branch', branch, repo_url, local_path], check=True, capture_output=True)
-            
-            # Checkout specific commit if provided and different from branch
-            if commit_sha != branch and len(commit_sha) > 10:  # Looks like a real commit SHA
-                try:
-                    subprocess.run(['git', 'checkout', commit_sha], cwd=local_path, check=True, capture_output=True)
-                except subprocess.CalledProcessError:
-                    # Commit might not exist, stay on branch
-                    pass
+            # Worktree metadata lives in the mirror, so serialize per mirror
+            with file_lock(mirror_path + '.lock'):
+                if not os.path.exists(mirror_path):
+                    self._git(['init', '--bare', mirror_path])
+                    self._git(['remote', 'add', '--mirror=fetch', 'origin', repo_url], mirror_path)
+                    # Nothing remembered yet: fetch as little as possible,
+                    # read the pipeline, then fetch what it asks for
+                    fetched = dict(self.checkout_options(None), depth=1, filter=PROBE_FILTER)
+                else:
+                    fetched = self._saved_checkout_options(mirror_path)
+                
+                revision = self._fetch(mirror_path, commit_sha if exact else None, branch, fetched)
+                
+                options = self.checkout_options(self._read_pipeline_at(mirror_path, revision))
+                if options != fetched:
+                    self._save_checkout_options(mirror_path, options)
+                    if fetched['depth'] and (not options['depth'] or options['depth'] > fetched['depth']):
+                        self._fetch(mirror_path, revision, branch, options)
+                if not exact:
+                    revision = self._resolve(mirror_path, commit_sha, branch)
+                
+                if os.path.exists(local_path):
+                    # Leftover from an earlier attempt at the same job
+                    self._remove_worktree(mirror_path, local_path)
+                os.makedirs(os.path.dirname(local_path), exist_ok=True)
+                self._add_worktree(mirror_path, local_path, revision, options['sparse'])
             
             return local_path
             
         except subprocess.CalledProcessError as e:
-            raise Exception(f"Git operation failed: {e}")
+            raise Exception(f"Git operation failed: {e}: {e.stderr}")
+    
+    def checkout_options(self, pipeline: Optional[Dict]) -> Dict:
+        """Normalize a pipeline's ``checkout`` block over the global defaults"""
+        checkout = (pipeline or {}).get('checkout') or {}
+        return {
+            'depth': int(checkout.get('depth', CHECKOUT_DEPTH)),
+            'filter': checkout.get('filter', CHECKOUT_FILTER) or '',
+            'sparse': list(checkout.get('sparse', []))
+        }
+    
+    def _fetch(self, mirror_path: str, commit_sha: Optional[str], branch: str, options: Dict) -> str:
+        """Fetch the commit (or branch tip) and return its full SHA"""
+        if options['depth'] or options['filter']:
+            # Fetch only what this job needs: the exact commit or branch tip
+            args = ['fetch']
+            if options['depth']:
+                args.append(f"--depth={options['depth']}")
+            elif self._is_shallow(mirror_path):
+                args.append('--unshallow')
+            if options['filter']:
+                self._git(['config', 'remote.origin.promisor', 'true'], mirror_path)
+                self._git(['config', 'remote.origin.partialclonefilter', options['filter']], mirror_path)
+                args.append(f"--filter={options['filter']}")
+            else:
+                self._clear_filter(mirror_path)
+            target = commit_sha or f'+refs/heads/{branch}:refs/heads/{branch}'
+            self._git(args + ['origin', target], mirror_path)
+        else:
+            self._clear_filter(mirror_path)
+            args = ['fetch', '--prune', 'origin']
+            if self._is_shallow(mirror_path):
+                args.insert(1, '--unshallow')
+            self._git(args, mirror_path)
+        
+        name = commit_sha or f'refs/heads/{branch}'
+        try:
+            return self._git(['rev-parse', '--verify', f'{name}^{{commit}}'], mirror_path)
+        except subprocess.CalledProcessError:
+            raise Exception(f"Commit {name} could not be fetched")
+    
+    def _resolve(self, mirror_path: str, name: str, branch: str) -> str:
+        """Full SHA of the commit ``name`` refers to in the mirror"""
+        try:
+            return self._git(['rev-parse', '--verify', '--end-of-options', f'{name}^{{commit}}'], mirror_path)
+        except subprocess.CalledProcessError:
+            raise Exception(f"Commit {name!r} was not found in the fetched history of {branch}; "
+                            f"give the full commit SHA")
+    
+    def _is_shallow(self, mirror_path: str) -> bool:
+        return self._git(['rev-parse', '--is-shallow-repository'], mirror_path) == 'true'
+    
+    def _clear_filter(self, mirror_path: str):
+        """Fetch whole objects from now on; blobs left out earlier are still
+        fetched on demand because the remote stays a promisor"""
+        try:
+            self._git(['config', '--unset', 'remote.origin.partialclonefilter'], mirror_path)
+        except subprocess.CalledProcessError:
+            pass
+    
+    def _read_pipeline_at(self, mirror_path: str, revision: str) -> Optional[Dict]:
+        try:
+            content = self._git(['show', f'{revision}:{PIPELINE_FILE}'], mirror_path)
+        except subprocess.CalledProcessError:
+            return None
+        try:
+            pipeline = yaml.safe_load(content)
+        except yaml.YAMLError:
+            return None
+        return pipeline if isinstance(pipeline, dict) else None
+    
+    def _saved_checkout_options(self, mirror_path: str) -> Dict:
+        try:
+            saved = json.loads(self._git(['config', '--get', 'cicd.checkout'], mirror_path))
+        except subprocess.CalledProcessError:
+            return self.checkout_options(None)
+        return self.checkout_options({'checkout': saved})
+    
+    def _save_checkout_options(self, mirror_path: str, options: Dict):
+        self._git(['config', 'cicd.checkout', json.dumps(options)], mirror_path)
+    
+    def _add_worktree(self, mirror_path: str, local_path: str, revision: str, sparse: List[str]):
+        if not sparse:
+            self._git(['worktree', 'add', '--detach', local_path, revision], mirror_path)
+            return
+        # Sparse checkout is per worktree: populate only the listed paths
+        self._git(['worktree', 'add', '--no-checkout', '--detach', local_path, revision], mirror_path)
+        self._git(['sparse-checkout', 'set', *sparse], local_path)
+        self._git(['read-tree', '-mu', 'HEAD'], local_path)
+    
+    def release_workspace(self, repo_path: str):
+        """Remove a job's worktree once the job is finished"""
+        if not os.path.exists(repo_path):
+            return
+        mirror_path = self._git(['rev-parse', '--git-common-dir'], repo_path)
+        mirror_path = os.path.abspath(os.path.join(repo_path, mirror_path))
+        with file_lock(mirror_path + '.lock'):
+            self._remove_worktree(mirror_path, repo_path)
+    
+    def prune_worktrees(self, is_active: Callable[[str], bool]) -> List[str]:
+        """Remove worktrees left behind by jobs that are no longer running"""
+        removed = []
+        for repo_name in os.listdir(self.worktree_dir):
+            repo_dir = os.path.join(self.worktree_dir, repo_name)
+            for job_id in os.listdir(repo_dir):
+                if not is_active(job_id):
+                    path = os.path.join(repo_dir, job_id)
+                    try:
+                        self.release_workspace(path)
+                    except subprocess.CalledProcessError:
+                        shutil.rmtree(path, ignore_errors=True)
+                    removed.append(path)
+        for name in os.listdir(self.mirror_dir):
+            mirror_path = os.path.join(self.mirror_dir, name)
+            if name.endswith('.git') and os.path.isdir(mirror_path):
+                with file_lock(mirror_path + '.lock'):
+                    self._git(['worktree', 'prune'], mirror_path)
+        return removed
+    
+    def _remove_worktree(self, mirror_path: str, worktree_path: str):
+        try:
+            self._git(['worktree', 'remove', '--force', worktree_path], mirror_path)
+        except subprocess.CalledProcessError:
+            shutil.rmtree(worktree_path, ignore_errors=True)
+            self._git(['worktree', 'prune'], mirror_path)
+    
+    def _git(self, args: List[str], cwd: Optional[str] = None) -> str:
+        result = subprocess.run(['git', *args], cwd=cwd, check=True, capture_output=True, text=True)
+        return result.stdout.strip()
     
     def parse_pipeline(self, repo_path: str) -> Dict:
         """Parse .cicd.yml file from repository"""
@@ -79,4 +248,108 @@ class PipelineParser:
             if not isinstance(step, dict) or 'name' not in step or 'run' not in step:
                 return False
         
-        return True
\ No newline at end of file
+        if not self._validate_step_graph(pipeline['steps']):
+            return False
+        
+        for step in pipeline['steps']:
+            cache = step.get('cache')
+            if cache is None:
+                continue
+            if not isinstance(cache, dict):
+                return False
+            for field in ('inputs', 'env', 'outputs'):
+                values = cache.get(field, [])
+                if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+                    return False
+        
+        for step in pipeline['steps']:
+            timeout, cpu = step.get('timeout', STEP_TIMEOUT), step.get('cpu', 1)
+            if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0:
+                return False
+            if isinstance(cpu, bool) or not isinstance(cpu, int) or cpu <= 0:
+                return False
+            if 'memory' in step and not self.parse_size(step['memory']):
+                return False
+        
+        checkout = pipeline.get('checkout')
+        if checkout is not None:
+            if not isinstance(checkout, dict):
+                return False
+            depth = checkout.get('depth', 0)
+            if not isinstance(depth, int) or depth < 0:
+                return False
+            if not isinstance(checkout.get('filter', ''), str):
+                return False
+            sparse = checkout.get('sparse', [])
+            if not isinstance(sparse, list) or not all(isinstance(path, str) for path in sparse):
+                return False
+        
+        return True
+    
+    def step_limits(self, step: Dict) -> Dict:
+        """A step's timeout and CPU seconds and its memory in bytes; None when unlimited"""
+        return {
+            'timeout': step.get('timeout', STEP_TIMEOUT),
+            'cpu': step.get('cpu'),
+            'memory': self.parse_size(step['memory']) if 'memory' in step else None
+        }
+    
+    def parse_size(self, value) -> Optional[int]:
+        """Bytes in a size like 512M or 2GiB; None if it is not a positive size"""
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, int):
+            return value if value > 0 else None
+        match = SIZE_PATTERN.match(value) if isinstance(value, str) else None
+        if not match:
+            return None
+        size = int(match.group(1)) * SIZE_UNITS[match.group(2).lower()]
+        return size or None
+    
+    def step_needs(self, step: Dict) -> List[str]:
+        """Names of the steps a step depends on"""
+        needs = step.get('needs') or []
+        return [needs] if isinstance(needs, str) else list(needs)
+    
+    def uses_needs(self, steps: List[Dict]) -> bool:
+        """Whether any step declares needs, which makes the steps a graph;
+        ``needs: null`` counts as not declared"""
+        return any(step.get('needs') is not None for step in steps)
+    
+    def _validate_step_graph(self, steps: List[Dict]) -> bool:
+        """Check that needs refer to known steps and contain no cycles.
+
+        Steps run in order unless one declares needs, so only then must
+        their names be unique.
+        """
+        if not self.uses_needs(steps):
+            return True
+        names = [step['name'] for step in steps]
+        if len(set(names)) != len(names):
+            return False
+        
+        graph = {}
+        for step in steps:
+            needs = step.get('needs')
+            if needs is not None and not isinstance(needs, (str, list)) or not all(isinstance(n, str) for n in self.step_needs(step)):
+                return False
+            graph[step['name']] = self.step_needs(step)
+            if not all(need in names for need in graph[step['name']]):
+                return False
+        
+        # Depth-first search; a node seen again while still on the stack is a cycle
+        visiting, visited = set(), set()
+        
+        def has_cycle(name: str) -> bool:
+            if name in visiting:
+                return True
+            if name in visited:
+                return False
+            visiting.add(name)
+            if any(has_cycle(need) for need in graph[name]):
+                return True
+            visiting.discard(name)
+            visited.add(name)
+            return False
+        
+        return not any(has_cycle(name) for name in graph)
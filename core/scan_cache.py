@@ -0,0 +1,75 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+from config.settings import SCAN_CACHE_PATH
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS findings (
+    rules TEXT NOT NULL,
+    blob TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    issues TEXT NOT NULL,
+    PRIMARY KEY (rules, blob, kind)
+) WITHOUT ROWID;
+"""
+
+# Keys looked up per query, below SQLite's bound parameter limit
+LOOKUP_BATCH = 300
+
+class ScanCache:
+    """Per-file scan findings keyed by git blob SHA, stored in SQLite.
+
+    Findings depend on the file's content, its extension class (which
+    decides the rules that apply) and the rules themselves, so rows are
+    keyed by all three. Rows left by another rule set are deleted when the
+    cache is opened.
+    """
+
+    def __init__(self, rules_version: str, db_path: str = SCAN_CACHE_PATH):
+        self.rules_version = rules_version
+        self.db_path = db_path
+        self._local = threading.local()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            conn.execute('DELETE FROM findings WHERE rules != ?', (rules_version,))
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def lookup(self, keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], List[Dict]]:
+        """Cached issues for each known (blob, kind) key"""
+        keys = list(set(keys))
+        found = {}
+        conn = self._connect()
+        for i in range(0, len(keys), LOOKUP_BATCH):
+            batch = keys[i:i + LOOKUP_BATCH]
+            placeholders = ', '.join('(?, ?)' for _ in batch)
+            rows = conn.execute(
+                f'SELECT blob, kind, issues FROM findings WHERE rules = ? AND (blob, kind) IN (VALUES {placeholders})',
+                [self.rules_version, *(value for key in batch for value in key)]
+            )
+            for blob, kind, issues in rows:
+                found[(blob, kind)] = json.loads(issues)
+        return found
+
+    def store(self, findings: Dict[Tuple[str, str], List[Dict]]):
+        if not findings:
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO findings (rules, blob, kind, issues) VALUES (?, ?, ?, ?)',
+                ((self.rules_version, blob, kind, json.dumps(issues)) for (blob, kind), issues in findings.items())
+            )
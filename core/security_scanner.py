@@ -1,24 +1,166 @@
 import os
 import re
 import json
-from typing import List, Dict
+import hashlib
+import heapq
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Optional, Tuple
+
+from config.settings import SCAN_MAX_FILE_BYTES, SCAN_CACHE_PATH, SCAN_WORKERS, SCAN_BATCH_BYTES
+from core.advisory_db import AdvisoryDB
+from core.aho_corasick import AhoCorasick
+from core.dependency_parser import DEPENDENCY_FILES
+from core.file_index import FileIndex, IndexedFile
+from core.scan_cache import ScanCache
+
+# Patterns are matched against lowercased file contents, which lets the
+# regex engine jump straight to each keyword instead of trying every offset
+# as it does for case-insensitive patterns
+SECRET_PATTERNS = [
+    (r'password\s*=\s*["\'][^"\']+["\']', 'Hardcoded password'),
+    (r'api_key\s*=\s*["\'][^"\']+["\']', 'API key'),
+    (r'secret\s*=\s*["\'][^"\']+["\']', 'Secret token'),
+    (r'token\s*=\s*["\'][^"\']+["\']', 'Access token'),
+    (r'[a-z0-9]{32}', 'Potential hash/key')
+]
+
+DANGEROUS_COMMANDS = [
+    'rm -rf /',
+    'sudo',
+    'curl | sh',
+    'wget | sh',
+    'eval',
+    'exec',
+    'system(',
+    'shell_exec'
+]
+
+# File classes (see FileIndex.classify) each rule applies to
+SECRET_FILE_KINDS = ('source', 'yaml', 'json', 'env')
+COMMAND_FILE_KINDS = ('yaml', 'dockerfile')
+
+# Bytes sniffed for NUL to tell binary files apart
+BINARY_SNIFF_BYTES = 8192
+
+# Bytes each file counts for when balancing batches, for its open/read overhead
+FILE_COST_BYTES = 4096
+
+# Batches per worker process, so workers that finish early pick up more
+BATCHES_PER_WORKER = 4
+
+class SecretMatcher:
+    """Precompiled secret patterns, reported once per file.
+
+    Each pattern stops at its first match rather than collecting them all,
+    so a lockfile full of hashes costs no more than one hash.
+    """
+
+    def __init__(self, patterns: List[Tuple[str, str]]):
+        self.rules = [(re.compile(pattern), description) for pattern, description in patterns]
+
+    def find(self, content: str) -> List[str]:
+        """Descriptions of the patterns found in the content, in pattern order"""
+        content = content.lower()
+        return [description for regex, description in self.rules if regex.search(content)]
+
+SECRET_MATCHER = SecretMatcher(SECRET_PATTERNS)
+
+# Bump when the matching code changes what a finding contains
+RULES_REVISION = 2
+
+# Changes whenever anything that affects per-file findings does, which
+# retires every cached finding made under the old rules
+RULES_VERSION = hashlib.sha256(json.dumps([
+    RULES_REVISION, SECRET_PATTERNS, DANGEROUS_COMMANDS, SECRET_FILE_KINDS, COMMAND_FILE_KINDS,
+    SCAN_MAX_FILE_BYTES, BINARY_SNIFF_BYTES
+]).encode()).hexdigest()[:16]
+
+_scan_pool = None
+_scan_pool_lock = threading.Lock()
+
+def _get_scan_pool(workers: int) -> ProcessPoolExecutor:
+    """Process pool shared by every scanner in this process"""
+    global _scan_pool
+    with _scan_pool_lock:
+        if _scan_pool is None:
+            # Executors are multi-threaded, which makes forking unsafe
+            _scan_pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+        return _scan_pool
+
+def _discard_scan_pool(pool: ProcessPoolExecutor):
+    global _scan_pool
+    with _scan_pool_lock:
+        if _scan_pool is pool:
+            _scan_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+_worker_scanner = None
+
+def _scan_batch(files: List[Tuple[str, str, Optional[int]]]) -> List[List[Dict]]:
+    """Run in a pool process: issues for each (path, kind, size)"""
+    global _worker_scanner
+    if _worker_scanner is None:
+        _worker_scanner = SecurityScanner(cache_path=None, workers=1)
+    return [_worker_scanner._scan_file(path, kind, size) for path, kind, size in files]
 
 class SecurityScanner:
-    def __init__(self):
+    def __init__(self, cache_path: str = SCAN_CACHE_PATH, workers: int = SCAN_WORKERS):
         self.security_issues = []
+        self.workers = workers
+        # Files scanned, files answered from the cache, seconds taken by the last
+        # scan and whether it stopped at the first CRITICAL finding
+        self.stats = {'files': 0, 'cached': 0, 'seconds': 0.0, 'aborted': False}
+        self.cache = ScanCache(RULES_VERSION, cache_path) if cache_path else None
+        self.command_matcher = AhoCorasick(DANGEROUS_COMMANDS)
+        # Text of the dependency files read during the current scan
+        self._dependency_texts = {}
+        self._advisories = None
         
-    def scan_repository(self, repo_path: str) -> Dict:
-        """Scan repository for security issues"""
+    def scan_repository(self, repo_path: str, index: FileIndex = None, abort_on_critical: bool = False) -> Dict:
+        """Scan repository for security issues.
+
+        With ``abort_on_critical`` the scan stops at the first CRITICAL
+        finding, leaving the remaining files unscanned.
+        """
         self.security_issues = []
+        self._dependency_texts = {}
+        started = time.monotonic()
+        index = index or FileIndex(repo_path)
+        
+        entries = index.of_kind(*SECRET_FILE_KINDS, *COMMAND_FILE_KINDS)
+        blobs = index.blob_shas() if self.cache else {}
+        keys = [(blobs[entry.rel_path], entry.kind) if entry.rel_path in blobs else None for entry in entries]
+        cached = self.cache.lookup(key for key in keys if key) if blobs else {}
         
-        # Scan for secrets
-        self._scan_secrets(repo_path)
+        # Issues per entry; None until the file has been scanned
+        results = [cached.get(key) for key in keys]
+        pending = [i for i, found in enumerate(results) if found is None]
+        aborted = abort_on_critical and any(self._has_critical(found) for found in results if found)
+        if not aborted:
+            aborted = self._scan_files(entries, pending, results, abort_on_critical)
+        if self.cache:
+            self.cache.store({keys[i]: results[i] for i in pending if keys[i] and results[i] is not None})
         
-        # Scan for dangerous commands
-        self._scan_dangerous_commands(repo_path)
+        issues = [dict(issue, file=os.sep + entry.rel_path)
+                  for entry, found in zip(entries, results) if found for issue in found]
+        # Secrets first, then dangerous commands, as separate passes used to report them
+        self.security_issues = ([issue for issue in issues if issue['type'] == 'secret'] +
+                                [issue for issue in issues if issue['type'] != 'secret'])
         
         # Scan dependencies
-        self._scan_dependencies(repo_path)
+        self._scan_dependencies(repo_path, index)
+        self._dependency_texts = {}
+        
+        self.stats = {
+            'files': len(entries),
+            'cached': len(entries) - len(pending),
+            'seconds': time.monotonic() - started,
+            'aborted': aborted
+        }
         
         return {
             'total_issues': len(self.security_issues),
@@ -26,76 +168,163 @@ class SecurityScanner:
             'risk_level': self._calculate_risk_level()
         }
     
-    def _scan_secrets(self, repo_path: str):
-        """Scan for potential secrets in files"""
-        secret_patterns = [
-            (r'password\s*=\s*["\'][^"\']+["\']', 'Hardcoded password'),
-            (r'api_key\s*=\s*["\'][^"\']+["\']', 'API key'),
-            (r'secret\s*=\s*["\'][^"\']+["\']', 'Secret token'),
-            (r'token\s*=\s*["\'][^"\']+["\']', 'Access token'),
-            (r'[A-Za-z0-9]{32,}', 'Potential hash/key')
-        ]
+    def _scan_files(self, entries: List[IndexedFile], pending: List[int], results: List, abort_on_critical: bool) -> bool:
+        """Fill in results for the pending entries; True if stopped at a CRITICAL finding"""
+        # Dependency files are read here once; the dependency scan reuses their text
+        for i in pending:
+            if os.path.basename(entries[i].rel_path) in DEPENDENCY_FILES:
+                results[i] = self._scan_content(self._dependency_text(entries[i]), entries[i].kind)
+        files = {i: (entries[i].path, entries[i].kind, self._size(entries[i]))
+                 for i in pending if results[i] is None}
+        if abort_on_critical:
+            # Only dangerous commands are CRITICAL, so check the files that can hold them first
+            for i in pending:
+                if entries[i].kind in COMMAND_FILE_KINDS:
+                    results[i] = self._scan_file(*files[i])
+                    if self._has_critical(results[i]):
+                        return True
+            files = {i: file for i, file in files.items() if results[i] is None}
+        batches = self._batches(files)
         
-        for root, dirs, files in os.walk(repo_path):
-            # Skip .git directory
-            if '.git' in dirs:
-                dirs.remove('.git')
-                
-            for file in files:
-                if file.endswith(('.py', '.js', '.yml', '.yaml', '.json', '.env')):
-                    file_path = os.path.join(root, file)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read()
-                            
-                        for pattern, description in secret_patterns:
-                            matches = re.findall(pattern, content, re.IGNORECASE)
-                            if matches:
-                                self.security_issues.append({
-                                    'type': 'secret',
-                                    'file': file_path.replace(repo_path, ''),
-                                    'description': description,
-                                    'severity': 'HIGH'
-                                })
-                    except Exception:
-                        continue
-    
-    def _scan_dangerous_commands(self, repo_path: str):
-        """Scan for dangerous commands in pipeline files"""
-        dangerous_commands = [
-            'rm -rf /',
-            'sudo',
-            'curl | sh',
-            'wget | sh',
-            'eval',
-            'exec',
-            'system(',
-            'shell_exec'
-        ]
+        if len(batches) > 1:
+            pool = _get_scan_pool(self.workers)
+            futures = {pool.submit(_scan_batch, [files[i] for i in batch]): batch for batch in batches}
+            try:
+                # Findings are merged as each batch finishes, not after all of them
+                for future in as_completed(futures):
+                    batch = futures[future]
+                    for i, found in zip(batch, future.result()):
+                        results[i] = found
+                    if abort_on_critical and any(self._has_critical(results[i]) for i in batch):
+                        return True
+            except BrokenProcessPool:
+                print("Security scan worker died, scanning the remaining files in-process")
+                _discard_scan_pool(pool)
+            finally:
+                for future in futures:
+                    future.cancel()
         
-        pipeline_files = ['.cicd.yml', '.github/workflows/*.yml', 'Dockerfile']
+        for i in pending:
+            if results[i] is None:
+                results[i] = self._scan_file(*files[i])
+                if abort_on_critical and self._has_critical(results[i]):
+                    return True
+        return False
+    
+    def _batches(self, files: Dict[int, Tuple[str, str, Optional[int]]]) -> List[List[int]]:
+        """Split files into batches of about equal bytes, or one batch if not worth a pool"""
+        cost = {i: (size or 0) + FILE_COST_BYTES for i, (_, _, size) in files.items()}
+        count = min(self.workers * BATCHES_PER_WORKER, sum(cost.values()) // SCAN_BATCH_BYTES, len(files))
+        if self.workers <= 1 or count <= 1:
+            return [list(files)]
         
-        for root, dirs, files in os.walk(repo_path):
-            for file in files:
-                if file.endswith(('.yml', '.yaml', 'Dockerfile')):
-                    file_path = os.path.join(root, file)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read()
-                            
-                        for cmd in dangerous_commands:
-                            if cmd in content:
-                                self.security_issues.append({
-                                    'type': 'dangerous_command',
-                                    'file': file_path.replace(repo_path, ''),
-                                    'description': f'Dangerous command: {cmd}',
-                                    'severity': 'CRITICAL'
-                                })
-                    except Exception:
-                        continue
+        # Largest files first, each into the lightest batch so far
+        heap = [(0, n, []) for n in range(count)]
+        for i in sorted(cost, key=cost.get, reverse=True):
+            load, n, batch = heapq.heappop(heap)
+            batch.append(i)
+            heapq.heappush(heap, (load + cost[i], n, batch))
+        return [sorted(batch) for _, _, batch in heap]
+    
+    def _size(self, entry: IndexedFile) -> Optional[int]:
+        try:
+            return entry.size
+        except OSError:
+            return None
+    
+    def _has_critical(self, issues: List[Dict]) -> bool:
+        return any(issue['severity'] == 'CRITICAL' for issue in issues)
+    
+    def _scan_file(self, path: str, kind: str, size: Optional[int]) -> List[Dict]:
+        """Issues in one file, without the file path so they can be cached"""
+        try:
+            content = self._read_text(path, size)
+        except Exception:
+            return []
+        return self._scan_content(content, kind)
+    
+    def _scan_content(self, content: Optional[str], kind: str) -> List[Dict]:
+        if content is None:
+            return []
+        issues = []
+        if kind in SECRET_FILE_KINDS:
+            issues.extend(self._scan_secrets(content))
+        if kind in COMMAND_FILE_KINDS:
+            issues.extend(self._scan_dangerous_commands(content))
+        return issues
+    
+    def _dependency_text(self, entry: IndexedFile) -> Optional[str]:
+        """A dependency file's text, read at most once per scan"""
+        if entry.rel_path not in self._dependency_texts:
+            try:
+                self._dependency_texts[entry.rel_path] = self._read_text(entry.path, self._size(entry))
+            except Exception:
+                self._dependency_texts[entry.rel_path] = None
+        return self._dependency_texts[entry.rel_path]
+    
+    def _read_text(self, path: str, size: Optional[int], max_bytes: int = SCAN_MAX_FILE_BYTES):
+        """Read a file for scanning, or None if it is too large or binary"""
+        if size is None or size > max_bytes:
+            return None
+        with open(path, 'rb') as f:
+            data = f.read()
+        if b'\0' in data[:BINARY_SNIFF_BYTES]:
+            return None
+        return data.decode('utf-8', errors='ignore')
+    
+    def _scan_secrets(self, content: str) -> List[Dict]:
+        """Scan for potential secrets in a file"""
+        return [{
+            'type': 'secret',
+            'file': None,
+            'description': description,
+            'severity': 'HIGH'
+        } for description in SECRET_MATCHER.find(content)]
+    
+    def _scan_dangerous_commands(self, content: str) -> List[Dict]:
+        """Scan for dangerous commands in pipeline files, noting where each first appears"""
+        found = self.command_matcher.first_matches(content)
+        return [{
+            'type': 'dangerous_command',
+            'file': None,
+            'description': f'Dangerous command: {DANGEROUS_COMMANDS[index]}',
+            'severity': 'CRITICAL',
+            'line': content.count('\n', 0, found[index]) + 1,
+            'offset': found[index]
+        } for index in sorted(found)]
     
-    def _scan_dependencies(self, repo_path: str):
+    @property
+    def advisories(self) -> AdvisoryDB:
+        if self._advisories is None:
+            self._advisories = AdvisoryDB()
+        return self._advisories
+    
+    def _scan_dependencies(self, repo_path: str, index: FileIndex):
         """Scan for known vulnerable dependencies"""
+        if self.advisories.is_empty():
+            self._scan_outdated_requirements(repo_path)
+            return
+        
+        for entry in index.named(*DEPENDENCY_FILES):
+            try:
+                content = self._dependency_text(entry)
+                if content is None:
+                    continue
+                dependencies = set(DEPENDENCY_FILES[os.path.basename(entry.rel_path)](content))
+            except Exception:
+                continue
+            
+            matches = sorted(self.advisories.find_vulnerable(dependencies), key=lambda match: (match[0], match[1]['id']))
+            for (_, package, version), advisory in matches:
+                self.security_issues.append({
+                    'type': 'vulnerable_dependency',
+                    'file': os.sep + entry.rel_path,
+                    'description': f"{package} {version}: {advisory['id']} {advisory['summary']}".strip(),
+                    'severity': advisory['severity']
+                })
+    
+    def _scan_outdated_requirements(self, repo_path: str):
+        """Fallback when no advisories have been imported"""
         # Check requirements.txt
         req_file = os.path.join(repo_path, 'requirements.txt')
         if os.path.exists(req_file):
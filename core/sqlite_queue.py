@@ -0,0 +1,380 @@
+import json
+import sqlite3
+import threading
+import uuid
+from typing import Dict, Optional, List
+from datetime import datetime, timedelta
+
+from config.settings import LEASE_SECONDS, QUEUE_NOTIFY_DIR
+from core.job_notifier import JobNotifier
+from core.job_summary import summarize
+from models.job import Job, JobStatus
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    repo_url TEXT NOT NULL,
+    commit_sha TEXT NOT NULL,
+    branch TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    completed_at TEXT,
+    logs TEXT NOT NULL DEFAULT '[]',
+    steps TEXT NOT NULL DEFAULT '[]',
+    worker_id TEXT,
+    lease_expires_at TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs (created_at);
+-- Covers every summary column, so listings never read the job rows
+CREATE INDEX IF NOT EXISTS idx_jobs_summary
+    ON jobs (created_at, id, status, repo_url, branch, commit_sha, started_at, completed_at);
+CREATE TABLE IF NOT EXISTS job_logs (
+    job_id TEXT NOT NULL,
+    line_no INTEGER NOT NULL,
+    line TEXT NOT NULL,
+    PRIMARY KEY (job_id, line_no)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS queue_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO queue_version (id, version) VALUES (1, 0);
+"""
+
+# Bump queue_version on every change readers can see; lease renewals are not
+# visible, and log writes bump it once per chunk in _write_logs()
+VERSION_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS jobs_version_insert AFTER INSERT ON jobs
+BEGIN UPDATE queue_version SET version = version + 1; END;
+CREATE TRIGGER IF NOT EXISTS jobs_version_delete AFTER DELETE ON jobs
+BEGIN UPDATE queue_version SET version = version + 1; END;
+CREATE TRIGGER IF NOT EXISTS jobs_version_update
+AFTER UPDATE OF status, started_at, completed_at, logs, steps, worker_id, cancel_requested ON jobs
+BEGIN UPDATE queue_version SET version = version + 1; END;
+"""
+
+# Columns returned by query_jobs()
+SUMMARY_COLUMNS = 'id, repo_url, commit_sha, branch, status, created_at, started_at, completed_at'
+
+class SQLiteJobQueue:
+    """Job queue stored in a SQLite database running in WAL mode"""
+
+    def __init__(self, db_path="jobs.db", notify_dir=QUEUE_NOTIFY_DIR):
+        self.db_path = db_path
+        self.notifier = JobNotifier(notify_dir)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            self._migrate(conn)
+            conn.executescript(VERSION_TRIGGERS)
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _migrate(self, conn: sqlite3.Connection):
+        """Add columns introduced after a database was first created"""
+        columns = {row['name'] for row in conn.execute('PRAGMA table_info(jobs)')}
+        for name in ('worker_id', 'lease_expires_at'):
+            if name not in columns:
+                conn.execute(f'ALTER TABLE jobs ADD COLUMN {name} TEXT')
+        if 'cancel_requested' not in columns:
+            conn.execute('ALTER TABLE jobs ADD COLUMN cancel_requested INTEGER NOT NULL DEFAULT 0')
+        # Superseded by idx_jobs_summary
+        conn.execute('DROP INDEX IF EXISTS idx_jobs_created_id')
+
+    def _to_job(self, row: sqlite3.Row, logs: bool = True) -> Job:
+        job = Job(row['repo_url'], row['commit_sha'], row['branch'])
+        job.status = JobStatus(row['status'])
+        job.created_at = datetime.fromisoformat(row['created_at'])
+        job.started_at = datetime.fromisoformat(row['started_at']) if row['started_at'] else None
+        job.completed_at = datetime.fromisoformat(row['completed_at']) if row['completed_at'] else None
+        # Rows written before log streaming keep their logs inline
+        job.logs = (json.loads(row['logs']) or self._read_logs(row['id'])) if logs else []
+        job.steps = json.loads(row['steps'])
+        job.worker_id = row['worker_id']
+        job.lease_expires_at = datetime.fromisoformat(row['lease_expires_at']) if row['lease_expires_at'] else None
+        job.cancel_requested = bool(row['cancel_requested'])
+        return job
+
+    def _read_logs(self, job_id: str) -> List[str]:
+        rows = self._connect().execute(
+            'SELECT line FROM job_logs WHERE job_id = ? ORDER BY line_no', (job_id,)
+        ).fetchall()
+        return [row['line'] for row in rows]
+
+    def _write_logs(self, conn: sqlite3.Connection, job_id: str, lines: List[str], start: int):
+        # Truncate before inserting so a retried chunk is idempotent
+        conn.execute('DELETE FROM job_logs WHERE job_id = ? AND line_no >= ?', (job_id, start))
+        conn.executemany(
+            'INSERT INTO job_logs (job_id, line_no, line) VALUES (?, ?, ?)',
+            ((job_id, start + i, line) for i, line in enumerate(lines))
+        )
+        conn.execute('UPDATE queue_version SET version = version + 1')
+
+    def add_job(self, job: Job) -> str:
+        return self.add_jobs([job])[0]
+
+    def add_jobs(self, jobs: List[Job], coalesce: bool = False, cancel_running: bool = False,
+                 job_ids: List[str] = None) -> List[str]:
+        """Queue several jobs in one transaction.
+
+        With ``coalesce`` the newest job for a repository and branch marks
+        every other queued job for that branch skipped in the same
+        transaction, and with ``cancel_running`` also requests cancellation
+        of the branch's running jobs. Jobs whose given ``job_ids`` are
+        already stored are left alone, so a failed call can be retried.
+        """
+        job_ids = job_ids or [str(uuid.uuid4())[:8] for _ in jobs]
+        with self._connect() as conn:
+            stored = {row['id'] for row in conn.execute(
+                f"SELECT id FROM jobs WHERE id IN ({','.join('?' * len(job_ids))})", job_ids)}
+            new = [(job_id, job) for job_id, job in zip(job_ids, jobs) if job_id not in stored]
+            conn.executemany(
+                'INSERT INTO jobs (id, repo_url, commit_sha, branch, status, created_at, steps) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(job_id, job.repo_url, job.commit_sha, job.branch, job.status.value,
+                  job.created_at.isoformat(), json.dumps(job.steps)) for job_id, job in new]
+            )
+            for job_id, job in new:
+                self._write_logs(conn, job_id, job.logs, 0)
+            if coalesce and new:
+                self._supersede(conn, [job_id for job_id, _ in new], [job for _, job in new], cancel_running)
+        self.notifier.notify()
+        return job_ids
+
+    def _supersede(self, conn: sqlite3.Connection, job_ids: List[str], jobs: List[Job], cancel_running: bool):
+        latest = {(job.repo_url, job.branch): (job_id, job) for job_id, job in zip(job_ids, jobs)}
+        now = datetime.utcnow().isoformat()
+        for (repo_url, branch), (newest_id, newest) in latest.items():
+            if cancel_running:
+                conn.execute(
+                    'UPDATE jobs SET cancel_requested = 1 WHERE status = ? AND repo_url = ? AND branch = ?',
+                    (JobStatus.RUNNING.value, repo_url, branch)
+                )
+            skipped = conn.execute(
+                'UPDATE jobs SET status = ?, completed_at = ? '
+                'WHERE status = ? AND repo_url = ? AND branch = ? AND id != ? RETURNING id',
+                (JobStatus.SKIPPED.value, now, JobStatus.QUEUED.value, repo_url, branch, newest_id)
+            ).fetchall()
+            for (job_id,) in skipped:
+                start = conn.execute('SELECT COUNT(*) FROM job_logs WHERE job_id = ?', (job_id,)).fetchone()[0]
+                self._write_logs(conn, job_id, [f"Skipped: superseded by {newest.commit_sha[:8]} (job {newest_id})"], start)
+
+    def get_next_job(self, worker_id: str = None, lease_seconds: int = LEASE_SECONDS) -> Optional[tuple[str, Job]]:
+        """Claim the oldest queued job under a lease held by ``worker_id``"""
+        # Claim in a single statement so that two executors can never pick
+        # up the same row
+        now = datetime.utcnow()
+        with self._connect() as conn:
+            row = conn.execute(
+                'UPDATE jobs SET status = :running, started_at = :now, worker_id = :worker_id, '
+                'lease_expires_at = :expires '
+                'WHERE id = (SELECT id FROM jobs WHERE status = :queued ORDER BY created_at LIMIT 1) '
+                'AND status = :queued RETURNING *',
+                {'running': JobStatus.RUNNING.value, 'queued': JobStatus.QUEUED.value,
+                 'now': now.isoformat(), 'worker_id': worker_id,
+                 'expires': (now + timedelta(seconds=lease_seconds)).isoformat()}
+            ).fetchone()
+        return (row['id'], self._to_job(row)) if row else None
+
+    def renew_lease(self, job_id: str, worker_id: str, lease_seconds: int = LEASE_SECONDS) -> bool:
+        """Extend a running job's lease; False if the worker no longer owns it"""
+        expires = datetime.utcnow() + timedelta(seconds=lease_seconds)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                'UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND status = ? AND worker_id = ?',
+                (expires.isoformat(), job_id, JobStatus.RUNNING.value, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def requeue_expired_jobs(self) -> List[str]:
+        """Put running jobs whose lease has expired back in the queue.
+
+        Jobs that were being cancelled are marked cancelled instead.
+        """
+        now = datetime.utcnow().isoformat()
+        with self._connect() as conn:
+            cancelled = conn.execute(
+                'UPDATE jobs SET status = ?, completed_at = ?, lease_expires_at = NULL '
+                'WHERE status = ? AND cancel_requested AND (lease_expires_at IS NULL OR lease_expires_at < ?) '
+                'RETURNING id',
+                (JobStatus.CANCELLED.value, now, JobStatus.RUNNING.value, now)
+            ).fetchall()
+            rows = conn.execute(
+                'UPDATE jobs SET status = ?, started_at = NULL, worker_id = NULL, lease_expires_at = NULL '
+                'WHERE status = ? AND (lease_expires_at IS NULL OR lease_expires_at < ?) RETURNING id',
+                (JobStatus.QUEUED.value, JobStatus.RUNNING.value, now)
+            ).fetchall()
+        if rows or cancelled:
+            self.notifier.notify()
+        return [row['id'] for row in rows]
+
+    def cancel_job(self, job_id: str) -> bool:
+        """Cancel a queued job now, or ask the worker running it to stop.
+
+        Returns False if the job does not exist or has already finished.
+        """
+        with self._connect() as conn:
+            queued = conn.execute(
+                'UPDATE jobs SET status = ?, completed_at = ? WHERE id = ? AND status = ?',
+                (JobStatus.CANCELLED.value, datetime.utcnow().isoformat(), job_id, JobStatus.QUEUED.value)
+            ).rowcount
+            if queued:
+                start = conn.execute('SELECT COUNT(*) FROM job_logs WHERE job_id = ?', (job_id,)).fetchone()[0]
+                self._write_logs(conn, job_id, [f"[{datetime.now()}] Job cancelled before it started"], start)
+                return True
+            return conn.execute(
+                'UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?',
+                (job_id, JobStatus.RUNNING.value)
+            ).rowcount == 1
+
+    def is_cancel_requested(self, job_id: str) -> bool:
+        row = self._connect().execute('SELECT cancel_requested FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return bool(row and row['cancel_requested'])
+
+    def update_job_status(self, job_id: str, status: JobStatus, logs: List[str] = None, worker_id: str = None) -> bool:
+        """Update a job; with ``worker_id`` only if that worker still holds it"""
+        fields = {'status': status.value}
+        if status in [JobStatus.DONE, JobStatus.FAILED, JobStatus.SKIPPED, JobStatus.CANCELLED]:
+            fields['completed_at'] = datetime.utcnow().isoformat()
+            fields['lease_expires_at'] = None
+
+        assignments = ', '.join(f'{name} = ?' for name in fields)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f'UPDATE jobs SET {assignments} WHERE id = ? AND (? IS NULL OR worker_id = ?)',
+                (*fields.values(), job_id, worker_id, worker_id)
+            )
+            if cursor.rowcount and logs:
+                conn.execute("UPDATE jobs SET logs = '[]' WHERE id = ?", (job_id,))
+                self._write_logs(conn, job_id, logs, 0)
+        return cursor.rowcount == 1
+
+    def append_logs(self, job_id: str, lines: List[str], start: int, worker_id: str = None) -> bool:
+        """Write ``lines`` to a job's log starting at line number ``start``"""
+        with self._connect() as conn:
+            owned = conn.execute(
+                'SELECT 1 FROM jobs WHERE id = ? AND (? IS NULL OR worker_id = ?)',
+                (job_id, worker_id, worker_id)
+            ).fetchone()
+            if owned:
+                self._write_logs(conn, job_id, lines, start)
+        return bool(owned)
+
+    def update_step(self, job_id: str, step: Dict, worker_id: str = None) -> bool:
+        """Insert or replace the entry for ``step['name']`` in a job's steps"""
+        conn = self._connect()
+        # Parallel steps update the same row, so lock before reading it
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT steps FROM jobs WHERE id = ? AND (? IS NULL OR worker_id = ?)',
+                (job_id, worker_id, worker_id)
+            ).fetchone()
+            if row:
+                steps = json.loads(row['steps'])
+                names = [entry['name'] for entry in steps]
+                if step['name'] in names:
+                    steps[names.index(step['name'])] = step
+                else:
+                    steps.append(step)
+                conn.execute('UPDATE jobs SET steps = ? WHERE id = ?', (json.dumps(steps), job_id))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return bool(row)
+
+    def get_job(self, job_id: str, logs: bool = True) -> Optional[Job]:
+        """A job, with its whole log unless ``logs`` is False"""
+        row = self._connect().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._to_job(row, logs) if row else None
+
+    def read_logs(self, job_id: str, start: int = 0, end: int = None) -> Optional[List[str]]:
+        """Log lines ``start`` to ``end`` (negative counts from the end); None if unknown"""
+        conn = self._connect()
+        row = conn.execute('SELECT logs FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if not row:
+            return None
+        inline = json.loads(row['logs'])
+        if inline:
+            return inline[start:end]
+        # Line numbers are dense, so the last one gives the count from the primary key
+        count = conn.execute(
+            'SELECT COALESCE(MAX(line_no) + 1, 0) FROM job_logs WHERE job_id = ?', (job_id,)
+        ).fetchone()[0]
+        start, end, _ = slice(start, end).indices(count)
+        lines = conn.execute(
+            'SELECT line FROM job_logs WHERE job_id = ? AND line_no >= ? AND line_no < ? ORDER BY line_no',
+            (job_id, start, end)
+        ).fetchall()
+        return [line['line'] for line in lines]
+
+    def list_jobs(self, limit: int = 50) -> List[tuple[str, Job]]:
+        rows = self._connect().execute(
+            'SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?', (limit,)
+        ).fetchall()
+        return [(row['id'], self._to_job(row)) for row in rows]
+
+    def list_summaries(self, limit: int = 50) -> List[Dict]:
+        """Summaries of the newest jobs, read from the summary index alone"""
+        return self.query_jobs(limit)
+
+    def query_jobs(self, limit: int = 50, before: tuple = None, statuses: List[str] = None,
+                   repo: str = None, branch: str = None) -> List[Dict]:
+        """Newest first job summaries, for listings.
+
+        ``before`` is the (created_at, id) of the last job of the previous
+        page. ``repo`` matches a full repository URL or its owner/name.
+        """
+        conditions, params = [], []
+        if before:
+            conditions.append('(created_at, id) < (?, ?)')
+            params.extend(before)
+        if statuses:
+            conditions.append(f"status IN ({', '.join('?' for _ in statuses)})")
+            params.extend(statuses)
+        if repo:
+            suffix = '/' + repo.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            conditions.append("(repo_url = ? OR repo_url LIKE ? ESCAPE '\\' OR repo_url LIKE ? ESCAPE '\\')")
+            params.extend([repo, '%' + suffix, '%' + suffix + '.git'])
+        if branch:
+            conditions.append('branch = ?')
+            params.append(branch)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ''
+        rows = self._connect().execute(
+            f'SELECT {SUMMARY_COLUMNS} FROM jobs {where}ORDER BY created_at DESC, id DESC LIMIT ?',
+            (*params, limit)
+        ).fetchall()
+        return [summarize(row['id'], dict(row)) for row in rows]
+
+    def tail_logs(self, job_id: str, start: int = 0) -> Optional[tuple[List[str], str]]:
+        """A job's log lines from line ``start`` on and its status; None if unknown"""
+        conn = self._connect()
+        # Status first: lines written before a job finished are then always included
+        row = conn.execute('SELECT status, logs FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if not row:
+            return None
+        inline = json.loads(row['logs'])
+        if inline:
+            return inline[start:], row['status']
+        lines = conn.execute(
+            'SELECT line FROM job_logs WHERE job_id = ? AND line_no >= ? ORDER BY line_no', (job_id, start)
+        ).fetchall()
+        return [line['line'] for line in lines], row['status']
+
+    def version(self, job_id: str = None) -> str:
+        """Token that changes whenever any job does, ``job_id`` included"""
+        row = self._connect().execute('SELECT version FROM queue_version').fetchone()
+        return str(row['version'])
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from config.settings import STEP_CACHE_DIR, STEP_CACHE_MAX_BYTES
+from core.file_lock import file_lock
+
+# Bump when the key derivation changes so old entries stop matching
+CACHE_KEY_VERSION = 2
+
+def normalize_repo_url(repo_url: str) -> str:
+    """``host/owner/name`` for a clone URL, so every spelling of one
+    repository maps to the same cache entries"""
+    if '://' in repo_url:
+        parsed = urlparse(repo_url)
+        host = (parsed.hostname or '') + (f":{parsed.port}" if parsed.port else '')
+        path = parsed.path
+    elif ':' in repo_url:
+        # scp-like git@host:owner/name
+        host, path = repo_url.split(':', 1)
+        host = host.rsplit('@', 1)[-1]
+    else:
+        host, path = '', repo_url
+    path = path.strip('/')
+    if path.endswith('.git'):
+        path = path[:-4]
+    return f"{host.lower()}/{path}"
+
+class StepCache:
+    """Content-addressed cache of step results.
+
+    A step that declares ``cache`` is keyed by its repository, its command,
+    the values of the listed ``env`` variables and the git blob SHAs of the
+    files matching its ``inputs`` globs, so one repository can never
+    restore outputs recorded by another. A hit replays the recorded log
+    lines and restores the declared ``outputs`` from ``objects/``, where
+    files are stored by SHA-256. Entries are evicted least recently used
+    first once the entries and objects together grow past ``max_bytes``.
+    """
+
+    def __init__(self, cache_dir: str = STEP_CACHE_DIR, max_bytes: int = STEP_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.entries_dir = os.path.join(cache_dir, 'entries')
+        self.objects_dir = os.path.join(cache_dir, 'objects')
+        self.lock_path = os.path.join(cache_dir, 'cache.lock')
+        os.makedirs(self.entries_dir, exist_ok=True)
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+    def key(self, repo_url: str, repo_path: str, step: Dict) -> str:
+        cache = step['cache']
+        inputs = self._input_blobs(repo_path, cache.get('inputs', []))
+        material = {
+            'version': CACHE_KEY_VERSION,
+            'repo': normalize_repo_url(repo_url),
+            'run': step['run'],
+            'env': {name: os.environ.get(name) for name in sorted(cache.get('env', []))},
+            'outputs': sorted(cache.get('outputs', [])),
+            'inputs': sorted(inputs.items())
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True).encode()).hexdigest()
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'r') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if not all(os.path.exists(self._object_path(output['digest'])) for output in entry['outputs']):
+            return None
+        # Access time drives LRU eviction
+        os.utime(entry_path)
+        return entry
+
+    def restore(self, entry: Dict, repo_path: str):
+        for output in entry['outputs']:
+            target = os.path.join(repo_path, output['path'])
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(self._object_path(output['digest']), target)
+            os.chmod(target, output['mode'])
+
+    def store(self, key: str, step: Dict, repo_path: str, logs: List[str]):
+        outputs = []
+        for rel_path in self._output_files(repo_path, step['cache'].get('outputs', [])):
+            path = os.path.join(repo_path, rel_path)
+            digest = self._store_object(path)
+            outputs.append({'path': rel_path, 'digest': digest, 'mode': os.stat(path).st_mode & 0o777})
+
+        entry = {'step': step['name'], 'created_at': time.time(), 'logs': logs, 'outputs': outputs}
+        tmp_path = self._entry_path(key) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._entry_path(key))
+        self._evict()
+
+    def _input_blobs(self, repo_path: str, patterns: List[str]) -> Dict[str, str]:
+        """Map each input file to its git blob SHA without reading clean files"""
+        if not patterns:
+            return {}
+        pathspecs = [f':(glob){pattern}' for pattern in patterns]
+        listing = self._git(['ls-files', '-s', '-z', '--', *pathspecs], repo_path)
+        blobs = {}
+        for record in filter(None, listing.split('\0')):
+            meta, path = record.split('\t', 1)
+            blobs[path] = meta.split()[1]
+
+        # Files changed by earlier steps are hashed from the working tree
+        status = self._git(['status', '--porcelain', '-z', '--untracked-files=all', '--', *pathspecs], repo_path)
+        dirty = [record[3:] for record in filter(None, status.split('\0')) if len(record) > 3]
+        for path in dirty:
+            if os.path.isfile(os.path.join(repo_path, path)):
+                blobs[path] = self._git(['hash-object', '--', path], repo_path).strip()
+            else:
+                blobs.pop(path, None)
+        return blobs
+
+    def _output_files(self, repo_path: str, outputs: List[str]) -> List[str]:
+        files = []
+        for output in outputs:
+            path = os.path.join(repo_path, output)
+            if os.path.isfile(path):
+                files.append(os.path.normpath(output))
+            elif os.path.isdir(path):
+                for root, _, names in os.walk(path):
+                    for name in names:
+                        full = os.path.join(root, name)
+                        if os.path.isfile(full) and not os.path.islink(full):
+                            files.append(os.path.relpath(full, repo_path))
+        return files
+
+    def _store_object(self, path: str) -> str:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            tmp_path = f"{object_path}.{os.getpid()}.tmp"
+            shutil.copyfile(path, tmp_path)
+            os.replace(tmp_path, object_path)
+        return digest
+
+    def _evict(self):
+        """Drop least recently used entries until the store fits the budget.
+
+        Entry files hold the replayed logs, so they count towards the
+        budget alongside the objects they reference.
+        """
+        with file_lock(self.lock_path):
+            objects = {}
+            for root, _, names in os.walk(self.objects_dir):
+                for name in names:
+                    if not name.endswith('.tmp'):
+                        objects[name] = os.path.getsize(os.path.join(root, name))
+
+            entries = []
+            for name in os.listdir(self.entries_dir):
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(self.entries_dir, name)
+                try:
+                    with open(path, 'r') as f:
+                        digests = {output['digest'] for output in json.load(f)['outputs']}
+                    stat = os.stat(path)
+                except (OSError, ValueError):
+                    continue
+                entries.append((stat.st_mtime, path, stat.st_size, digests))
+
+            total = sum(objects.values()) + sum(size for _, _, size, _ in entries)
+            if total <= self.max_bytes:
+                return
+            entries.sort()
+
+            refs = Counter(digest for _, _, _, digests in entries for digest in digests)
+            while entries and total > self.max_bytes:
+                _, path, size, digests = entries.pop(0)
+                os.remove(path)
+                total -= size
+                refs.subtract(digests)
+                for digest in digests:
+                    if refs[digest] <= 0 and digest in objects:
+                        total -= objects.pop(digest)
+                        os.remove(self._object_path(digest))
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.entries_dir, key + '.json')
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _git(self, args: List[str], cwd: str) -> str:
+        return subprocess.run(['git', *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
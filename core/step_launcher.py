@@ -0,0 +1,42 @@
+"""Run a step's shell and report its resource usage.
+
+Started by ``StepRunner`` as ``python -S step_launcher.py <fd> <command>``.
+On Linux a process inherits the peak RSS of the process it was forked
+from, so a shell forked straight from a large executor reports the
+executor's memory as its own. This launcher is small when it forks the
+shell, so the shell's ``ru_maxrss`` starts from a few megabytes instead.
+
+Once the shell exits, ``utime stime maxrss`` of the shell and every
+descendant it waited for is written to ``<fd>``, and the launcher exits
+the way the shell did. Only the standard library may be imported here.
+"""
+import os
+import signal
+import sys
+
+def main(report_fd: int, command: str):
+    os.set_inheritable(report_fd, False)
+    # Survive the SIGTERM sent to the step's group long enough to report
+    # how the shell ended; the shell itself keeps the default handlers
+    for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+        signal.signal(signum, signal.SIG_IGN)
+    pid = os.fork()
+    if pid == 0:
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, signal.SIG_DFL)
+        try:
+            os.execv('/bin/sh', ['/bin/sh', '-c', command])
+        finally:
+            os._exit(127)
+
+    _, status, usage = os.wait4(pid, 0)
+    with os.fdopen(report_fd, 'w') as report:
+        report.write(f"{usage.ru_utime} {usage.ru_stime} {usage.ru_maxrss}\n")
+    if os.WIFSIGNALED(status):
+        signum = os.WTERMSIG(status)
+        signal.signal(signum, signal.SIG_DFL)
+        os.kill(os.getpid(), signum)
+    os._exit(os.waitstatus_to_exitcode(status))
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]), sys.argv[2])
@@ -0,0 +1,249 @@
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Optional
+
+from config.settings import STEP_LOG_MAX_BYTES, STEP_LOG_TAIL_LINES, LOG_SPILL_DIR, STEP_KILL_GRACE, STEP_TIMEOUT
+
+# Longest chunk read as a single "line", so output without newlines stays bounded
+MAX_LINE_BYTES = 64 * 1024
+
+# Exit code of a step whose resource limits could not be applied
+LIMIT_FAILED_EXIT = 125
+
+# Forks the shell and reports its resource usage (see the module)
+LAUNCHER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'step_launcher.py')
+
+class StepResult:
+    def __init__(self, returncode: int, timed_out: bool, output_bytes: int, spill_path: Optional[str],
+                 cancelled: bool = False, started_at: datetime = None, completed_at: datetime = None,
+                 user_cpu: float = None, sys_cpu: float = None, max_rss_kb: int = None):
+        self.returncode = returncode
+        self.timed_out = timed_out
+        self.output_bytes = output_bytes
+        self.spill_path = spill_path
+        self.cancelled = cancelled
+        self.started_at = started_at
+        self.completed_at = completed_at
+        # Resource usage of the shell and every descendant it waited for
+        self.user_cpu = user_cpu
+        self.sys_cpu = sys_cpu
+        self.max_rss_kb = max_rss_kb
+
+    @property
+    def wall_seconds(self) -> Optional[float]:
+        if self.started_at is None or self.completed_at is None:
+            return None
+        return (self.completed_at - self.started_at).total_seconds()
+
+class StepRunner:
+    """Run a shell step and stream its output line by line.
+
+    Each stdout/stderr line is timestamped and handed to ``on_line`` as soon
+    as it is read. Once a step has produced ``max_bytes`` of output the rest
+    is written to a spill file instead, and only the last ``tail_lines``
+    lines are kept in memory and emitted when the step ends.
+
+    Each step runs in its own process group (session), so a timeout or
+    ``cancel()`` stops everything the shell started: the group gets SIGTERM,
+    then SIGKILL if anything is still alive after ``kill_grace`` seconds.
+    The same happens when the shell exits on its own, so background
+    processes it left behind do not outlive the step. Output of a process
+    that escaped the session (``setsid``, a daemon) is read only until the
+    step's deadline or ``cancel()``.
+    CPU and memory limits are applied with ``ulimit`` before the command.
+
+    On POSIX the shell is started by ``step_launcher``, which reaps it with
+    ``wait4`` and reports its resource usage. Forking the shell from that
+    small process rather than from the executor keeps the executor's own
+    memory out of ``max_rss_kb``, which still has a floor of the launcher's
+    few megabytes. Steps stopped with SIGKILL report no usage.
+    """
+
+    def __init__(self, on_line: Callable[[str], None], max_bytes: int = STEP_LOG_MAX_BYTES,
+                 tail_lines: int = STEP_LOG_TAIL_LINES, spill_dir: str = LOG_SPILL_DIR,
+                 kill_grace: float = STEP_KILL_GRACE):
+        self.on_line = on_line
+        self.max_bytes = max_bytes
+        self.tail_lines = tail_lines
+        self.spill_dir = spill_dir
+        self.kill_grace = kill_grace
+        self._process = None
+        self._cancelled = threading.Event()
+        self._exited = threading.Event()
+        # Set by whichever comes first: the shell exiting or cancel()
+        self._wake = threading.Event()
+        self._finished = threading.Event()
+        self._process_lock = threading.Lock()
+
+    def cancel(self):
+        """Stop the step from another thread, or keep it from starting"""
+        with self._process_lock:
+            if not self._finished.is_set():
+                self._cancelled.set()
+                self._wake.set()
+
+    def run(self, command: str, cwd: str, timeout: float = STEP_TIMEOUT, spill_name: str = 'step',
+            cpu_seconds: int = None, memory_bytes: int = None) -> StepResult:
+        self._lock = threading.Lock()
+        self._output_bytes = 0
+        self._tail = deque(maxlen=self.tail_lines)
+        self._spill = None
+        self._spill_path = None
+        self._rusage = None
+        self._detached = False
+
+        with self._process_lock:
+            if self._cancelled.is_set():
+                self._finished.set()
+                return StepResult(-1, False, 0, None, cancelled=True)
+            started_at = datetime.utcnow()
+            command = self._with_limits(command, cpu_seconds, memory_bytes)
+            report_fd = None
+            if os.name == 'posix':
+                report_fd, report_write = os.pipe()
+                launch = dict(args=[sys.executable, '-S', LAUNCHER, str(report_write), command],
+                              pass_fds=(report_write,))
+            else:
+                launch = dict(args=command, shell=True)
+            try:
+                process = self._process = subprocess.Popen(
+                    **launch,
+                    cwd=cwd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    start_new_session=True
+                )
+            except OSError:
+                if report_fd is not None:
+                    os.close(report_fd)
+                raise
+            finally:
+                if report_fd is not None:
+                    os.close(report_write)
+        readers = [
+            threading.Thread(target=self._read, args=(process.stdout, 'STDOUT', spill_name), daemon=True),
+            threading.Thread(target=self._read, args=(process.stderr, 'STDERR', spill_name), daemon=True)
+        ]
+        threading.Thread(target=self._reap, args=(process, report_fd), daemon=True).start()
+        for thread in readers:
+            thread.start()
+
+        deadline = time.monotonic() + timeout
+        self._wake.wait(timeout)
+        timed_out = not self._exited.is_set() and not self._cancelled.is_set()
+        # Also after a normal exit: whatever the shell left running in the
+        # session must not outlive the step
+        self._terminate(process)
+        # A process that left the session can hold the pipes open; wait for
+        # its output only until the deadline or a cancel()
+        for thread in readers:
+            while thread.is_alive() and not self._cancelled.is_set():
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    timed_out = True
+                    break
+                thread.join(min(left, 0.1))
+        completed_at = datetime.utcnow()
+        with self._lock:
+            # Readers still blocked on the pipes drop whatever comes later
+            self._detached = True
+            self._finished.set()
+
+        if self._spill:
+            self._spill.close()
+            self.on_line(f"[{datetime.now()}] Output exceeded {self.max_bytes} bytes, "
+                         f"{self._output_bytes} bytes written to {self._spill_path}; last {len(self._tail)} lines:")
+            for line in self._tail:
+                self.on_line(line)
+
+        result = StepResult(process.returncode, timed_out, self._output_bytes, self._spill_path,
+                            cancelled=self._cancelled.is_set(), started_at=started_at, completed_at=completed_at)
+        if self._rusage:
+            user_cpu, sys_cpu, max_rss = self._rusage
+            result.user_cpu = round(user_cpu, 3)
+            result.sys_cpu = round(sys_cpu, 3)
+            # ru_maxrss is in kilobytes, except on macOS where it is bytes
+            result.max_rss_kb = max_rss // 1024 if sys.platform == 'darwin' else max_rss
+        return result
+
+    def _with_limits(self, command: str, cpu_seconds: Optional[int], memory_bytes: Optional[int]) -> str:
+        """Prefix ``command`` with ulimit calls; children inherit the limits"""
+        limits = []
+        if cpu_seconds:
+            limits.append(f"ulimit -t {int(cpu_seconds)}")
+        if memory_bytes:
+            # The data limit covers heap and private mappings without
+            # counting the address space runtimes merely reserve
+            limits.append(f"ulimit -d {max(1, memory_bytes // 1024)}")
+        if not limits or os.name != 'posix':
+            return command
+        return f"{' && '.join(limits)} || exit {LIMIT_FAILED_EXIT}\n{command}"
+
+    def _reap(self, process: subprocess.Popen, report_fd: Optional[int]):
+        """Wait for the launcher and keep the usage it reports"""
+        try:
+            process.wait()
+            if report_fd is not None:
+                with os.fdopen(report_fd) as report:
+                    fields = report.read().split()
+                if len(fields) == 3:
+                    self._rusage = (float(fields[0]), float(fields[1]), int(fields[2]))
+        finally:
+            self._exited.set()
+            self._wake.set()
+
+    def _terminate(self, process: subprocess.Popen):
+        """SIGTERM the step's process group, SIGKILL whatever outlives the grace period"""
+        if not hasattr(os, 'killpg'):
+            # No process groups on Windows; only the shell can be stopped
+            if not self._exited.is_set():
+                process.kill()
+            self._exited.wait()
+            return
+        if not self._signal_group(process.pid, signal.SIGTERM):
+            self._exited.wait()
+            return
+        deadline = time.monotonic() + self.kill_grace
+        while time.monotonic() < deadline:
+            # A zombie leader keeps the group alive until it is reaped
+            if not self._signal_group(process.pid, 0):
+                self._exited.wait()
+                return
+            time.sleep(0.1)
+        self._signal_group(process.pid, signal.SIGKILL)
+        self._exited.wait()
+
+    def _signal_group(self, pgid: int, signum: int) -> bool:
+        """Signal a process group; False once none of its processes are left"""
+        try:
+            os.killpg(pgid, signum)
+            return True
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            # A process changed its credentials; the group still exists
+            return True
+
+    def _read(self, pipe, label: str, spill_name: str):
+        with pipe:
+            for raw in iter(lambda: pipe.readline(MAX_LINE_BYTES), b''):
+                line = f"[{datetime.now()}] {label}: {raw.decode('utf-8', errors='replace').rstrip()}"
+                with self._lock:
+                    if self._detached:
+                        return
+                    self._output_bytes += len(raw)
+                    if self._output_bytes <= self.max_bytes:
+                        self.on_line(line)
+                        continue
+                    if self._spill is None:
+                        os.makedirs(self.spill_dir, exist_ok=True)
+                        self._spill_path = os.path.join(self.spill_dir, f"{spill_name}.log")
+                        self._spill = open(self._spill_path, 'w', encoding='utf-8')
+                    self._spill.write(line + '\n')
+                    self._tail.append(line)
@@ -1,25 +1,82 @@
+import gzip
 import json
 import hmac
 import hashlib
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
 
-from config.settings import WEBHOOK_PORT, WEBHOOK_PATH, GITHUB_SECRET
+from config.settings import (WEBHOOK_PORT, WEBHOOK_PATH, GITHUB_SECRET, WEBHOOK_MAX_BODY_BYTES,
+                             API_PREFIX, API_CORS_ORIGIN, API_GZIP_MIN_BYTES, LOG_STREAM_KEEPALIVE)
+from core.delivery_cache import DeliveryCache
+from core.job_ingest import JobIngest
+from core.jobs_api import JobsApi
+from core.log_hub import LogHub
 from models.job import Job
 
+# Seconds clients are asked to wait when the ingest buffer is full
+RETRY_AFTER = 5
+
+# GET /api/jobs/<id>/logs/stream serves a job's log as Server-Sent Events
+STREAM_PREFIX = API_PREFIX + '/jobs/'
+STREAM_SUFFIX = '/logs/stream'
+# Milliseconds EventSource waits before reconnecting
+STREAM_RETRY_MS = 3000
+
+class WebhookServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Pending connections the kernel keeps during a burst (the default is 5)
+    request_queue_size = 128
+
 class WebhookHandler(BaseHTTPRequestHandler):
-    def __init__(self, *args, job_queue = None, **kwargs):
-        if job_queue is None:
-            try:
-                from shared_queue import job_queue as shared_queue
-                self.job_queue = shared_queue
-            except ImportError:
-                from core.job_queue import JobQueue
-                self.job_queue = JobQueue()
-        else:
-            self.job_queue = job_queue
+    def __init__(self, *args, ingest: JobIngest = None, deliveries: DeliveryCache = None,
+                 api: JobsApi = None, hub: LogHub = None, **kwargs):
+        self.ingest = ingest
+        self.deliveries = deliveries
+        self.api = api
+        self.hub = hub
         super().__init__(*args, **kwargs)
     
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if self.api is None or not (parsed.path + '/').startswith(API_PREFIX + '/'):
+            self.send_response(404)
+            self.end_headers()
+            return
+        
+        if parsed.path.startswith(STREAM_PREFIX) and parsed.path.endswith(STREAM_SUFFIX):
+            job_id = parsed.path[len(STREAM_PREFIX):-len(STREAM_SUFFIX)]
+            # EventSource resends the last event ID, which is the next line to send
+            offset = self.headers.get('Last-Event-ID') or parse_qs(parsed.query).get('offset', ['0'])[0]
+            if not offset.isdigit():
+                self._respond(400, {'error': 'offset must be a line number'})
+                return
+            self._stream_logs(job_id, int(offset))
+            return
+        
+        code, body, etag = self.api.get(parsed.path, parse_qs(parsed.query), self.headers.get('If-None-Match'))
+        data = json.dumps(body).encode() if body is not None else b''
+        gzipped = len(data) >= API_GZIP_MIN_BYTES and 'gzip' in self.headers.get('Accept-Encoding', '')
+        if gzipped:
+            data = gzip.compress(data, compresslevel=6, mtime=0)
+        
+        self.send_response(code)
+        if API_CORS_ORIGIN:
+            self.send_header('Access-Control-Allow-Origin', API_CORS_ORIGIN)
+            self.send_header('Access-Control-Expose-Headers', 'ETag')
+        if code in (200, 304):
+            # Browsers revalidate with If-None-Match instead of reusing blindly
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        if code != 304:
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            if gzipped:
+                self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        if code != 304:
+            self.wfile.write(data)
+    
     def do_POST(self):
         if self.path != WEBHOOK_PATH:
             self.send_response(404)
@@ -27,6 +84,10 @@ class WebhookHandler(BaseHTTPRequestHandler):
             return
         
         content_length = int(self.headers.get('Content-Length', 0))
+        if content_length > WEBHOOK_MAX_BODY_BYTES:
+            self.send_response(413)
+            self.end_headers()
+            return
         body = self.rfile.read(content_length)
         
         # Verify GitHub signature if secret is configured
@@ -37,25 +98,84 @@ class WebhookHandler(BaseHTTPRequestHandler):
         
         try:
             payload = json.loads(body.decode('utf-8'))
-            print(f"DEBUG: Received payload: {payload}")
-            
-            if self._is_push_event(payload):
-                print("DEBUG: Is push event - creating job")
-                job = self._create_job_from_payload(payload)
-                job_id = self.job_queue.add_job(job)
-                print(f"Job {job_id} queued for {job.repo_url}@{job.commit_sha}")
-            else:
-                print("DEBUG: Not a push event, ignoring")
-            
+            if not self._is_push_event(payload):
+                self._respond(200, {'status': 'ignored'})
+                return
+            job = self._create_job_from_payload(payload)
+        except (ValueError, KeyError, AttributeError) as e:
+            print(f"Webhook error: {e}")
+            self._respond(400, {'status': 'invalid payload'})
+            return
+        
+        # Redeliveries reuse the delivery ID; only accepted ones are remembered
+        delivery_id = self.headers.get('X-GitHub-Delivery')
+        if delivery_id and not self.deliveries.claim(delivery_id):
+            self._respond(200, {'status': 'duplicate'})
+            return
+        
+        # Storage is written in the background; only answer from memory here
+        if not self.ingest.healthy:
+            self._reject(delivery_id, 503, 'storage unavailable')
+        elif not self.ingest.offer(job):
+            self._reject(delivery_id, 429, 'queue full')
+        else:
+            self._respond(202, {'status': 'accepted'})
+    
+    def _reject(self, delivery_id: str, code: int, status: str):
+        # GitHub's redelivery of a rejected push must not count as a duplicate
+        if delivery_id:
+            self.deliveries.release(delivery_id)
+        self._respond(code, {'status': status}, retry_after=RETRY_AFTER)
+    
+    def _stream_logs(self, job_id: str, offset: int):
+        tail = self.hub.subscribe(job_id, offset)
+        try:
+            if not tail.exists(timeout=LOG_STREAM_KEEPALIVE):
+                self._respond(404, {'error': f'job {job_id} not found'})
+                return
             self.send_response(200)
-            self.send_header('Content-type', 'application/json')
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            # Keep reverse proxies from buffering the stream
+            self.send_header('X-Accel-Buffering', 'no')
+            if API_CORS_ORIGIN:
+                self.send_header('Access-Control-Allow-Origin', API_CORS_ORIGIN)
             self.end_headers()
-            self.wfile.write(b'{"status": "ok"}')
+            self.wfile.write(f"retry: {STREAM_RETRY_MS}\n\n".encode())
             
-        except Exception as e:
-            print(f"Webhook error: {e}")
-            self.send_response(500)
-            self.end_headers()
+            while True:
+                lines, complete = tail.wait(offset, LOG_STREAM_KEEPALIVE)
+                if lines:
+                    events = []
+                    for line in lines:
+                        offset += 1
+                        data = ''.join(f"data: {part}\n" for part in line.split('\n'))
+                        events.append(f"id: {offset}\n{data}\n")
+                    self.wfile.write(''.join(events).encode())
+                elif complete:
+                    self.wfile.write(f"event: end\ndata: {json.dumps({'status': tail.status})}\n\n".encode())
+                    return
+                else:
+                    self.wfile.write(b": keepalive\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The viewer went away
+            pass
+        finally:
+            self.hub.unsubscribe(tail, offset)
+    
+    def _respond(self, code: int, body: dict, retry_after: int = None):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        if retry_after:
+            self.send_header('Retry-After', str(retry_after))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, format, *args):
+        # A line per delivery is noise during push bursts; errors still print
+        pass
     
     def _verify_signature(self, body: bytes) -> bool:
         signature = self.headers.get('X-Hub-Signature-256', '')
@@ -86,15 +206,32 @@ class WebhookListener:
                 from shared_queue import job_queue as shared_queue
                 self.job_queue = shared_queue
             except ImportError:
-                from core.job_queue import JobQueue
-                self.job_queue = JobQueue()
+                from core.job_queue import create_job_queue
+                self.job_queue = create_job_queue()
         else:
             self.job_queue = job_queue
+        self.ingest = JobIngest(self.job_queue)
+        self.deliveries = DeliveryCache()
+        self.api = JobsApi(self.job_queue)
+        self.hub = LogHub(self.job_queue)
+        self.server = None
     
     def start(self):
         def handler(*args, **kwargs):
-            return WebhookHandler(*args, job_queue=self.job_queue, **kwargs)
+            return WebhookHandler(*args, ingest=self.ingest, deliveries=self.deliveries,
+                                  api=self.api, hub=self.hub, **kwargs)
         
-        server = HTTPServer(('', WEBHOOK_PORT), handler)
+        self.ingest.start()
+        self.server = WebhookServer(('', WEBHOOK_PORT), handler)
         print(f"Webhook listener started on port {WEBHOOK_PORT}")
-        server.serve_forever()
\ No newline at end of file
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            self.ingest.close()
+    
+    def stop(self):
+        """Stop accepting deliveries and store the ones already accepted"""
+        if self.server:
+            self.server.shutdown()
+        self.ingest.close()
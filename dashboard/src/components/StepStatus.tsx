@@ -1,6 +1,6 @@
 import React from 'react';
 import { motion } from 'framer-motion';
-import { Play, CheckCircle, XCircle, Clock, Terminal } from 'lucide-react';
+import { Play, CheckCircle, XCircle, Clock, Terminal, Ban } from 'lucide-react';
 import { PipelineStep } from '../types';
 
 interface StepStatusProps {
@@ -22,6 +22,8 @@ const StepStatus: React.FC<StepStatusProps> = ({ step, isExpanded, onToggle, ste
         return <CheckCircle className={`${iconClass} text-white drop-shadow-lg`} />;
       case 'failed':
         return <XCircle className={`${iconClass} text-white drop-shadow-lg`} />;
+      case 'cancelled':
+        return <Ban className={`${iconClass} text-white drop-shadow-lg`} />;
       default:
         return <Clock className={`${iconClass} text-gray-600`} />;
     }
@@ -37,6 +39,8 @@ const StepStatus: React.FC<StepStatusProps> = ({ step, isExpanded, onToggle, ste
         return 'status-success';
       case 'failed':
         return 'status-failed';
+      case 'cancelled':
+        return 'status-cancelled';
       default:
         return 'bg-gray-100';
     }
@@ -50,6 +54,12 @@ const StepStatus: React.FC<StepStatusProps> = ({ step, isExpanded, onToggle, ste
     return `${duration}s`;
   };
 
+  const formatUsage = () => {
+    if (step.max_rss_kb === undefined) return '';
+    const cpu = (step.user_cpu_seconds ?? 0) + (step.sys_cpu_seconds ?? 0);
+    return `${cpu.toFixed(1)}s CPU · ${(step.max_rss_kb / 1024).toFixed(0)} MB`;
+  };
+
   return (
     <motion.div
       initial={{ opacity: 0, x: -20 }}
@@ -104,6 +114,12 @@ const StepStatus: React.FC<StepStatusProps> = ({ step, isExpanded, onToggle, ste
               </div>
             )}
             
+            {formatUsage() && (
+              <div className="text-sm text-white bg-[#065084] px-3 py-1 rounded-full font-mono font-semibold">
+                {formatUsage()}
+              </div>
+            )}
+            
             {/* Expand/collapse indicator */}
             <motion.div
               animate={{ rotate: isExpanded ? 180 : 0 }}
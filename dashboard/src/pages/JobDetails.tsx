@@ -1,9 +1,9 @@
 import React, { useState, useEffect } from 'react';
 import { useParams } from 'react-router-dom';
 import { motion } from 'framer-motion';
-import { GitBranch, Clock, Play, CheckCircle, XCircle, AlertCircle, ArrowLeft } from 'lucide-react';
+import { GitBranch, Clock, Play, CheckCircle, XCircle, AlertCircle, ArrowLeft, SkipForward, Ban } from 'lucide-react';
 import { Job } from '../types';
-import { mockData } from '../services/api';
+import { jobsApi } from '../services/api';
 import StepStatus from '../components/StepStatus';
 import LogViewer from '../components/LogViewer';
 
@@ -12,29 +12,48 @@ const JobDetails: React.FC = () => {
   const [job, setJob] = useState<Job | null>(null);
   const [expandedSteps, setExpandedSteps] = useState<Set<string>>(new Set());
   const [loading, setLoading] = useState(true);
+  const [liveLogs, setLiveLogs] = useState<string[]>([]);
 
-  useEffect(() => {
-    const fetchJob = async () => {
-      setLoading(true);
-      try {
-        setJob(mockData.jobDetails);
-      } catch (error) {
-        console.error('Failed to fetch job:', error);
-      } finally {
-        setLoading(false);
+  const isActive = job?.status === 'queued' || job?.status === 'running';
+
+  const fetchJob = async (withLogs = true) => {
+    if (!jobId) return;
+    try {
+      let next = await jobsApi.getJob(jobId, withLogs);
+      // A job that finished since the last poll shows its stored log
+      if (!withLogs && next.status !== 'queued' && next.status !== 'running') {
+        next = await jobsApi.getJob(jobId);
       }
-    };
+      setJob(next);
+    } catch (error) {
+      console.error('Failed to fetch job:', error);
+    } finally {
+      setLoading(false);
+    }
+  };
 
+  useEffect(() => {
+    setLoading(true);
     fetchJob();
+  }, [jobId]);
 
-    const interval = setInterval(() => {
-      if (job?.status === 'running') {
-        fetchJob();
-      }
-    }, 2000);
+  // Log lines arrive over the stream; step states are still polled
+  useEffect(() => {
+    if (!jobId || !isActive) return;
+    setLiveLogs([]);
+    const closeStream = jobsApi.streamLogs(
+      jobId,
+      0,
+      (line) => setLiveLogs((lines) => [...lines, line]),
+      () => fetchJob(),
+    );
+    const interval = setInterval(() => fetchJob(false), 5000);
 
-    return () => clearInterval(interval);
-  }, [jobId, job?.status]);
+    return () => {
+      closeStream();
+      clearInterval(interval);
+    };
+  }, [jobId, isActive]);
 
   const toggleStepExpansion = (stepName: string) => {
     const newExpanded = new Set(expandedSteps);
@@ -53,6 +72,8 @@ const JobDetails: React.FC = () => {
       case 'running': return <Play className={`${iconClass} animate-pulse`} />;
       case 'done': return <CheckCircle className={iconClass} />;
       case 'failed': return <XCircle className={iconClass} />;
+      case 'skipped': return <SkipForward className={iconClass} />;
+      case 'cancelled': return <Ban className={iconClass} />;
       default: return <AlertCircle className={iconClass} />;
     }
   };
@@ -63,6 +84,8 @@ const JobDetails: React.FC = () => {
       case 'running': return 'status-running';
       case 'done': return 'status-success';
       case 'failed': return 'status-failed';
+      case 'skipped': return 'status-skipped';
+      case 'cancelled': return 'status-cancelled';
       default: return 'bg-gray-100';
     }
   };
@@ -244,8 +267,8 @@ const JobDetails: React.FC = () => {
                 Execution Logs
               </h2>
               <LogViewer
-                logs={job.logs}
-                isLive={job.status === 'running'}
+                logs={isActive ? liveLogs : job.logs}
+                isLive={isActive}
                 title="Job Execution Logs"
               />
             </motion.div>
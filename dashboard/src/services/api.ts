@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { Job, JobSummary } from '../types';
+import { Job, JobFilters, JobPage, JobSummary } from '../types';
 
 const API_BASE_URL = 'http://localhost:8080/api';
 
@@ -9,15 +9,18 @@ const api = axios.create({
 });
 
 export const jobsApi = {
-  // Get all jobs
-  getJobs: async (): Promise<JobSummary[]> => {
-    const response = await api.get('/jobs');
+  // Get a page of jobs, newest first; pass next_cursor back for the next page
+  getJobs: async (filters: JobFilters = {}): Promise<JobPage> => {
+    const { status, ...params } = filters;
+    const response = await api.get('/jobs', {
+      params: { ...params, status: status?.join(',') },
+    });
     return response.data;
   },
 
-  // Get specific job details
-  getJob: async (jobId: string): Promise<Job> => {
-    const response = await api.get(`/jobs/${jobId}`);
+  // Get specific job details; without `logs` the job's log is left out
+  getJob: async (jobId: string, logs = true): Promise<Job> => {
+    const response = await api.get(`/jobs/${jobId}`, { params: logs ? {} : { logs: 0 } });
     return response.data;
   },
 
@@ -26,6 +29,23 @@ export const jobsApi = {
     const response = await api.get(`/jobs/${jobId}/logs`);
     return response.data;
   },
+
+  // Stream job log lines from `offset` as they are written; returns a function
+  // that closes the stream. EventSource resumes from the last line it saw.
+  streamLogs: (
+    jobId: string,
+    offset: number,
+    onLine: (line: string) => void,
+    onEnd: (status: Job['status']) => void,
+  ): (() => void) => {
+    const source = new EventSource(`${API_BASE_URL}/jobs/${jobId}/logs/stream?offset=${offset}`);
+    source.onmessage = (event) => onLine(event.data);
+    source.addEventListener('end', (event) => {
+      source.close();
+      onEnd(JSON.parse((event as MessageEvent).data).status);
+    });
+    return () => source.close();
+  },
 };
 
 // Mock data for development
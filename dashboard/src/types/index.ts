@@ -3,7 +3,7 @@ export interface Job {
   repo_url: string;
   branch: string;
   commit_sha: string;
-  status: 'queued' | 'running' | 'done' | 'failed';
+  status: 'queued' | 'running' | 'done' | 'failed' | 'skipped' | 'cancelled';
   created_at: string;
   started_at?: string;
   completed_at?: string;
@@ -14,17 +14,41 @@ export interface Job {
 export interface PipelineStep {
   name: string;
   run: string;
-  status: 'pending' | 'running' | 'success' | 'failed';
+  status: 'pending' | 'running' | 'success' | 'failed' | 'cancelled';
   logs: string[];
   started_at?: string;
   completed_at?: string;
+  wall_seconds?: number;
+  user_cpu_seconds?: number;
+  sys_cpu_seconds?: number;
+  max_rss_kb?: number;
+  exit_code?: number;
+  cache?: 'hit' | 'miss';
 }
 
 export interface JobSummary {
   id: string;
   repo_name: string;
+  repo_url?: string;
   branch: string;
+  commit_sha?: string;
+  short_sha?: string;
   status: Job['status'];
   created_at: string;
-  duration?: number;
+  started_at?: string | null;
+  completed_at?: string | null;
+  duration?: number | null;
+}
+
+export interface JobPage {
+  jobs: JobSummary[];
+  next_cursor: string | null;
+}
+
+export interface JobFilters {
+  status?: Job['status'][];
+  repo?: string;
+  branch?: string;
+  limit?: number;
+  cursor?: string;
 }
\ No newline at end of file
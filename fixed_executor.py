@@ -2,15 +2,19 @@
 import subprocess
 import os
 import shutil
+import socket
 from datetime import datetime
 from shared_queue import job_queue
+from core.executor import LeaseHeartbeat
 from models.job import JobStatus
 
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:fixed"
+
 def execute_single_job():
     """Execute one job from the queue"""
     
     # Get next job
-    job_data = job_queue.get_next_job()
+    job_data = job_queue.get_next_job(worker_id=WORKER_ID)
     if not job_data:
         print("No jobs in queue")
         return
@@ -18,6 +22,11 @@ def execute_single_job():
     job_id, job = job_data
     print(f"Processing job {job_id}")
     
+    with LeaseHeartbeat(job_queue, job_id, WORKER_ID):
+        return run_job(job_id, job)
+
+def run_job(job_id, job):
+    """Run the fixed pipeline for a claimed job"""
     logs = []
     
     try:
@@ -66,19 +75,19 @@ def execute_single_job():
             
             if result.returncode != 0:
                 logs.append(f"[{datetime.now()}] Step failed with exit code {result.returncode}")
-                job_queue.update_job_status(job_id, JobStatus.FAILED, logs)
+                job_queue.update_job_status(job_id, JobStatus.FAILED, logs, worker_id=WORKER_ID)
                 return False
             
             logs.append(f"[{datetime.now()}] Step {step['name']} completed successfully")
         
         logs.append(f"[{datetime.now()}] All steps completed successfully")
-        job_queue.update_job_status(job_id, JobStatus.DONE, logs)
+        job_queue.update_job_status(job_id, JobStatus.DONE, logs, worker_id=WORKER_ID)
         print(f"Job {job_id} completed successfully!")
         return True
         
     except Exception as e:
         logs.append(f"[{datetime.now()}] Job failed: {str(e)}")
-        job_queue.update_job_status(job_id, JobStatus.FAILED, logs)
+        job_queue.update_job_status(job_id, JobStatus.FAILED, logs, worker_id=WORKER_ID)
         print(f"Job {job_id} failed: {e}")
         return False
 
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+# Import OSV advisory exports into the offline vulnerability database, e.g.
+# https://osv-vulnerabilities.storage.googleapis.com/PyPI/all.zip
+import sys
+from core.advisory_db import AdvisoryDB
+
+def import_advisories(paths):
+    db = AdvisoryDB()
+    count = db.import_osv(paths)
+    print(f"Imported {count} advisories into {db.db_path}")
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: import_advisories.py <osv .json/.zip file or directory>...")
+        sys.exit(1)
+    import_advisories(sys.argv[1:])
@@ -7,6 +7,8 @@ class JobStatus(Enum):
     RUNNING = "running"
     DONE = "done"
     FAILED = "failed"
+    SKIPPED = "skipped"
+    CANCELLED = "cancelled"
 
 class Job:
     def __init__(self, repo_url: str, commit_sha: str, branch: str = "main"):
@@ -19,6 +21,9 @@ class Job:
         self.completed_at: Optional[datetime] = None
         self.logs: List[str] = []
         self.steps: List[Dict] = []
+        self.worker_id: Optional[str] = None
+        self.lease_expires_at: Optional[datetime] = None
+        self.cancel_requested = False
         
     def to_dict(self) -> Dict:
         return {
@@ -30,7 +35,10 @@ class Job:
             'started_at': self.started_at,
             'completed_at': self.completed_at,
             'logs': self.logs,
-            'steps': self.steps
+            'steps': self.steps,
+            'worker_id': self.worker_id,
+            'lease_expires_at': self.lease_expires_at,
+            'cancel_requested': self.cancel_requested
         }
     
     @classmethod
@@ -42,4 +50,7 @@ class Job:
         job.completed_at = data.get('completed_at')
         job.logs = data.get('logs', [])
         job.steps = data.get('steps', [])
+        job.worker_id = data.get('worker_id')
+        job.lease_expires_at = data.get('lease_expires_at')
+        job.cancel_requested = data.get('cancel_requested', False)
         return job
\ No newline at end of file
@@ -1,5 +1,5 @@
 # Shared job queue instance
-from core.file_queue import FileJobQueue
+from core.job_queue import create_job_queue
 
-# Global shared instance with file persistence
-job_queue = FileJobQueue()
\ No newline at end of file
+# Global shared instance, backend selected by QUEUE_BACKEND
+job_queue = create_job_queue()
@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 import sys
+from datetime import datetime
 from shared_queue import job_queue
 
 def show_jobs(limit=10):
-    jobs = job_queue.list_jobs(limit)
+    jobs = job_queue.list_summaries(limit)
     
     if not jobs:
         print("No jobs found.")
@@ -12,21 +13,30 @@ def show_jobs(limit=10):
     print(f"\nRecent Jobs (showing {len(jobs)} of {limit})")
     print("=" * 60)
     
-    for job_id, job in jobs:
+    for job in jobs:
         status_symbol = {
             'queued': '[QUEUED]',
             'running': '[RUNNING]',
             'done': '[DONE]',
-            'failed': '[FAILED]'
-        }.get(job.status.value, '[UNKNOWN]')
+            'failed': '[FAILED]',
+            'skipped': '[SKIPPED]',
+            'cancelled': '[CANCELLED]'
+        }.get(job['status'], '[UNKNOWN]')
+        created_at = datetime.fromisoformat(job['created_at'])
         
-        print(f"{status_symbol} {job_id} | {job.repo_url}")
-        print(f"   Branch: {job.branch} | Commit: {job.commit_sha[:8]}")
-        print(f"   Created: {job.created_at.strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"{status_symbol} {job['id']} | {job['repo_url']}")
+        print(f"   Branch: {job['branch']} | Commit: {job['short_sha']}")
+        if job['duration'] is not None:
+            print(f"   Created: {created_at.strftime('%Y-%m-%d %H:%M:%S')} | Duration: {job['duration']}s")
+        else:
+            print(f"   Created: {created_at.strftime('%Y-%m-%d %H:%M:%S')}")
         print()
 
-def show_logs(job_id):
-    job = job_queue.get_job(job_id)
+# Log lines read per call when printing a whole log
+LOG_PAGE_LINES = 1000
+
+def show_logs(job_id, tail=None):
+    job = job_queue.get_job(job_id, logs=False)
     
     if not job:
         print(f"Job {job_id} not found.")
@@ -38,17 +48,41 @@ def show_logs(job_id):
     print(f"Status: {job.status.value}")
     print("-" * 60)
     
-    if job.logs:
-        for log in job.logs:
+    # Read page by page so a huge log is never held in memory at once
+    start = -tail if tail else 0
+    printed = 0
+    while True:
+        lines = job_queue.read_logs(job_id, start, None if tail else start + LOG_PAGE_LINES) or []
+        for log in lines:
             print(log)
-    else:
+        printed += len(lines)
+        if tail or len(lines) < LOG_PAGE_LINES:
+            break
+        start += len(lines)
+    
+    if not printed:
         print("No logs available.")
 
+def cancel_job(job_id):
+    job = job_queue.get_job(job_id)
+    
+    if not job:
+        print(f"Job {job_id} not found.")
+        return
+    
+    if not job_queue.cancel_job(job_id):
+        print(f"Job {job_id} is already {job.status.value}.")
+    elif job.status.value == 'running':
+        print(f"Cancellation requested, job {job_id} stops within a few seconds.")
+    else:
+        print(f"Job {job_id} cancelled.")
+
 def main():
     if len(sys.argv) < 2:
         print("Usage:")
         print("  python simple_dashboard.py jobs [limit]")
-        print("  python simple_dashboard.py logs <job_id>")
+        print("  python simple_dashboard.py logs <job_id> [last_n_lines]")
+        print("  python simple_dashboard.py cancel <job_id>")
         sys.exit(1)
     
     command = sys.argv[1]
@@ -61,7 +95,13 @@ def main():
             print("Please provide job ID")
             sys.exit(1)
         job_id = sys.argv[2]
-        show_logs(job_id)
+        tail = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        show_logs(job_id, tail)
+    elif command == "cancel":
+        if len(sys.argv) < 3:
+            print("Please provide job ID")
+            sys.exit(1)
+        cancel_job(sys.argv[2])
     else:
         print(f"Unknown command: {command}")
 
@@ -10,11 +10,8 @@ def start_full_server():
     print("Starting CI/CD Pipeline Server...")
     
     # Start webhook listener in background
-    def webhook_worker():
-        listener = WebhookListener(job_queue)
-        listener.start()
-    
-    webhook_thread = threading.Thread(target=webhook_worker, daemon=True)
+    listener = WebhookListener(job_queue)
+    webhook_thread = threading.Thread(target=listener.start, daemon=True)
     webhook_thread.start()
     
     print("Webhook listener: http://localhost:8080/webhook")
@@ -30,6 +27,9 @@ def start_full_server():
         executor.run_worker()
     except KeyboardInterrupt:
         print("\nServer stopped!")
+    finally:
+        # Store webhook deliveries that were accepted but not yet written
+        listener.stop()
 
 if __name__ == "__main__":
     start_full_server()
\ No newline at end of file
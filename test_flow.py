@@ -28,12 +28,17 @@ def test_complete_flow():
     
     # 3. Start executor in background
     print("3. Starting executor...")
-    def run_executor():
-        from core.executor import PipelineExecutor
-        executor = PipelineExecutor()
-        executor.execute_job(job_id, job)
+    from core.executor import PipelineExecutor
+    executor = PipelineExecutor()
+    # Only the worker holding a job's lease can record its results
+    claimed = job_queue.get_next_job(worker_id=executor.worker_id)
+    if not claimed:
+        print("   No queued job to claim")
+        return "unknown"
+    job_id, job = claimed
+    print(f"   Claimed job: {job_id}")
     
-    executor_thread = threading.Thread(target=run_executor)
+    executor_thread = threading.Thread(target=executor.execute_job, args=(job_id, job))
     executor_thread.start()
     
     # 4. Wait and check results
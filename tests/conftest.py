@@ -0,0 +1,34 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Tests import the project's packages from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep default work directories out of the checkout; settings read these on import
+_scratch = tempfile.mkdtemp(prefix='cicd-tests-')
+for _name, _path in (('WORKSPACE_DIR', 'workspace'), ('LOG_DIR', 'logs/jobs'), ('LOG_SPILL_DIR', 'logs/spill'),
+                     ('STEP_CACHE_DIR', 'cache/steps'), ('QUEUE_NOTIFY_DIR', 'notify'),
+                     ('JOBS_FILE', 'jobs.json'), ('ADVISORY_DB_PATH', 'advisories.db')):
+    os.environ.setdefault(_name, os.path.join(_scratch, _path))
+
+# Imported once the environment above is in place
+from core.file_queue import FileJobQueue
+from core.sqlite_queue import SQLiteJobQueue
+
+@pytest.fixture(params=['file', 'sqlite'])
+def open_queue(request, tmp_path):
+    """Opens the job queue kept in ``tmp_path``, once per backend. Every
+    call returns another handle on the same jobs, as a second process would"""
+    def open_queue(**kwargs):
+        if request.param == 'file':
+            return FileJobQueue(str(tmp_path / 'jobs.json'), notify_dir=str(tmp_path / 'notify'),
+                                log_dir=str(tmp_path / 'logs'), **kwargs)
+        return SQLiteJobQueue(str(tmp_path / 'jobs.db'), notify_dir=str(tmp_path / 'notify'), **kwargs)
+    return open_queue
+
+@pytest.fixture
+def queue(open_queue):
+    return open_queue()
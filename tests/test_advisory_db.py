@@ -0,0 +1,28 @@
+import json
+
+from core.advisory_db import AdvisoryDB, version_key
+
+def test_version_key_orders_releases():
+    ordered = ['1.0.dev1', '1.0a1', '1.0b2', '1.0rc1', '1.0', '1.0.post1', '1.0.1', '1.2', '1.10']
+    assert sorted(ordered, key=version_key) == ordered
+    assert version_key('v1.2.0') == version_key('1.2')
+    assert version_key('1.2.0+local') == version_key('1.2')
+    assert version_key('2.0.0-canary.1') < version_key('2.0.0')
+    assert version_key('not a version') < version_key('0.0.1')
+
+def test_find_vulnerable_within_ranges(tmp_path):
+    export = tmp_path / 'osv.json'
+    export.write_text(json.dumps([{
+        'id': 'GHSA-1', 'summary': 'bad', 'database_specific': {'severity': 'HIGH'},
+        'affected': [{'package': {'ecosystem': 'PyPI', 'name': 'Django'},
+                      'ranges': [{'type': 'ECOSYSTEM', 'events': [{'introduced': '3.0'}, {'fixed': '3.2.4'}]}]}]
+    }]))
+    db = AdvisoryDB(str(tmp_path / 'advisories.db'))
+    assert db.import_osv([str(export)]) == 1
+
+    vulnerable = ('PyPI', 'django', '3.2.3')
+    fixed = ('PyPI', 'django', '3.2.4')
+    older = ('PyPI', 'django', '2.2')
+    matches = db.find_vulnerable([vulnerable, fixed, older])
+    assert [(dependency, advisory['id'], advisory['severity']) for dependency, advisory in matches] == \
+        [(vulnerable, 'GHSA-1', 'HIGH')]
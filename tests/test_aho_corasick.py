@@ -0,0 +1,25 @@
+import random
+
+from core.aho_corasick import AhoCorasick
+
+def _first_matches(literals, text):
+    found = {index: text.find(literal) for index, literal in enumerate(literals)}
+    return {index: pos for index, pos in found.items() if pos >= 0}
+
+def test_overlapping_literals():
+    literals = ['he', 'she', 'his', 'hers', 'e']
+    automaton = AhoCorasick(literals)
+    for text in ('ushers', 'hishe', 'h', '', 'sheshe'):
+        assert automaton.first_matches(text) == _first_matches(literals, text)
+
+def test_agrees_with_str_find():
+    rng = random.Random(7)
+    literals = ['rm -rf /', 'sudo', 'curl | sh', 'eval', 'exec', 'system(', 'shell_exec', 'ab', 'aab', 'b']
+    automaton = AhoCorasick(literals)
+    alphabet = 'abcdehlorsuvx(|/ -_'
+    for _ in range(500):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 60)))
+        if rng.random() < 0.5:
+            pos = rng.randint(0, len(text))
+            text = text[:pos] + rng.choice(literals) + text[pos:]
+        assert automaton.first_matches(text) == _first_matches(literals, text), text
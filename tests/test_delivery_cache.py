@@ -0,0 +1,27 @@
+from core import delivery_cache
+from core.delivery_cache import DeliveryCache
+
+def test_duplicate_within_ttl_is_rejected(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(delivery_cache.time, 'monotonic', lambda: now[0])
+    cache = DeliveryCache(ttl=60, max_entries=10)
+    assert cache.claim('d1')
+    assert not cache.claim('d1')
+
+    now[0] += 61
+    assert cache.claim('d1')
+    assert len(cache) == 1
+
+def test_released_delivery_can_be_retried():
+    cache = DeliveryCache(ttl=60, max_entries=10)
+    assert cache.claim('d1')
+    cache.release('d1')
+    assert cache.claim('d1')
+
+def test_oldest_delivery_is_evicted_past_max_entries():
+    cache = DeliveryCache(ttl=60, max_entries=2)
+    for delivery_id in ('d1', 'd2', 'd3'):
+        assert cache.claim(delivery_id)
+    assert len(cache) == 2
+    assert cache.claim('d1')
+    assert not cache.claim('d3')
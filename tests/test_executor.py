@@ -0,0 +1,110 @@
+import time
+
+import pytest
+
+from core.executor import LeaseHeartbeat, LeaseReaper, PipelineExecutor
+from models.job import Job, JobStatus
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+def test_lost_lease_stops_the_job(queue):
+    job_id = queue.add_job(Job('https://github.com/acme/app.git', 'a' * 40))
+    queue.get_next_job(worker_id='w1', lease_seconds=0)
+    assert queue.requeue_expired_jobs() == [job_id]
+
+    lost = []
+    with LeaseHeartbeat(queue, job_id, 'w1', interval=0.05, on_lost=lambda: lost.append(job_id)) as heartbeat:
+        assert _wait_for(heartbeat.lost.is_set)
+    assert lost == [job_id]
+
+def test_abandoned_job_records_nothing(queue):
+    executor = PipelineExecutor(queue)
+    job_id = queue.add_job(Job('https://github.com/acme/app.git', 'a' * 40))
+    queue.get_next_job(worker_id=executor.worker_id)
+
+    executor.abandon_job(job_id)
+    assert executor._is_cancelled(job_id)
+    executor._record_step(job_id, {'name': 'build', 'run': 'make'}, 'success')
+
+    class Logs:
+        def append(self, line):
+            raise AssertionError('no log lines for an abandoned job')
+        def flush(self):
+            raise AssertionError('no flush for an abandoned job')
+
+    executor._update_status(job_id, JobStatus.FAILED, Logs())
+    job = queue.get_job(job_id)
+    assert job.status == JobStatus.RUNNING
+    assert job.steps == []
+
+def test_step_graph_fails_fast(queue, tmp_path):
+    executor = PipelineExecutor(queue)
+    job_id = queue.add_job(Job('https://github.com/acme/app.git', 'a' * 40))
+    queue.get_next_job(worker_id=executor.worker_id)
+    pipeline = {'name': 'ci', 'parallelism': 3, 'steps': [
+        {'name': 'install', 'run': 'touch installed'},
+        {'name': 'slow', 'run': 'test -f installed && sleep 30', 'needs': 'install'},
+        {'name': 'broken', 'run': 'test -f installed && sleep 0.3 && exit 1', 'needs': ['install']},
+        {'name': 'publish', 'run': 'true', 'needs': ['slow', 'broken']}
+    ]}
+    logs = []
+
+    started = time.monotonic()
+    assert not executor._run_steps(job_id, 'https://github.com/acme/app.git', pipeline, str(tmp_path), logs)
+    assert time.monotonic() - started < 20
+
+    steps = {step['name']: step['status'] for step in queue.get_job(job_id).steps}
+    assert steps == {'install': 'success', 'slow': 'cancelled', 'broken': 'failed'}
+    assert any(line.endswith('Step publish skipped') for line in logs)
+
+def test_status_is_recorded_after_the_last_log_line(queue, tmp_path):
+    executor = PipelineExecutor(queue)
+    job_id = queue.add_job(Job('https://github.com/acme/app.git', 'a' * 40))
+    _, job = queue.get_next_job(worker_id=executor.worker_id)
+
+    class Parser:
+        def clone_repo(self, *args):
+            return str(tmp_path)
+        def parse_pipeline(self, repo_path):
+            raise ValueError('no pipeline')
+        def release_workspace(self, repo_path):
+            pass
+
+    executor.parser = Parser()
+    writes = []
+    append_logs, update_job_status = queue.append_logs, queue.update_job_status
+    queue.append_logs = lambda *args, **kwargs: writes.append('logs') or append_logs(*args, **kwargs)
+    queue.update_job_status = lambda *args, **kwargs: writes.append('status') or update_job_status(*args, **kwargs)
+
+    assert not executor.execute_job(job_id, job)
+    assert writes[-1] == 'status'
+    job = queue.get_job(job_id)
+    assert job.status == JobStatus.FAILED
+    assert job.logs[-1].endswith('Workspace released')
+
+def test_unclaimed_job_is_refused(queue):
+    executor = PipelineExecutor(queue)
+    job_id = queue.add_job(Job('https://github.com/acme/app.git', 'a' * 40))
+    job = queue.get_job(job_id)
+    with pytest.raises(ValueError):
+        executor.execute_job(job_id, job)
+
+    queue.get_next_job(worker_id='someone-else')
+    with pytest.raises(ValueError):
+        executor.execute_job(job_id, job)
+    assert queue.get_job(job_id).logs == []
+
+def test_reaper_runs_on_its_own_thread(queue):
+    job_id = queue.add_job(Job('https://github.com/acme/app.git', 'a' * 40))
+    queue.get_next_job(worker_id='dead-worker', lease_seconds=0)
+
+    reaper = LeaseReaper(queue, interval=0.05)
+    reaper.start()
+    try:
+        assert _wait_for(lambda: queue.get_job(job_id, logs=False).status == JobStatus.QUEUED)
+    finally:
+        reaper.stop()
@@ -0,0 +1,83 @@
+import os
+import subprocess
+
+import pytest
+
+import core.file_index
+from core.file_index import FileIndex
+from core.security_scanner import SecurityScanner
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / 'repo'
+    files = {
+        'app.py': 'print("hi")\n',
+        'config/settings.yml': 'a: 1\n',
+        'config/nested/deep.json': '{}\n',
+        'node_modules/lib/index.js': 'x\n',
+        'Dockerfile': 'FROM scratch\n',
+        'notes.txt': 'not scanned\n'
+    }
+    for name, content in files.items():
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_text(content)
+    os.symlink(root / 'config', root / 'linked')
+    return root
+
+def _walk(root, ignore_dirs):
+    """Files in os.walk order, as the scanner's separate passes used to find them"""
+    found = []
+    for dir_path, dirs, names in os.walk(root):
+        dirs[:] = [name for name in dirs if name not in ignore_dirs]
+        found.extend(os.path.relpath(os.path.join(dir_path, name), root) for name in names)
+    return found
+
+def test_index_matches_os_walk_and_skips_ignored_dirs(tree):
+    index = FileIndex(str(tree), ignore_dirs=['node_modules'])
+    assert [entry.rel_path for entry in index] == _walk(tree, {'node_modules'})
+    assert not any(entry.rel_path.startswith('node_modules') for entry in index)
+    # Symlinked directories are listed but not entered
+    assert not any(entry.rel_path.startswith('linked' + os.sep) for entry in index)
+    assert index.get('config/nested/deep.json').kind == 'json'
+
+def test_classify():
+    assert FileIndex.classify('Dockerfile') == 'dockerfile'
+    assert FileIndex.classify('build.Dockerfile') == 'dockerfile'
+    assert FileIndex.classify('ci.yaml') == 'yaml'
+    assert FileIndex.classify('.env') == 'env'
+    assert FileIndex.classify('notes.txt') is None
+    assert FileIndex.classify('Makefile') is None
+
+def test_each_directory_is_listed_once(tree, monkeypatch):
+    listed = []
+    scandir = os.scandir
+    monkeypatch.setattr(core.file_index.os, 'scandir', lambda path: listed.append(path) or scandir(path))
+    index = FileIndex(str(tree), ignore_dirs=[])
+    index.of_kind('json')
+    index.named('Dockerfile')
+    # Lookups reuse the walk; every directory was listed exactly once
+    assert sorted(listed) == sorted(d for d, _, _ in os.walk(tree))
+
+def test_blob_shas_only_for_clean_tracked_files(tree):
+    for args in (['init', '-q'], ['add', 'app.py', 'config'],
+                 ['-c', 'user.name=t', '-c', 'user.email=t@example.com', 'commit', '-q', '-m', 'init']):
+        subprocess.run(['git', *args], cwd=tree, check=True)
+    (tree / 'app.py').write_text('print("changed")\n')
+
+    blobs = FileIndex(str(tree)).blob_shas()
+    assert set(blobs) == {os.path.join('config', 'settings.yml'), os.path.join('config', 'nested', 'deep.json')}
+
+def test_scan_reads_each_file_once_and_skips_binary_and_large_files(tree, monkeypatch):
+    (tree / 'config' / 'secret.py').write_text('password = "hunter2"\n')
+    (tree / 'config' / 'blob.py').write_bytes(b'\0password = "hunter2"\n')
+    (tree / 'config' / 'big.py').write_text('password = "hunter2"\n' + '#' * 100)
+    reads = []
+    read_text = SecurityScanner._read_text
+    monkeypatch.setattr(SecurityScanner, '_read_text',
+                        lambda self, path, size, *args: reads.append(path) or read_text(self, path, size, 64))
+
+    result = SecurityScanner(cache_path=None, workers=1).scan_repository(str(tree))
+    assert [issue['file'] for issue in result['issues']] == [os.sep + os.path.join('config', 'secret.py')]
+    assert len(reads) == len(set(reads))
+    # Files of no scanned kind are never opened
+    assert not any(path.endswith('notes.txt') for path in reads)
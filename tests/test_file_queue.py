@@ -0,0 +1,121 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.job import Job, JobStatus
+
+# Journal and log compaction are specific to the file backend
+pytestmark = pytest.mark.parametrize('open_queue', ['file'], indirect=True)
+
+def _finished_job(queue, lines, days_ago):
+    job_id = queue.add_job(Job('https://github.com/acme/app.git', 'a' * 40))
+    queue.get_next_job(worker_id='w1')
+    queue.append_logs(job_id, lines, 0, worker_id='w1')
+    queue.update_job_status(job_id, JobStatus.DONE, worker_id='w1')
+    with queue._locked():
+        queue._update(job_id, completed_at=(datetime.utcnow() - timedelta(days=days_ago)).isoformat())
+    return job_id
+
+def test_second_queue_replays_the_journal(open_queue):
+    writer, reader = open_queue(), open_queue()
+    job_id = writer.add_job(Job('https://github.com/acme/app.git', 'a' * 40))
+    assert reader.get_job(job_id).status == JobStatus.QUEUED
+
+    writer.get_next_job(worker_id='w1')
+    writer.append_logs(job_id, ['one', 'two'], 0, worker_id='w1')
+    writer.update_step(job_id, {'name': 'build', 'run': 'make', 'status': 'success'}, worker_id='w1')
+    job = reader.get_job(job_id)
+    assert job.status == JobStatus.RUNNING and job.worker_id == 'w1'
+    assert job.logs == ['one', 'two']
+    assert [step['name'] for step in job.steps] == ['build']
+
+def test_journal_is_folded_into_the_snapshot(open_queue, tmp_path):
+    queue = open_queue(compact_threshold=5)
+    job_ids = [queue.add_job(Job('https://github.com/acme/app.git', str(i) * 40)) for i in range(8)]
+    assert queue._journal_events < 5
+    queue.compact()
+    assert os.path.getsize(tmp_path / 'jobs.json.journal') == 0
+
+    reopened = open_queue()
+    assert [job_id for job_id, _ in reopened.list_jobs(limit=10)] == job_ids[::-1]
+    assert reopened.get_next_job(worker_id='w1')[0] == job_ids[0]
+
+def test_replaying_a_logs_event_twice_is_idempotent(queue):
+    job_id = queue.add_job(Job('https://github.com/acme/app.git', 'a' * 40))
+    event = {'op': 'logs', 'job_id': job_id, 'start': 0, 'lines': ['a', 'b']}
+    queue._apply(event)
+    queue._apply(event)
+    assert queue._records[job_id]['logs'] == ['a', 'b']
+
+def test_compaction_budget_excludes_expired_logs(queue):
+    lines = [f"line {i} " + 'x' * 80 for i in range(200)]
+    expired, oldest, newer, newest = (_finished_job(queue, lines, days) for days in (10, 3, 2, 1))
+    size = queue.log_store.size(newest)
+
+    stats = queue.compact_logs(hot_seconds=30 * 86400, retention_days=7, max_bytes=int(size * 2.5),
+                               archive_dir=None)
+
+    assert stats['dropped'] == 2
+    assert queue.read_logs(expired) == []
+    assert queue.read_logs(oldest) == []
+    assert queue.read_logs(newer) == lines
+    assert queue.read_logs(newest) == lines
+    assert queue.log_store.size() <= size * 2.5
+
+def test_compaction_compresses_and_archives(queue, tmp_path):
+    lines = [f"line {i}" for i in range(1000)]
+    kept = _finished_job(queue, lines, 1)
+    archived = _finished_job(queue, lines, 10)
+
+    stats = queue.compact_logs(hot_seconds=3600, retention_days=7, max_bytes=0,
+                               archive_dir=str(tmp_path / 'archive'))
+
+    assert stats['compressed'] == 1 and stats['bytes_saved'] > 0 and stats['dropped'] == 1
+    assert queue.read_logs(kept) == lines
+    assert queue.read_logs(kept, -5) == lines[-5:]
+    assert queue.read_logs(archived) == []
+    assert (tmp_path / 'archive' / archived).is_dir()
+
+def test_torn_journal_write_is_cut_off(open_queue, tmp_path):
+    queue = open_queue()
+    first = queue.add_job(Job('https://github.com/acme/app.git', 'a' * 40))
+    journal = tmp_path / 'jobs.json.journal'
+    with open(journal, 'a') as f:
+        f.write('{"op": "add", "job_id": "torn", "jo')
+
+    second = queue.add_job(Job('https://github.com/acme/app.git', 'b' * 40))
+    reopened = open_queue()
+    assert {job_id for job_id, _ in reopened.list_jobs()} == {first, second}
+    assert reopened.get_job(second).status == JobStatus.QUEUED
+
+def test_undecodable_final_line_is_skipped(open_queue, tmp_path):
+    queue = open_queue()
+    first = queue.add_job(Job('https://github.com/acme/app.git', 'a' * 40))
+    with open(tmp_path / 'jobs.json.journal', 'a') as f:
+        f.write('{"op": "add", "job_id": "tor\n')
+
+    reopened = open_queue()
+    assert [job_id for job_id, _ in reopened.list_jobs()] == [first]
+    second = reopened.add_job(Job('https://github.com/acme/app.git', 'b' * 40))
+    assert {job_id for job_id, _ in open_queue().list_jobs()} == {first, second}
+
+def test_spill_files_go_with_their_log(queue, tmp_path):
+    spill_dir = tmp_path / 'spill'
+    spill_dir.mkdir()
+    lines = [f"line {i}" for i in range(10)]
+    expired, kept = _finished_job(queue, lines, 10), _finished_job(queue, lines, 1)
+    for job_id in (expired, kept):
+        (spill_dir / f"{job_id}-1.log").write_text('spilled output\n' * 100)
+
+    stats = queue.compact_logs(hot_seconds=30 * 86400, retention_days=7, max_bytes=0,
+                               archive_dir=str(tmp_path / 'archive'), spill_dir=str(spill_dir))
+    assert stats['dropped'] == 1
+    assert sorted(os.listdir(spill_dir)) == [f"{kept}-1.log"]
+    assert (tmp_path / 'archive' / expired / 'spill' / f"{expired}-1.log").exists()
+
+    # Spilled output counts towards the size budget
+    stats = queue.compact_logs(hot_seconds=30 * 86400, retention_days=0, max_bytes=queue.log_store.size(),
+                               archive_dir=None, spill_dir=str(spill_dir))
+    assert stats['dropped'] == 1
+    assert os.listdir(spill_dir) == []
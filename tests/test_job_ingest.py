@@ -0,0 +1,31 @@
+import time
+
+import core.job_ingest
+from core.job_ingest import JobIngest
+from models.job import Job
+
+def test_retry_after_a_stored_batch_adds_nothing_twice(queue, monkeypatch):
+    monkeypatch.setattr(core.job_ingest, 'RETRY_DELAY', 0.01)
+    add_jobs, calls = queue.add_jobs, []
+
+    def flaky_add_jobs(jobs, **kwargs):
+        calls.append(list(kwargs['job_ids']))
+        job_ids = add_jobs(jobs, **kwargs)
+        if len(calls) == 1:
+            raise OSError('failed after storing')
+        return job_ids
+
+    queue.add_jobs = flaky_add_jobs
+    ingest = JobIngest(queue, coalesce=True)
+    for sha in ('a', 'b'):
+        assert ingest.offer(Job('https://github.com/acme/app.git', sha * 40, 'main'))
+    ingest.start()
+    deadline = time.monotonic() + 5
+    while len(calls) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    ingest.close()
+
+    assert len(calls) == 2 and calls[0] == calls[1][:len(calls[0])]
+    summaries = queue.list_summaries()
+    assert sorted(summary['commit_sha'][0] for summary in summaries) == ['a', 'b']
+    assert sorted(summary['status'] for summary in summaries) == ['queued', 'skipped']
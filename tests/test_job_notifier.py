@@ -0,0 +1,48 @@
+import threading
+import time
+
+from models.job import Job
+
+POLL_TIMEOUT = 30
+
+def _claim_when_woken(queue, claimed):
+    """What an idle executor thread does: check, then wait for a wakeup"""
+    generation = queue.notifier.generation
+    job = queue.get_next_job(worker_id='w1')
+    if job is None:
+        queue.notifier.wait(generation, POLL_TIMEOUT)
+        job = queue.get_next_job(worker_id='w1')
+    claimed.append((job, time.monotonic()))
+
+def _wait_for_listener(queue):
+    deadline = time.monotonic() + 5
+    while queue.notifier._sock is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+def test_add_job_wakes_a_waiter_in_the_same_process(queue):
+    claimed = []
+    waiter = threading.Thread(target=_claim_when_woken, args=(queue, claimed))
+    waiter.start()
+    _wait_for_listener(queue)
+
+    added_at = time.monotonic()
+    job_id = queue.add_job(Job('https://github.com/acme/app.git', 'a' * 40))
+    waiter.join(POLL_TIMEOUT)
+    (job, woken_at), = claimed
+    assert job[0] == job_id
+    assert woken_at - added_at < 5
+
+def test_add_job_wakes_a_waiter_on_another_queue_handle(open_queue):
+    # A second handle has its own notifier, reached over its Unix socket
+    reader, writer = open_queue(), open_queue()
+    claimed = []
+    waiter = threading.Thread(target=_claim_when_woken, args=(reader, claimed))
+    waiter.start()
+    _wait_for_listener(reader)
+
+    added_at = time.monotonic()
+    job_id = writer.add_job(Job('https://github.com/acme/app.git', 'a' * 40))
+    waiter.join(POLL_TIMEOUT)
+    (job, woken_at), = claimed
+    assert job[0] == job_id
+    assert woken_at - added_at < 5
@@ -0,0 +1,51 @@
+import pytest
+
+from core.job_summary import SummaryIndex, SummaryLog, repo_name
+from models.job import Job, JobStatus
+
+def _summary(job_id, created_at, status='queued'):
+    return {'id': job_id, 'created_at': created_at, 'status': status}
+
+def test_repo_name():
+    assert repo_name('https://github.com/acme/app.git') == 'acme/app'
+    assert repo_name('git@github.com:acme/app.git') == 'acme/app'
+    assert repo_name('https://github.com/acme/app/') == 'acme/app'
+
+def test_index_lists_newest_first():
+    index = SummaryIndex()
+    for job_id, created_at in (('b', '2024-01-02'), ('a', '2024-01-01'), ('c', '2024-01-03')):
+        index.put(_summary(job_id, created_at))
+    index.put(_summary('a', '2024-01-01', 'done'))
+
+    assert [s['id'] for s in index.newest(2)] == ['c', 'b']
+    assert [s['id'] for s in index.newest(5, before=('2024-01-03', 'c'))] == ['b', 'a']
+    assert [s['id'] for s in index.newest(5, match=lambda s: s['status'] == 'done')] == ['a']
+    assert len(index) == 3
+
+def test_log_reads_only_new_lines_and_follows_rewrites(tmp_path):
+    path = str(tmp_path / 'jobs.json.summary')
+    writer, reader = SummaryLog(path), SummaryLog(path)
+    writer.append([_summary('a', '2024-01-01')])
+    assert [s['id'] for s in reader.read().all()] == ['a']
+
+    writer.append([_summary('a', '2024-01-01', 'running'), _summary('b', '2024-01-02')])
+    index = reader.read()
+    assert index.get('a')['status'] == 'running' and len(index) == 2
+
+    writer.rewrite([_summary('c', '2024-01-03')])
+    assert [s['id'] for s in reader.read().all()] == ['c']
+
+@pytest.mark.parametrize('open_queue', ['file'], indirect=True)
+def test_queue_lists_from_summaries_without_loading_jobs(open_queue):
+    writer = open_queue()
+    job_ids = [writer.add_job(Job('https://github.com/acme/app.git', f"{i:040d}")) for i in range(3)]
+    writer.get_next_job(worker_id='w1')
+    writer.update_job_status(job_ids[0], JobStatus.DONE, worker_id='w1')
+    writer.compact()
+    writer.add_job(Job('https://github.com/acme/other.git', 'f' * 40))
+
+    reader = open_queue()
+    summaries = reader.list_summaries(limit=3)
+    assert reader._snapshot_stat is None
+    assert [s['repo_name'] for s in summaries] == ['acme/other', 'acme/app', 'acme/app']
+    assert reader.list_summaries(limit=10)[-1]['status'] == 'done'
@@ -0,0 +1,98 @@
+import pytest
+
+from config.settings import API_PREFIX
+from core.jobs_api import JobsApi
+from models.job import Job, JobStatus
+
+def _get(api, path, if_none_match=None, **query):
+    return api.get(API_PREFIX + path, {name: [str(value)] for name, value in query.items()}, if_none_match)
+
+def test_cursor_pages_cover_every_job_once(queue):
+    job_ids = [queue.add_job(Job('https://github.com/acme/app.git', f"{i:040d}")) for i in range(7)]
+    api = JobsApi(queue)
+
+    seen, cursor = [], None
+    while True:
+        status, body, _ = _get(api, '/jobs', limit=3, **({'cursor': cursor} if cursor else {}))
+        assert status == 200
+        seen.extend(job['id'] for job in body['jobs'])
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+    assert seen == job_ids[::-1]
+
+def test_status_filter_and_bad_parameters(queue):
+    running = queue.add_job(Job('https://github.com/acme/app.git', 'a' * 40))
+    queue.add_job(Job('https://github.com/acme/app.git', 'b' * 40))
+    queue.get_next_job(worker_id='w1')
+    api = JobsApi(queue)
+
+    _, body, _ = _get(api, '/jobs', status='running')
+    assert [job['id'] for job in body['jobs']] == [running]
+    assert _get(api, '/jobs', status='sleeping')[0] == 400
+    assert _get(api, '/jobs', limit=0)[0] == 400
+    assert _get(api, '/jobs', cursor='!!')[0] == 400
+    assert _get(api, '/jobs/missing')[0] == 404
+
+def test_etag_changes_with_the_queue(queue):
+    job_id = queue.add_job(Job('https://github.com/acme/app.git', 'a' * 40))
+    api = JobsApi(queue)
+    status, _, etag = _get(api, '/jobs')
+    assert status == 200
+    assert _get(api, '/jobs', if_none_match=etag) == (304, None, etag)
+
+    queue.get_next_job(worker_id='w1')
+    queue.update_job_status(job_id, JobStatus.DONE, worker_id='w1')
+    status, body, new_etag = _get(api, '/jobs', if_none_match=etag)
+    assert status == 200 and new_etag != etag
+    assert body['jobs'][0]['status'] == 'done'
+
+def test_log_ranges(queue):
+    job_id = queue.add_job(Job('https://github.com/acme/app.git', 'a' * 40))
+    queue.get_next_job(worker_id='w1')
+    lines = [f"line {i}" for i in range(10)]
+    queue.append_logs(job_id, lines, 0, worker_id='w1')
+    api = JobsApi(queue)
+
+    assert _get(api, f"/jobs/{job_id}/logs")[1] == lines
+    assert _get(api, f"/jobs/{job_id}/logs", offset=2, limit=3)[1] == lines[2:5]
+    assert _get(api, f"/jobs/{job_id}/logs", tail=2)[1] == lines[-2:]
+    assert _get(api, f"/jobs/{job_id}/logs", tail=0)[0] == 400
+
+def test_job_without_logs(queue):
+    job_id = queue.add_job(Job('https://github.com/acme/app.git', 'a' * 40))
+    queue.get_next_job(worker_id='w1')
+    queue.append_logs(job_id, ['line 0', 'line 1'], 0, worker_id='w1')
+    api = JobsApi(queue)
+
+    assert _get(api, f"/jobs/{job_id}")[1]['logs'] == ['line 0', 'line 1']
+    status, body, _ = _get(api, f"/jobs/{job_id}", logs=0)
+    assert status == 200 and body['logs'] == [] and body['status'] == 'running'
+    assert _get(api, f"/jobs/{job_id}", logs='no')[0] == 400
+
+def test_heartbeats_keep_etags_and_logs_change_the_job_etag(queue):
+    job_id = queue.add_job(Job('https://github.com/acme/app.git', 'a' * 40))
+    queue.get_next_job(worker_id='w1')
+    api = JobsApi(queue)
+    list_etag, job_etag = _get(api, '/jobs')[2], _get(api, f"/jobs/{job_id}")[2]
+
+    queue.renew_lease(job_id, 'w1')
+    assert _get(api, '/jobs', if_none_match=list_etag)[0] == 304
+    assert _get(api, f"/jobs/{job_id}", if_none_match=job_etag)[0] == 304
+
+    queue.append_logs(job_id, ['line 0'], 0, worker_id='w1')
+    status, body, _ = _get(api, f"/jobs/{job_id}/logs", if_none_match=job_etag)
+    assert status == 200 and body == ['line 0']
+
+@pytest.mark.parametrize('open_queue', ['file'], indirect=True)
+def test_listing_etag_ignores_log_lines(queue):
+    job_id = queue.add_job(Job('https://github.com/acme/app.git', 'a' * 40))
+    queue.get_next_job(worker_id='w1')
+    api = JobsApi(queue)
+    etag = _get(api, '/jobs')[2]
+
+    queue.append_logs(job_id, ['line 0'], 0, worker_id='w1')
+    queue.update_step(job_id, {'name': 'build', 'run': 'make', 'status': 'running'}, worker_id='w1')
+    assert _get(api, '/jobs', if_none_match=etag)[0] == 304
+    queue.update_job_status(job_id, JobStatus.DONE, worker_id='w1')
+    assert _get(api, '/jobs', if_none_match=etag)[0] == 200
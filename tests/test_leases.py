@@ -0,0 +1,37 @@
+from models.job import Job, JobStatus
+
+def _add(queue, branch='main'):
+    return queue.add_job(Job('https://github.com/acme/app.git', 'a' * 40, branch))
+
+def test_each_job_is_claimed_once(queue):
+    job_ids = {_add(queue), _add(queue)}
+    claimed = {queue.get_next_job(worker_id='w1')[0], queue.get_next_job(worker_id='w2')[0]}
+    assert claimed == job_ids
+    assert queue.get_next_job(worker_id='w3') is None
+
+def test_expired_lease_is_requeued(queue):
+    job_id = _add(queue)
+    queue.get_next_job(worker_id='w1', lease_seconds=0)
+    assert queue.requeue_expired_jobs() == [job_id]
+    assert queue.get_job(job_id).status == JobStatus.QUEUED
+
+    # The old owner can neither renew nor record anything
+    assert not queue.renew_lease(job_id, 'w1')
+    assert not queue.update_job_status(job_id, JobStatus.DONE, worker_id='w1')
+    assert queue.get_next_job(worker_id='w2')[0] == job_id
+    assert not queue.update_step(job_id, {'name': 'build', 'run': 'make'}, worker_id='w1')
+    assert queue.update_job_status(job_id, JobStatus.DONE, worker_id='w2')
+
+def test_live_lease_is_kept(queue):
+    job_id = _add(queue)
+    queue.get_next_job(worker_id='w1', lease_seconds=60)
+    assert queue.renew_lease(job_id, 'w1')
+    assert queue.requeue_expired_jobs() == []
+    assert queue.get_job(job_id).worker_id == 'w1'
+
+def test_expired_cancelled_job_ends_cancelled(queue):
+    job_id = _add(queue)
+    queue.get_next_job(worker_id='w1', lease_seconds=0)
+    assert queue.cancel_job(job_id)
+    assert queue.requeue_expired_jobs() == []
+    assert queue.get_job(job_id).status == JobStatus.CANCELLED
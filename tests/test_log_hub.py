@@ -0,0 +1,46 @@
+from core.log_hub import LogHub
+
+class Queue:
+    """Serves a fixed log, finishing once every line has been read"""
+
+    def __init__(self, lines):
+        self.log = lines
+        self.reads = []
+
+    def tail_logs(self, job_id, start):
+        self.reads.append(start)
+        return self.log[start:], 'done' if start >= len(self.log) else 'running'
+
+    def read_logs(self, job_id, start=0, end=None):
+        return self.log[start:end]
+
+def test_tail_starts_at_the_first_offset():
+    queue = Queue([f"line {i}" for i in range(100)])
+    hub = LogHub(queue, poll_interval=0.01)
+    tail = hub.subscribe('job', 90)
+
+    lines, complete = tail.wait(90, 1)
+    assert lines == queue.log[90:] and not complete
+    assert queue.reads[0] == 90
+    assert tail.lines == []
+    hub.unsubscribe(tail, 100)
+
+def test_lines_every_watcher_passed_are_dropped():
+    queue = Queue([f"line {i}" for i in range(10)])
+    hub = LogHub(queue, poll_interval=0.01)
+    fast = hub.subscribe('job', 5)
+    slow = hub.subscribe('job', 5)
+    assert fast is slow
+    assert fast.wait(5, 1)[0] == queue.log[5:]
+    assert fast.base == 5 and len(fast.lines) == 5
+
+    # A watcher from before the tail's start reads the gap from the queue
+    early = hub.subscribe('job', 2)
+    assert early.wait(2, 1)[0] == queue.log[2:5]
+    assert slow.wait(5, 1)[0] == queue.log[5:]
+    assert early.wait(5, 1)[0] == queue.log[5:]
+    assert fast.lines == [] and fast.base == 10
+
+    for _ in range(3):
+        hub.unsubscribe(fast, 10)
+    assert fast.watchers == 0
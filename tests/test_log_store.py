@@ -0,0 +1,62 @@
+import pytest
+
+from core.log_store import LogStore
+
+@pytest.fixture
+def store(tmp_path):
+    return LogStore(str(tmp_path / 'logs'), segment_lines=10)
+
+def test_lines_span_segments(store):
+    lines = [f"line {i}" for i in range(25)]
+    assert store.write('job', lines[:7], 0) == 7
+    assert store.write('job', lines[7:], 7) == 25
+    assert store.count('job') == 25
+    assert store.read('job') == lines
+    assert store.read('job', 8, 13) == lines[8:13]
+    assert store.read('job', -3) == lines[-3:]
+    assert store.read('job', 30) == []
+    assert store.read('missing') == []
+
+def test_rewrite_from_a_line_truncates(store):
+    lines = [f"line {i}" for i in range(25)]
+    store.write('job', lines, 0)
+    assert store.write('job', ['new'], 12) == 13
+    assert store.read('job') == lines[:12] + ['new']
+    # A start past the end appends
+    assert store.write('job', ['tail'], 99) == 14
+
+def test_lines_keep_any_characters(store):
+    lines = ['tab\there', 'quote " and \\ backslash', 'café', '']
+    store.write('job', lines, 0)
+    assert store.read('job') == lines
+
+def test_drop_and_archive(store, tmp_path):
+    store.write('job', ['a'], 0)
+    store.drop('job', str(tmp_path / 'archive'))
+    assert store.count('job') == 0
+    assert LogStore(str(tmp_path / 'archive')).read('job') == ['a']
+
+def test_compressed_segments_read_like_plain_ones(tmp_path):
+    store = LogStore(str(tmp_path / 'logs'), segment_lines=1000)
+    lines = [f"line {i} " + 'x' * 50 for i in range(2500)]
+    store.write('job', lines, 0)
+    size = store.size('job')
+
+    assert store.compress('job') > 0
+    assert store.size('job') < size
+    assert store.compress('job') == 0
+    assert store.count('job') == 2500
+    assert store.read('job') == lines
+    assert store.read('job', 250, 260) == lines[250:260]
+    assert store.read('job', 990, 1010) == lines[990:1010]
+    assert store.read('job', -50) == lines[-50:]
+
+def test_writing_into_a_compressed_segment(tmp_path):
+    store = LogStore(str(tmp_path / 'logs'), segment_lines=1000)
+    lines = [f"line {i}" for i in range(1500)]
+    store.write('job', lines, 0)
+    store.compress('job')
+
+    assert store.write('job', ['more'], 1500) == 1501
+    assert store.write('job', ['cut'], 700) == 701
+    assert store.read('job') == lines[:700] + ['cut']
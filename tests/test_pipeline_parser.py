@@ -0,0 +1,101 @@
+import os
+import subprocess
+
+import pytest
+import yaml
+
+from core.pipeline_parser import PipelineParser
+
+@pytest.fixture
+def parser():
+    return PipelineParser()
+
+def _pipeline(*steps, **fields):
+    return dict(fields, name='ci', steps=list(steps))
+
+def test_flat_pipeline_may_repeat_names(parser):
+    pipeline = _pipeline({'name': 'test', 'run': 'make test'}, {'name': 'test', 'run': 'make e2e'})
+    assert parser.validate_pipeline(pipeline)
+    assert not parser.uses_needs(pipeline['steps'])
+
+def test_null_needs_is_not_declared(parser):
+    pipeline = _pipeline({'name': 'test', 'run': 'make test', 'needs': None},
+                         {'name': 'test', 'run': 'make e2e'})
+    assert parser.validate_pipeline(pipeline)
+    assert not parser.uses_needs(pipeline['steps'])
+    assert parser.step_needs(pipeline['steps'][0]) == []
+
+def test_graph_requires_unique_names(parser):
+    pipeline = _pipeline({'name': 'build', 'run': 'make'}, {'name': 'build', 'run': 'make', 'needs': []})
+    assert not parser.validate_pipeline(pipeline)
+
+def test_graph_rejects_unknown_needs_and_cycles(parser):
+    assert parser.validate_pipeline(_pipeline({'name': 'a', 'run': 'x'}, {'name': 'b', 'run': 'y', 'needs': 'a'}))
+    assert not parser.validate_pipeline(_pipeline({'name': 'a', 'run': 'x', 'needs': ['missing']}))
+    assert not parser.validate_pipeline(_pipeline({'name': 'a', 'run': 'x', 'needs': 'b'},
+                                                  {'name': 'b', 'run': 'y', 'needs': ['a']}))
+    assert not parser.validate_pipeline(_pipeline({'name': 'a', 'run': 'x', 'needs': 3}))
+
+def test_limits_and_checkout_options(parser):
+    assert parser.parse_size('512M') == 512 * 1024 ** 2
+    assert parser.parse_size('2GiB') == 2 * 1024 ** 3
+    assert parser.parse_size('lots') is None
+    assert not parser.validate_pipeline(_pipeline({'name': 'a', 'run': 'x', 'timeout': 0}))
+    assert not parser.validate_pipeline(_pipeline({'name': 'a', 'run': 'x'}, checkout={'depth': -1}))
+
+def _git(*args, cwd):
+    return subprocess.run(['git', *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+@pytest.fixture
+def origin(tmp_path):
+    """A served repository with five commits, the last adding .cicd.yml"""
+    path = tmp_path / 'origin'
+    path.mkdir()
+    _git('init', '-q', '-b', 'main', cwd=path)
+    _git('config', 'uploadpack.allowFilter', 'true', cwd=path)
+    _git('config', 'uploadpack.allowAnySHA1InWant', 'true', cwd=path)
+
+    def commit(checkout):
+        for i in range(4):
+            (path / 'file.txt').write_text(f"version {i}\n")
+            _git('add', '.', cwd=path)
+            _git('-c', 'user.name=t', '-c', 'user.email=t@example.com', 'commit', '-q', '-m', f"c{i}", cwd=path)
+        (path / '.cicd.yml').write_text(yaml.safe_dump({'name': 'ci', 'steps': [{'name': 'a', 'run': 'true'}],
+                                                        'checkout': checkout}))
+        _git('add', '.', cwd=path)
+        _git('-c', 'user.name=t', '-c', 'user.email=t@example.com', 'commit', '-q', '-m', 'pipeline', cwd=path)
+        return _git('rev-parse', 'HEAD', cwd=path)
+
+    return path, commit
+
+@pytest.fixture
+def workspace_parser(tmp_path, monkeypatch):
+    monkeypatch.setattr('core.pipeline_parser.WORKSPACE_DIR', str(tmp_path / 'workspace'))
+    return PipelineParser()
+
+@pytest.mark.parametrize('checkout, commits', [({'depth': 2}, 2), ({'depth': 0}, 5), ({'filter': 'blob:none'}, 5)])
+def test_first_clone_follows_checkout_block(origin, workspace_parser, checkout, commits):
+    path, commit = origin
+    sha = commit(checkout)
+    worktree = workspace_parser.clone_repo(f"file://{path}", sha, 'main', 'job1')
+
+    assert _git('rev-parse', 'HEAD', cwd=worktree) == sha
+    assert int(_git('rev-list', '--count', 'HEAD', cwd=worktree)) == commits
+    assert os.path.exists(os.path.join(worktree, 'file.txt'))
+    workspace_parser.release_workspace(worktree)
+
+def test_abbreviated_sha_and_branch_name_are_resolved(origin, workspace_parser):
+    path, commit = origin
+    sha = commit({'depth': 0})
+    older = _git('rev-parse', 'HEAD~2', cwd=path)
+
+    worktree = workspace_parser.clone_repo(f"file://{path}", older[:7], 'main', 'job1')
+    assert _git('rev-parse', 'HEAD', cwd=worktree) == older
+    workspace_parser.release_workspace(worktree)
+
+    worktree = workspace_parser.clone_repo(f"file://{path}", 'main', 'main', 'job2')
+    assert _git('rev-parse', 'HEAD', cwd=worktree) == sha
+    workspace_parser.release_workspace(worktree)
+
+    with pytest.raises(Exception, match='not found'):
+        workspace_parser.clone_repo(f"file://{path}", 'deadbee', 'main', 'job3')
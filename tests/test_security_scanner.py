@@ -0,0 +1,148 @@
+import json
+import subprocess
+
+import pytest
+
+import core.security_scanner
+from core.advisory_db import AdvisoryDB
+from core.security_scanner import SecurityScanner
+
+FILES = {
+    'app/settings.py': 'DEBUG = True\npassword = "hunter2"\n',
+    'app/tokens.json': '{"token = \'abc\'": 1}\n',
+    'pipeline.yml': 'steps:\n  - run: make\n  - run: sudo make install\n  - run: eval "$CMD"\n',
+    'Dockerfile': 'FROM python:3.12\nRUN curl | sh\n',
+    'README.md': 'password = "not scanned"\n',
+    'requirements.txt': 'django==1.11\n'
+}
+
+EXPECTED = [
+    ('secret', '/app/settings.py', 'Hardcoded password', 'HIGH', None),
+    ('secret', '/app/tokens.json', 'Access token', 'HIGH', None),
+    ('dangerous_command', '/Dockerfile', 'Dangerous command: curl | sh', 'CRITICAL', 2),
+    ('dangerous_command', '/pipeline.yml', 'Dangerous command: sudo', 'CRITICAL', 3),
+    ('dangerous_command', '/pipeline.yml', 'Dangerous command: eval', 'CRITICAL', 4),
+    ('vulnerable_dependency', '/requirements.txt', 'Potentially outdated dependencies', 'MEDIUM', None)
+]
+
+@pytest.fixture
+def repo(tmp_path):
+    path = tmp_path / 'repo'
+    for name, content in FILES.items():
+        (path / name).parent.mkdir(parents=True, exist_ok=True)
+        (path / name).write_text(content)
+    for args in (['init', '-q'], ['add', '.'],
+                 ['-c', 'user.name=t', '-c', 'user.email=t@example.com', 'commit', '-q', '-m', 'init']):
+        subprocess.run(['git', *args], cwd=path, check=True)
+    return path
+
+def _findings(result):
+    return sorted((issue['type'], issue['file'], issue['description'], issue['severity'],
+                   issue.get('line')) for issue in result['issues'])
+
+def test_scan_without_cache(repo):
+    result = SecurityScanner(cache_path=None, workers=1).scan_repository(str(repo))
+    assert _findings(result) == sorted(EXPECTED)
+    assert result['total_issues'] == len(EXPECTED)
+    assert result['risk_level'] == 'CRITICAL'
+
+def test_cached_scan_matches_a_fresh_one(repo, tmp_path):
+    cache_path = str(tmp_path / 'scan.db')
+    first = SecurityScanner(cache_path=cache_path, workers=1)
+    assert _findings(first.scan_repository(str(repo))) == sorted(EXPECTED)
+    assert first.stats['cached'] == 0
+
+    second = SecurityScanner(cache_path=cache_path, workers=1)
+    result = second.scan_repository(str(repo))
+    assert second.stats['cached'] == second.stats['files'] > 0
+    assert _findings(result) == sorted(EXPECTED)
+    assert result['risk_level'] == 'CRITICAL'
+
+    # A modified file is scanned again rather than answered from the cache
+    (repo / 'app' / 'settings.py').write_text('DEBUG = True\n')
+    result = SecurityScanner(cache_path=cache_path, workers=1).scan_repository(str(repo))
+    assert _findings(result) == sorted(issue for issue in EXPECTED if issue[1] != '/app/settings.py')
+
+def test_risk_level_without_critical_findings(repo):
+    for name in ('pipeline.yml', 'Dockerfile'):
+        (repo / name).unlink()
+    result = SecurityScanner(cache_path=None, workers=1).scan_repository(str(repo))
+    assert result['risk_level'] == 'LOW'
+    assert [issue['type'] for issue in result['issues']] == ['secret', 'secret', 'vulnerable_dependency']
+
+def test_dependency_files_are_read_once(repo, tmp_path, monkeypatch):
+    lock = {'lockfileVersion': 3, "token = 'x'": 1,
+            'packages': {'': {}, 'node_modules/left-pad': {'version': '1.0.0'}}}
+    (repo / 'package-lock.json').write_text(json.dumps(lock))
+    export = tmp_path / 'osv.json'
+    export.write_text(json.dumps([{
+        'id': 'GHSA-2', 'summary': 'bad', 'database_specific': {'severity': 'HIGH'},
+        'affected': [{'package': {'ecosystem': 'npm', 'name': 'left-pad'}, 'versions': ['1.0.0']}]
+    }]))
+    advisories = AdvisoryDB(str(tmp_path / 'advisories.db'))
+    assert advisories.import_osv([str(export)]) == 1
+
+    reads = []
+    read_text = SecurityScanner._read_text
+    monkeypatch.setattr(SecurityScanner, '_read_text',
+                        lambda self, path, *args: reads.append(path) or read_text(self, path, *args))
+    scanner = SecurityScanner(cache_path=None, workers=1)
+    scanner._advisories = advisories
+    findings = _findings(scanner.scan_repository(str(repo)))
+
+    assert ('secret', '/package-lock.json', 'Access token', 'HIGH', None) in findings
+    assert ('vulnerable_dependency', '/package-lock.json', 'left-pad 1.0.0: GHSA-2 bad', 'HIGH', None) in findings
+    assert sum(path.endswith('package-lock.json') for path in reads) == 1
+
+def _add_sources(repo, count):
+    for n in range(count):
+        (repo / 'src' / f'mod{n}.py').parent.mkdir(exist_ok=True)
+        (repo / 'src' / f'mod{n}.py').write_text(f'x = {n}\npassword = "p{n}"\n' + '#' * 2000)
+
+def test_process_pool_matches_serial_scan(repo, monkeypatch):
+    _add_sources(repo, 20)
+    monkeypatch.setattr(core.security_scanner, 'SCAN_BATCH_BYTES', 1)
+    serial = SecurityScanner(cache_path=None, workers=1).scan_repository(str(repo))
+
+    pools = []
+    get_scan_pool = core.security_scanner._get_scan_pool
+    monkeypatch.setattr(core.security_scanner, '_get_scan_pool',
+                        lambda workers: pools.append(workers) or get_scan_pool(workers))
+    result = SecurityScanner(cache_path=None, workers=2).scan_repository(str(repo))
+    assert pools == [2]
+    assert _findings(result) == _findings(serial)
+    assert len(result['issues']) == len(EXPECTED) + 20
+
+def test_abort_on_critical_skips_the_pool(repo, monkeypatch):
+    _add_sources(repo, 20)
+    monkeypatch.setattr(core.security_scanner, 'SCAN_BATCH_BYTES', 1)
+    monkeypatch.setattr(core.security_scanner, '_get_scan_pool', lambda workers: pytest.fail('pool started'))
+
+    scanner = SecurityScanner(cache_path=None, workers=2)
+    result = scanner.scan_repository(str(repo), abort_on_critical=True)
+    assert scanner.stats['aborted']
+    assert any(issue['severity'] == 'CRITICAL' for issue in result['issues'])
+    assert not any(issue['file'].startswith('/src/') for issue in result['issues'])
+
+def test_abort_on_critical_cancels_outstanding_batches(repo, monkeypatch):
+    (repo / 'pipeline.yml').write_text('steps:\n  - run: make\n')
+    (repo / 'Dockerfile').write_text('FROM python:3.12\n')
+    _add_sources(repo, 40)
+    monkeypatch.setattr(core.security_scanner, 'SCAN_BATCH_BYTES', 1)
+    # Real CRITICAL findings are checked before the pool starts, so let
+    # secrets found by the pool stand in for them
+    monkeypatch.setattr(SecurityScanner, '_has_critical',
+                        lambda self, issues: any(issue['type'] == 'secret' for issue in issues))
+
+    scanner = SecurityScanner(cache_path=None, workers=2)
+    result = scanner.scan_repository(str(repo), abort_on_critical=True)
+    assert scanner.stats['aborted']
+    # Only the first finished batch was merged; the rest were dropped
+    scanned = [issue for issue in result['issues'] if issue['file'].startswith('/src/')]
+    assert 0 < len(scanned) < 40
+
+    # The shared pool is still usable after the cancelled scan
+    monkeypatch.undo()
+    monkeypatch.setattr(core.security_scanner, 'SCAN_BATCH_BYTES', 1)
+    full = SecurityScanner(cache_path=None, workers=2).scan_repository(str(repo))
+    assert len([issue for issue in full['issues'] if issue['file'].startswith('/src/')]) == 40
@@ -0,0 +1,64 @@
+import subprocess
+
+import pytest
+
+from core.step_cache import StepCache, normalize_repo_url
+
+STEP = {'name': 'build', 'run': 'make', 'cache': {'inputs': ['src/**'], 'outputs': ['dist']}}
+
+@pytest.fixture
+def repo(tmp_path):
+    path = tmp_path / 'repo'
+    (path / 'src').mkdir(parents=True)
+    (path / 'src' / 'main.c').write_text('int main() { return 0; }\n')
+    for args in (['init', '-q'], ['add', '.'],
+                 ['-c', 'user.name=t', '-c', 'user.email=t@example.com', 'commit', '-q', '-m', 'init']):
+        subprocess.run(['git', *args], cwd=path, check=True)
+    return path
+
+def test_normalize_repo_url():
+    expected = 'github.com/acme/app'
+    assert normalize_repo_url('https://github.com/acme/app.git') == expected
+    assert normalize_repo_url('https://GitHub.com/acme/app/') == expected
+    assert normalize_repo_url('https://token@github.com/acme/app') == expected
+    assert normalize_repo_url('git@github.com:acme/app.git') == expected
+    assert normalize_repo_url('ssh://git@github.com:2222/acme/app.git') == 'github.com:2222/acme/app'
+
+def test_key_depends_on_repository(tmp_path, repo):
+    cache = StepCache(str(tmp_path / 'cache'))
+    key = cache.key('https://github.com/acme/app.git', str(repo), STEP)
+    assert key == cache.key('git@github.com:acme/app.git', str(repo), STEP)
+    assert key != cache.key('https://github.com/evil/app.git', str(repo), STEP)
+
+def test_key_follows_inputs(tmp_path, repo):
+    cache = StepCache(str(tmp_path / 'cache'))
+    url = 'https://github.com/acme/app.git'
+    key = cache.key(url, str(repo), STEP)
+    (repo / 'README').write_text('not an input\n')
+    assert cache.key(url, str(repo), STEP) == key
+    (repo / 'src' / 'main.c').write_text('int main() { return 1; }\n')
+    assert cache.key(url, str(repo), STEP) != key
+
+def test_store_and_restore(tmp_path, repo):
+    cache = StepCache(str(tmp_path / 'cache'))
+    (repo / 'dist').mkdir()
+    (repo / 'dist' / 'app').write_text('binary')
+    key = cache.key('https://github.com/acme/app.git', str(repo), STEP)
+    cache.store(key, STEP, str(repo), ['built'])
+
+    (repo / 'dist' / 'app').unlink()
+    entry = cache.lookup(key)
+    assert entry['logs'] == ['built']
+    cache.restore(entry, str(repo))
+    assert (repo / 'dist' / 'app').read_text() == 'binary'
+
+def test_log_only_entries_are_evicted(tmp_path, repo):
+    cache = StepCache(str(tmp_path / 'cache'), max_bytes=4096)
+    step = {'name': 'lint', 'run': 'lint', 'cache': {}}
+    for i in range(10):
+        cache.store(f'key{i}', step, str(repo), ['x' * 1000])
+
+    assert cache.lookup('key9') is not None
+    assert cache.lookup('key0') is None
+    sizes = sum(p.stat().st_size for p in (tmp_path / 'cache' / 'entries').iterdir())
+    assert sizes <= 4096
@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+
+import pytest
+
+from core.step_runner import StepRunner
+
+pytestmark = pytest.mark.skipif(os.name != 'posix', reason='steps run in POSIX sessions')
+
+def _alive(pid: int) -> bool:
+    """True while the process exists and is not a zombie"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except FileNotFoundError:
+        return False
+    except OSError:
+        try:
+            os.kill(pid, 0)
+            return True
+        except ProcessLookupError:
+            return False
+
+def _run(command, tmp_path, **kwargs):
+    lines = []
+    runner = StepRunner(lines.append, spill_dir=str(tmp_path / 'spill'), kill_grace=kwargs.pop('kill_grace', 2))
+    result = runner.run(command, str(tmp_path), **kwargs)
+    return result, lines
+
+def test_output_and_exit_code(tmp_path):
+    result, lines = _run('echo out; echo err >&2; exit 3', tmp_path, timeout=10)
+    assert result.returncode == 3
+    assert not result.timed_out and not result.cancelled
+    assert any(line.endswith('STDOUT: out') for line in lines)
+    assert any(line.endswith('STDERR: err') for line in lines)
+
+def test_background_child_is_stopped_when_shell_exits(tmp_path):
+    started = time.monotonic()
+    result, lines = _run('sleep 15 & echo $! > child.pid; echo started', tmp_path, timeout=10)
+    assert time.monotonic() - started < 5
+    assert result.returncode == 0
+    assert any(line.endswith('STDOUT: started') for line in lines)
+    child = int((tmp_path / 'child.pid').read_text())
+    assert not _alive(child)
+
+def test_timeout_stops_the_group(tmp_path):
+    result, _ = _run('sleep 30 & echo $! > child.pid; sleep 30', tmp_path, timeout=1)
+    assert result.timed_out
+    assert not _alive(int((tmp_path / 'child.pid').read_text()))
+
+def test_escaped_child_holding_output_does_not_hang(tmp_path):
+    started = time.monotonic()
+    result, lines = _run('setsid sleep 15 & sleep 0.5; echo started', tmp_path, timeout=2)
+    assert time.monotonic() - started < 6
+    assert result.timed_out
+    assert any(line.endswith('STDOUT: started') for line in lines)
+
+def test_cancel_while_output_is_held_open(tmp_path):
+    lines = []
+    runner = StepRunner(lines.append, spill_dir=str(tmp_path / 'spill'), kill_grace=2)
+    threading.Timer(1, runner.cancel).start()
+    started = time.monotonic()
+    result = runner.run('setsid sleep 15 & sleep 0.5; echo started', str(tmp_path), timeout=30)
+    assert time.monotonic() - started < 6
+    assert result.cancelled and not result.timed_out
+
+def test_cancel_before_run(tmp_path):
+    runner = StepRunner(lambda line: None, spill_dir=str(tmp_path / 'spill'))
+    runner.cancel()
+    result = runner.run('echo never', str(tmp_path))
+    assert result.cancelled and result.returncode == -1
+
+def test_max_rss_excludes_the_executor(tmp_path):
+    # Touch enough memory that an inherited peak would stand out
+    ballast = bytearray(256 * 1024 * 1024)
+    for i in range(0, len(ballast), 4096):
+        ballast[i] = 1
+    result, _ = _run('true', tmp_path, timeout=10)
+    assert result.max_rss_kb is not None
+    assert result.max_rss_kb < 64 * 1024
+    assert result.user_cpu is not None and result.sys_cpu is not None
+
+def test_exit_by_signal_is_reported(tmp_path):
+    result, _ = _run('kill -TERM $$', tmp_path, timeout=10)
+    assert result.returncode == -15